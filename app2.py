@@ -4,9 +4,7 @@ import json
 import time
 import math
 import re
-import tempfile
 from collections import Counter
-from pathlib import Path
 from datetime import datetime, timedelta
 
 import streamlit as st
@@ -20,7 +18,9 @@ LLM_API_KEY = os.getenv("LLM_API_KEY", "")           # api key
 
 USE_EXTERNAL_LLM = bool(LLM_API_KEY)  # use summarize_text if no key
 
-from summarizer2 import extract_text, summarize_text
+from summarizer2 import summarize_text
+from services.extraction import extract_text_from_bytes, iter_document_pages
+from services.document_library import add_document, new_document_id, remove_document
 
 # Quiet HF tokenizer warnings
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -694,19 +694,6 @@ def qa_compare_docs(q: str, docs: list[str], k: int, max_tokens: int):
     return ans, sources
 
 
-def _bytes_to_text_via_tmp(name: str, blob: bytes) -> str:
-    suffix = Path(name).suffix or ".bin"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(blob)
-        tmp_path = tmp.name
-    try:
-        return extract_text(tmp_path)
-    finally:
-        try:
-            os.unlink(tmp_path)
-        except Exception:
-            pass
-
 def _chunk_text_words(text: str, chunk_words: int = 450, overlap: int = 60):
     """
     Section/sentence-aware chunker to reduce mid-sentence cuts.
@@ -749,6 +736,26 @@ def _chunk_text_words(text: str, chunk_words: int = 450, overlap: int = 60):
             yield " ".join(buf)
 
 
+def _chunk_pages_words(pages, chunk_words: int = 450, overlap: int = 60):
+    """
+    _chunk_text_words over a stream of page texts: pages are gathered until
+    they hold a chunk's worth of words, so chunks come out while later
+    pages are still being extracted.
+    """
+    buf, count = [], 0
+    for page in pages:
+        page = (page or "").strip()
+        if not page:
+            continue
+        buf.append(page)
+        count += len(page.split())
+        if count >= chunk_words:
+            yield from _chunk_text_words("\n\n".join(buf), chunk_words, overlap)
+            buf, count = [], 0
+    if buf:
+        yield from _chunk_text_words("\n\n".join(buf), chunk_words, overlap)
+
+
 def _make_internal_facts_chunk():
     docs = st.session_state.get("documents", [])
     clients = st.session_state.get("clients", [])
@@ -887,17 +894,13 @@ def build_index_from_documents(documents: list) -> TinyTfidfQARetriever:
 
         # Prefer full text → summary → minimal metadata
         if isinstance(d.get("content"), (bytes, bytearray)) and d["content"]:
-            raw = _bytes_to_text_via_tmp(name, d["content"])
-        elif d.get("summary"):
-            raw = d["summary"]
+            # chunk pages as they are extracted (cached by file SHA-256 after the upload)
+            pieces = _chunk_pages_words(iter_document_pages(name, d["content"]), 450, 60)
         else:
-            raw = f"Document: {name}. Client: {client}. Matter: {d.get('matter')}. Type: {d.get('type')}."
-
-        raw = (raw or "").strip()
-        if not raw:
-            continue
+            raw = d.get("summary") or f"Document: {name}. Client: {client}. Matter: {d.get('matter')}. Type: {d.get('type')}."
+            pieces = _chunk_text_words(raw, 450, 60)
 
-        for piece in _chunk_text_words(raw, 450, 60):
+        for piece in pieces:
             cid += 1
             preview = piece[:350].replace("\n", " ") + ("..." if len(piece) > 350 else "")
             chunks.append({
@@ -1244,17 +1247,8 @@ elif page == "Document Management":
                 size_str = _human_size_from_bytes(len(file_bytes))
 
                 # Extract text for summary
-                with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp:
-                    tmp.write(file_bytes)
-                    tmp_path = tmp.name
-                try:
-                    with st.spinner("Extracting text…"):
-                        text_content = extract_text(tmp_path)
-                finally:
-                    try:
-                        os.unlink(tmp_path)
-                    except Exception:
-                        pass
+                with st.spinner("Extracting text…"):
+                    text_content = extract_text_from_bytes(uploaded_file.name, file_bytes)
 
                 # Guess type from filename
                 fn = uploaded_file.name.lower()
@@ -1278,7 +1272,7 @@ elif page == "Document Management":
                     summary = "No text extracted or extraction error."
 
                 new_doc = {
-                    "id": len(st.session_state.documents) + 1,
+                    "id": new_document_id(),
                     "name": uploaded_file.name,
                     "client": upload_client,
                     "matter": upload_matter,
@@ -1289,7 +1283,7 @@ elif page == "Document Management":
                     "content": file_bytes,
                     "summary": summary,
                 }
-                st.session_state.documents.append(new_doc)
+                add_document(st.session_state, new_doc)
                 increment_usage(user_email, "document")
                 invalidate_qa_index()
                 st.success(f"Document '{uploaded_file.name}' uploaded successfully!")
@@ -1344,7 +1338,7 @@ elif page == "Document Management":
                         st.info("Demo document - no file to download.")
             with b4:
                 if st.button("🗑️ Delete", key=f"delete_{doc['id']}"):
-                    st.session_state.documents = [d for d in st.session_state.documents if d["id"] != doc["id"]]
+                    remove_document(st.session_state, doc["id"])
                     invalidate_qa_index()
                     st.success(f"Document '{doc['name']}' deleted!")
                     st.rerun()
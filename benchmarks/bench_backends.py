@@ -0,0 +1,179 @@
+# benchmarks/bench_backends.py
+"""
+Compare a summarizer2 inference backend (int8 / onnx) against the fp32
+reference on a fixed local corpus.
+
+Reports per-document latency, model memory and ROUGE drift of the
+candidate summaries against the fp32 summaries.
+
+    python benchmarks/bench_backends.py --backend int8
+    python benchmarks/bench_backends.py --backend onnx --out bench_backends.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List
+
+# The reference path must be what summarizer2 builds at import time.
+os.environ["LEGALDOC_SUMMARIZER_BACKEND"] = "fp32"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import summarizer2  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus"
+
+
+# ---------- ROUGE (no external dependency) ----------
+def _tokens(text: str) -> List[str]:
+    return [t for t in "".join(c.lower() if c.isalnum() else " " for c in text).split() if t]
+
+def _ngrams(toks: List[str], n: int) -> Dict[tuple, int]:
+    out: Dict[tuple, int] = {}
+    for i in range(len(toks) - n + 1):
+        g = tuple(toks[i:i + n])
+        out[g] = out.get(g, 0) + 1
+    return out
+
+def _f1(overlap: int, n_ref: int, n_cand: int) -> float:
+    if not overlap or not n_ref or not n_cand:
+        return 0.0
+    p, r = overlap / n_cand, overlap / n_ref
+    return 2 * p * r / (p + r)
+
+def rouge_n(ref: str, cand: str, n: int) -> float:
+    a, b = _ngrams(_tokens(ref), n), _ngrams(_tokens(cand), n)
+    overlap = sum(min(c, b.get(g, 0)) for g, c in a.items())
+    return _f1(overlap, sum(a.values()), sum(b.values()))
+
+def rouge_l(ref: str, cand: str) -> float:
+    a, b = _tokens(ref), _tokens(cand)
+    if not a or not b:
+        return 0.0
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b, start=1):
+            cur.append(prev[j - 1] + 1 if x == y else max(prev[j], cur[j - 1]))
+        prev = cur
+    return _f1(prev[-1], len(a), len(b))
+
+
+# ---------- measurement helpers ----------
+@contextmanager
+def _using(pipe):
+    """Temporarily route summarizer2's generation through `pipe`."""
+    saved = summarizer2._local_summarizer
+    summarizer2._local_summarizer = pipe
+    try:
+        yield
+    finally:
+        summarizer2._local_summarizer = saved
+
+def _model_bytes(pipe, backend: str) -> int:
+    if backend == "onnx":
+        return sum(p.stat().st_size for p in summarizer2.ONNX_EXPORT_DIR.glob("*.onnx*"))
+    buf = io.BytesIO()
+    summarizer2.torch.save(pipe.model.state_dict(), buf)
+    return buf.tell()
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _summarize(pipe, text: str, max_len: int) -> Dict:
+    cleaned = summarizer2._clean_text(text)
+    with _using(pipe):
+        t0 = time.perf_counter()
+        out = summarizer2._reduce_until_fits(
+            cleaned,
+            per_chunk_len=max(120, int(max_len * 0.75)),
+            final_len=max_len,
+        )
+        elapsed = time.perf_counter() - t0
+    return {"summary": out.strip(), "seconds": elapsed}
+
+
+def run(backend: str, corpus: Path, max_len: int, repeats: int) -> Dict:
+    docs = sorted(p for p in corpus.glob("*.txt"))
+    if not docs:
+        raise SystemExit(f"No .txt documents found in {corpus}")
+
+    reference = summarizer2._local_summarizer
+    rss_before = _peak_rss_mb()
+    candidate, resolved = summarizer2.build_summarizer(backend)
+    rss_after = _peak_rss_mb()
+    if resolved != backend:
+        raise SystemExit(f"Backend '{backend}' is not available here (resolved to '{resolved}')")
+
+    rows = []
+    for path in docs:
+        text = path.read_text(errors="ignore")
+        ref_runs = [_summarize(reference, text, max_len) for _ in range(repeats)]
+        cand_runs = [_summarize(candidate, text, max_len) for _ in range(repeats)]
+        ref, cand = ref_runs[0]["summary"], cand_runs[0]["summary"]
+        rows.append({
+            "document": path.name,
+            "input_tokens": summarizer2._tok_len(summarizer2._clean_text(text)),
+            "fp32_seconds": min(r["seconds"] for r in ref_runs),
+            f"{backend}_seconds": min(r["seconds"] for r in cand_runs),
+            "rouge1": round(rouge_n(ref, cand, 1), 4),
+            "rouge2": round(rouge_n(ref, cand, 2), 4),
+            "rougeL": round(rouge_l(ref, cand), 4),
+            "identical": ref == cand,
+        })
+
+    ref_total = sum(r["fp32_seconds"] for r in rows)
+    cand_total = sum(r[f"{backend}_seconds"] for r in rows)
+    n = len(rows)
+    return {
+        "model": summarizer2.MODEL_NAME,
+        "backend": backend,
+        "documents": n,
+        "max_len": max_len,
+        "repeats": repeats,
+        "latency": {
+            "fp32_total_seconds": round(ref_total, 3),
+            f"{backend}_total_seconds": round(cand_total, 3),
+            "speedup": round(ref_total / cand_total, 2) if cand_total else None,
+        },
+        "memory": {
+            "fp32_model_mb": round(_model_bytes(reference, "fp32") / 2**20, 1),
+            f"{backend}_model_mb": round(_model_bytes(candidate, backend) / 2**20, 1),
+            "peak_rss_mb_before_candidate": round(rss_before, 1),
+            "peak_rss_mb_after_candidate": round(rss_after, 1),
+        },
+        "rouge_vs_fp32": {
+            "rouge1": round(sum(r["rouge1"] for r in rows) / n, 4),
+            "rouge2": round(sum(r["rouge2"] for r in rows) / n, 4),
+            "rougeL": round(sum(r["rougeL"] for r in rows) / n, 4),
+            "identical_outputs": sum(r["identical"] for r in rows),
+        },
+        "per_document": rows,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", choices=[b for b in summarizer2.SUMMARIZER_BACKENDS if b != "fp32"], default="int8")
+    ap.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    ap.add_argument("--max-len", type=int, default=220)
+    ap.add_argument("--repeats", type=int, default=1, help="runs per document; the fastest is reported")
+    ap.add_argument("--out", type=Path, default=None, help="write the JSON report here as well")
+    args = ap.parse_args()
+
+    report = run(args.backend, args.corpus, args.max_len, max(1, args.repeats))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
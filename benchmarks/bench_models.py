@@ -0,0 +1,137 @@
+# benchmarks/bench_models.py
+"""
+Memory of the plain model dataclasses vs their compact variants
+(models.compact) for a synthetic document library.
+
+Builds the same N documents twice, once as models.document.Document and
+once as CompactDocument, and reports traced Python heap per document,
+the size of the field store file, and the cost of reading a lazily
+loaded field back.
+
+    python benchmarks/bench_models.py
+    python benchmarks/bench_models.py --documents 100000 --text-kb 8 --out bench_models.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+# keep the field store's scratch file out of the user's cache
+os.environ.setdefault("LEGALDOC_CACHE_DIR", tempfile.mkdtemp(prefix="bench_models_"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from models.document import Document, DocumentAnnotation, DocumentActivity  # noqa: E402
+from models.compact import CompactDocument  # noqa: E402
+from services.field_store import get_field_store  # noqa: E402
+
+WORDS = ("agreement party shall indemnify liability termination notice term governing law "
+         "confidential payment breach remedy warranty assignment clause section herein").split()
+STATUSES = ("draft", "review", "approved", "final")
+TYPES = ("contract", "brief", "memo", "correspondence", "filing")
+
+
+def _document(i: int, rng: random.Random, text_kb: int) -> Document:
+    created = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(10 ** 6))
+    user = f"user{rng.randrange(50)}"
+    doc = Document(
+        id=f"doc-{i:08d}", name=f"Document {i}", matter_id=f"matter-{rng.randrange(5000)}",
+        client_name=f"Client {rng.randrange(1000)}", document_type=rng.choice(TYPES),
+        current_version="1.0", status=rng.choice(STATUSES),
+        tags=rng.sample(["nda", "urgent", "tax", "ip", "hr", "lease"], rng.randint(0, 3)),
+        extracted_text=" ".join(rng.choices(WORDS, k=text_kb * 150)),
+        key_information={"parties": [f"Party {rng.randrange(100)}", f"Party {rng.randrange(100)}"],
+                         "value": rng.randrange(10 ** 6)},
+        created_date=created, last_modified=created, is_privileged=rng.random() < 0.2,
+        created_by=user, modified_by=user, file_size=text_kb * 1024, page_count=text_kb,
+    )
+    for k in range(5):
+        doc.activity_log.append(DocumentActivity(
+            id=f"{doc.id}-a{k}", user_id=user, action="viewed", timestamp=created,
+            details={"ip": "10.0.0.1"}))
+    if rng.random() < 0.3:
+        doc.annotations.append(DocumentAnnotation(
+            id=f"{doc.id}-n", user_id=user, content="Check clause 4.2", page_number=1))
+    return doc
+
+
+def _measure(build: Callable[[], List[Any]]) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    objs = build()
+    seconds = time.perf_counter() - t0
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return {"objects": objs, "bytes": current, "seconds": seconds}
+
+
+def run(n: int, text_kb: int, seed: int) -> Dict[str, Any]:
+    plain = _measure(lambda: [_document(i, random.Random(seed + i), text_kb) for i in range(n)])
+    plain_docs = plain.pop("objects")
+    sample_text = plain_docs[n // 2].extracted_text
+    del plain_docs
+    gc.collect()
+
+    compact = _measure(lambda: [CompactDocument.from_model(_document(i, random.Random(seed + i), text_kb))
+                                for i in range(n)])
+    compact_docs = compact.pop("objects")
+
+    probe = compact_docs[n // 2]
+    t0 = time.perf_counter()
+    text = probe.extracted_text
+    read_ms = (time.perf_counter() - t0) * 1000
+    assert text == sample_text, "compact document returned different text"
+    t0 = time.perf_counter()
+    activity = len(probe.activity_log)
+    probe.release()
+    list_ms = (time.perf_counter() - t0) * 1000
+
+    scale = 100_000 / n
+    return {
+        "documents": n,
+        "text_kb": text_kb,
+        "plain": {
+            "bytes_per_document": round(plain["bytes"] / n),
+            "mb_per_100k_documents": round(plain["bytes"] * scale / 2 ** 20, 1),
+            "build_seconds": round(plain["seconds"], 2),
+        },
+        "compact": {
+            "bytes_per_document": round(compact["bytes"] / n),
+            "mb_per_100k_documents": round(compact["bytes"] * scale / 2 ** 20, 1),
+            "build_seconds": round(compact["seconds"], 2),
+            "field_store_mb": round(get_field_store().stats()["file_bytes"] / 2 ** 20, 1),
+            "read_text_ms": round(read_ms, 3),
+            "read_and_release_activity_ms": round(list_ms, 3),
+            "activity_entries": activity,
+        },
+        "memory_ratio": round(plain["bytes"] / compact["bytes"], 1) if compact["bytes"] else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--documents", type=int, default=100_000)
+    ap.add_argument("--text-kb", type=int, default=4, help="approximate extracted text per document")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=None, help="write the JSON report here as well")
+    args = ap.parse_args()
+
+    report = run(max(1, args.documents), max(1, args.text_kb), args.seed)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# benchmarks/bench_summarizer.py
+"""
+Offline throughput and cache benchmark for summarizer2.
+
+Runs without network access: by default it builds a tiny, randomly
+initialised BART (byte-level BPE trained on the synthetic corpus) so the
+numbers measure the pipeline - chunking, map/reduce rounds, caching - not
+model quality. Pass --model to benchmark a real local checkpoint instead.
+
+For each document size (tokens) it runs, in a fresh subprocess:
+  cold    - empty summary and chunk caches
+  warm    - same text again (whole-document cache hit)
+  edited  - one clause changed (only affected chunks re-summarized)
+and records latency, pieces/second, reduce rounds, chunk-cache hits,
+model calls and peak RSS. Results are written as JSON; --compare prints
+latency ratios against an earlier run.
+
+    python benchmarks/bench_summarizer.py --out bench_summarizer.json
+    python benchmarks/bench_summarizer.py --sizes 1000 10000 --compare old.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 200_000]
+TINY_MODEL_DIR = Path(tempfile.gettempdir()) / "legaldoc_bench" / "tiny-bart"
+
+
+# ---------- synthetic legal documents ----------
+_PARTIES = ["Northwind Analytics LLC", "Bluebird Health Systems, Inc.", "Harbor Point Logistics Corp.",
+            "Granite Row Properties LLC", "Copper Kettle Bakery Inc.", "Meridian Capital Partners LP"]
+_STATES = ["New York", "Delaware", "California", "Texas", "Washington", "Colorado"]
+_CLAUSES = [
+    "{a} shall pay {b} the sum of ${amt:,} within {days} days after receipt of each invoice.",
+    "Either party may terminate this Agreement upon {days} days written notice to the other party.",
+    "{b} shall maintain commercial general liability insurance of not less than ${amt:,} per occurrence.",
+    "All Confidential Information disclosed by {a} shall remain the sole property of {a}.",
+    "{a} shall indemnify and hold harmless {b} from any third-party claims arising from its gross negligence.",
+    "In no event shall either party be liable for indirect, incidental or consequential damages.",
+    "This Agreement shall be governed by the laws of the State of {state}.",
+    "Any dispute shall first be submitted to mediation and, if unresolved within {days} days, to arbitration.",
+    "{b} shall deliver the Services in accordance with the Statement of Work and the acceptance criteria.",
+    "Late payments accrue interest at {rate}% per month or the maximum rate permitted by law.",
+    "Neither party may assign this Agreement without the prior written consent of the other party.",
+    "The obligations in this Section survive termination of this Agreement for {years} years.",
+]
+
+def _clause(rng: random.Random, section: int) -> str:
+    a, b = rng.sample(_PARTIES, 2)
+    body = " ".join(
+        rng.choice(_CLAUSES).format(
+            a=a, b=b, amt=rng.randrange(1_000, 2_000_000, 500), days=rng.choice([10, 15, 30, 45, 60, 90]),
+            state=rng.choice(_STATES), rate=rng.choice([1, 1.5, 2]), years=rng.choice([1, 2, 3, 5]),
+        )
+        for _ in range(rng.randint(3, 7))
+    )
+    return f"Section {section}. {body}"
+
+def synthetic_clauses(n_tokens: int, count_tokens, seed: int = 0) -> List[str]:
+    """Clauses of a synthetic agreement totalling roughly n_tokens tokens."""
+    rng = random.Random(seed)
+    a, b = rng.sample(_PARTIES, 2)
+    clauses = [f"MASTER SERVICES AGREEMENT. This Agreement is effective as of March 1, 2024, "
+               f"by and between {a} and {b}."]
+    total = count_tokens(clauses[0])
+    while total < n_tokens:
+        clauses.append(_clause(rng, len(clauses)))
+        total += count_tokens(clauses[-1])
+    return clauses
+
+def _training_corpus() -> List[str]:
+    rng = random.Random(1234)
+    return ["\n".join(_clause(rng, i) for i in range(20)) for _ in range(50)]
+
+
+# ---------- tiny offline model ----------
+def build_tiny_model(target: Path) -> Path:
+    """Byte-level BPE tokenizer + randomly initialised 2-layer BART, saved locally."""
+    if (target / "config.json").exists():
+        return target
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, processors, trainers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    specials = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    tok.train_from_iterator(_training_corpus(), trainers.BpeTrainer(
+        vocab_size=2000, special_tokens=specials,
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    ))
+    tok.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)],
+    )
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token="<s>", eos_token="</s>", pad_token="<pad>",
+        unk_token="<unk>", mask_token="<mask>", model_max_length=1024,
+    )
+
+    torch.manual_seed(0)
+    config = BartConfig(
+        vocab_size=len(fast), d_model=64, encoder_layers=2, decoder_layers=2,
+        encoder_attention_heads=2, decoder_attention_heads=2,
+        encoder_ffn_dim=128, decoder_ffn_dim=128, max_position_embeddings=1024,
+        pad_token_id=1, bos_token_id=0, eos_token_id=2, decoder_start_token_id=2,
+        forced_bos_token_id=0, forced_eos_token_id=2,
+    )
+    model = BartForConditionalGeneration(config)
+    target.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(str(target), safe_serialization=True)
+    fast.save_pretrained(str(target))
+    return target
+
+
+# ---------- worker (one document size per process) ----------
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _timed(summarizer2, text: str, max_len: int, tier: str) -> Dict:
+    summarizer2.reset_summary_stats()
+    t0 = time.perf_counter()
+    out = summarizer2.summarize_text(text, max_len=max_len, tier=tier)
+    elapsed = time.perf_counter() - t0
+    stats = summarizer2.summary_stats()
+    return {
+        "seconds": round(elapsed, 4),
+        "pieces_per_second": round(stats["pieces"] / elapsed, 2) if elapsed and stats["pieces"] else 0.0,
+        "ok": not out.startswith("Error"),
+        **stats,
+    }
+
+def run_worker(n_tokens: int, max_len: int, tier: str) -> Dict:
+    sys.path.insert(0, str(ROOT))
+    import summarizer2
+
+    count = lambda t: len(summarizer2._tokenizer.encode(t, add_special_tokens=False))
+    clauses = synthetic_clauses(n_tokens, count)
+    text = "\n\n".join(clauses)
+    # change one clause in the middle: a realistic redline
+    mid = len(clauses) // 2
+    edited = list(clauses)
+    edited[mid] = edited[mid].replace("shall", "must", 1) + " This Section was amended by the parties."
+    edited_text = "\n\n".join(edited)
+
+    summarizer2.clear_cache()
+
+    cold = _timed(summarizer2, text, max_len, tier)
+    warm = _timed(summarizer2, text, max_len, tier)
+    edit = _timed(summarizer2, edited_text, max_len, tier)
+    return {
+        "target_tokens": n_tokens,
+        "actual_tokens": summarizer2._tok_len(summarizer2._clean_text(text)),
+        "tier": tier,
+        "cold": cold,
+        "warm": warm,
+        "edited": edit,
+        "edited_chunk_reuse": round(edit["chunk_cache_hits"] / edit["pieces"], 3) if edit["pieces"] else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+# ---------- orchestration ----------
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def _compare(report: Dict, baseline_path: Path) -> List[str]:
+    old = {r["target_tokens"]: r for r in json.loads(baseline_path.read_text())["results"]}
+    lines = [f"latency vs {baseline_path.name} (new/old; <1 is faster):"]
+    for r in report["results"]:
+        prev = old.get(r["target_tokens"])
+        if not prev:
+            continue
+        ratios = []
+        for phase in ("cold", "warm", "edited"):
+            a, b = r[phase]["seconds"], prev[phase]["seconds"]
+            ratios.append(f"{phase} {a / b:.2f}x" if b else f"{phase} n/a")
+        lines.append(f"  {r['target_tokens']:>7} tokens: " + ", ".join(ratios))
+    return lines
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="document sizes in tokens")
+    ap.add_argument("--model", default=None, help="local model directory (default: tiny random BART)")
+    ap.add_argument("--tier", default="full", choices=["fast", "full"])
+    ap.add_argument("--max-len", type=int, default=220)
+    ap.add_argument("--out", type=Path, default=None, help="write the JSON report here")
+    ap.add_argument("--compare", type=Path, default=None, help="earlier JSON report to compare against")
+    ap.add_argument("--worker-tokens", type=int, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker_tokens is not None:
+        print(json.dumps(run_worker(args.worker_tokens, args.max_len, args.tier)))
+        return
+
+    model_dir = args.model or str(build_tiny_model(TINY_MODEL_DIR))
+    results = []
+    with tempfile.TemporaryDirectory(prefix="legaldoc_bench_cache_") as cache_dir:
+        env = dict(os.environ,
+                   LEGALDOC_SUMMARIZER_MODEL=model_dir,
+                   LEGALDOC_CACHE_DIR=cache_dir,
+                   HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1",
+                   TOKENIZERS_PARALLELISM="false")
+        for n in args.sizes:
+            cmd = [sys.executable, __file__, "--worker-tokens", str(n),
+                   "--max-len", str(args.max_len), "--tier", args.tier]
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise SystemExit(f"worker for {n} tokens failed:\n{proc.stderr}")
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(row)
+            print(f"{n:>7} tokens: cold {row['cold']['seconds']:.2f}s "
+                  f"({row['cold']['pieces']} pieces, {row['cold']['reduce_rounds']} rounds), "
+                  f"warm {row['warm']['seconds']:.3f}s, edited {row['edited']['seconds']:.2f}s, "
+                  f"peak RSS {row['peak_rss_mb']:.0f} MB", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": args.model or "tiny-random-bart",
+            "tier": args.tier,
+            "max_len": args.max_len,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text)
+    if args.compare:
+        print("\n".join(_compare(report, args.compare)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -339,9 +339,34 @@ class BillingCalculator:
         random_suffix = str(uuid.uuid4())[:8].upper()
         return f"{prefix}-{timestamp}-{random_suffix}"
     
+    @staticmethod
+    def summarize_period(store, period_start: datetime, period_end: datetime) -> BillingSummary:
+        """
+        BillingSummary for [period_start, period_end) from a
+        services.billing_store.BillingStore, in vectorized passes.
+        """
+        time = store.time_totals(start=period_start, end=period_end)
+        invoices = store.invoice_totals(start=period_start, end=period_end)
+        expenses = store.expense_totals(start=period_start, end=period_end)
+        sent = invoices['invoices'] - store.status_counts(
+            'invoices', start=period_start, end=period_end).get(InvoiceStatus.DRAFT.value, 0)
+        return BillingSummary(
+            period_start=period_start,
+            period_end=period_end,
+            total_hours=time['total_hours'],
+            billable_hours=time['billable_hours'],
+            non_billable_hours=time['non_billable_hours'],
+            total_revenue=time['billable_amount'],
+            total_expenses=expenses['total_amount'],
+            invoices_sent=sent,
+            invoices_paid=invoices['paid_count'],
+            outstanding_amount=invoices['outstanding_amount'],
+            collection_rate=invoices['collection_rate'],
+        )
+    
     @staticmethod
     def calculate_aging(invoices: List[Invoice]) -> Dict[str, float]:
-        """Calculate aging report for outstanding invoices."""
+        """Calculate aging report for outstanding invoices (BillingStore.aging for large books)."""
         aging = {
             'current': 0.0,
             '1-30_days': 0.0,
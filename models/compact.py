@@ -0,0 +1,213 @@
+"""
+Slotted, memory-compact variants of the core models.
+
+CompactDocument, CompactMatter, CompactClient, CompactTimeEntry and
+CompactInvoice have the same attributes, properties and methods as the
+dataclasses they are built from, but:
+
+- instances use __slots__ instead of a per-instance __dict__, and short
+  repeated strings (statuses, types, user and client names) are interned
+- heavy fields (text, logs, annotations, line items, ...) are lazy handles
+  into services.field_store. An object holds only a small handle per
+  field, and the value is read back the first time it is used
+
+A lazily read container (list, dict, nested record) is kept on the object
+so that in-place changes like doc.activity_log.append(...) stick.
+release() writes such values back to the store and drops them again.
+Strings are never kept. Heavy fields that are empty or None cost no
+storage at all. Written-back values leave garbage in the store;
+compact_field_store() reclaims it for the objects passed to it.
+
+    compact = CompactDocument.from_model(document)
+    compact.extracted_text           # read from the store
+    compact.log_activity(...)        # Document's own method
+    compact.release()                # back to handles only
+    document = compact.to_model()    # the full dataclass again
+
+benchmarks/bench_models.py measures the memory per 100k documents.
+"""
+import sys
+import dataclasses
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .document import Document
+from .matter import Matter
+from .user import Client
+from .billing import TimeEntry, Invoice
+
+# immutable values are read from the store on every access instead of being kept
+_IMMUTABLE = (str, bytes, int, float, bool, tuple, frozenset)
+# empty containers and strings are stored as their type, not as a blob
+_EMPTY = (str, list, dict, tuple, set)
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str and len(value) <= 64 else value
+
+class _HeavyField:
+    """Descriptor for one heavy field: a handle in _handles, the value in _loaded once read."""
+
+    def __init__(self, name: str, slot: int):
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        loaded = obj._loaded
+        if loaded is not None and self.name in loaded:
+            return loaded[self.name]
+        handle = obj._handles[self.slot]
+        if handle is None:
+            return None
+        if isinstance(handle, type):
+            value = handle()
+        else:
+            from services.field_store import get_field_store
+            value = get_field_store().get(handle)
+        if not isinstance(value, _IMMUTABLE):
+            if obj._loaded is None:
+                obj._loaded = {}
+            obj._loaded[self.name] = value
+        return value
+
+    def __set__(self, obj, value) -> None:
+        if obj._loaded is None:
+            obj._loaded = {}
+        obj._loaded[self.name] = value
+
+class CompactModel:
+    """Base of the generated compact classes; see compact_variant()."""
+    __slots__ = ('_handles', '_loaded')
+
+    model: type = object
+    LIGHT_FIELDS: Tuple[str, ...] = ()
+    HEAVY_FIELDS: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_model(cls, obj) -> 'CompactModel':
+        from services.field_store import get_field_store
+        store = get_field_store()
+        self = cls.__new__(cls)
+        for name in cls.LIGHT_FIELDS:
+            setattr(self, name, _intern(getattr(obj, name)))
+        self._handles = tuple(_handle_for(store, getattr(obj, name)) for name in cls.HEAVY_FIELDS)
+        self._loaded = None
+        return self
+
+    def to_model(self):
+        """The full dataclass, with every heavy field read back."""
+        names = self.LIGHT_FIELDS + self.HEAVY_FIELDS
+        return self.model(**{name: getattr(self, name) for name in names})
+
+    def release(self) -> None:
+        """Write kept heavy values back to the store and drop them from the object."""
+        loaded = self._loaded
+        if not loaded:
+            return
+        from services.field_store import get_field_store
+        store = get_field_store()
+        handles = list(self._handles)
+        for name, value in loaded.items():
+            slot = self.HEAVY_FIELDS.index(name)
+            previous = handles[slot]
+            handles[slot] = _handle_for(store, value, previous if isinstance(previous, int) else None)
+        self._handles = tuple(handles)
+        self._loaded = None
+
+    def field_size(self, name: str) -> int:
+        """len() of a heavy field (1 for non-containers, 0 if empty) without reading it."""
+        if self._loaded is not None and name in self._loaded:
+            value = self._loaded[name]
+            return 0 if value is None else (len(value) if hasattr(value, '__len__') else 1)
+        handle = self._handles[self.HEAVY_FIELDS.index(name)]
+        if handle is None or isinstance(handle, type):
+            return 0
+        return handle.count
+
+    def __reduce__(self):
+        # handles point into this process's scratch file; ship the full model
+        return (_from_model, (type(self), self.to_model()))
+
+    def __repr__(self) -> str:
+        label = getattr(self, 'name', None) or getattr(self, 'invoice_number', None) or ''
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r}, {label!r})"
+
+def _handle_for(store, value: Any, previous=None):
+    if value is None:
+        return None
+    if not value and type(value) in _EMPTY:
+        return type(value)
+    return store.put(value, previous)
+
+def compact_field_store(objects: Iterable[CompactModel], force: bool = False) -> bool:
+    """
+    Release `objects` and rewrite the shared field store with only their
+    values, once it is mostly garbage (or always with `force`). `objects`
+    must be every compact object still in use: values of any other object
+    are lost. Returns whether the store was compacted.
+    """
+    from services.field_store import get_field_store
+    store = get_field_store()
+    if not force and not store.needs_compaction():
+        return False
+    objects = list(objects)
+    for obj in objects:
+        obj.release()
+    moved = store.compact(h for obj in objects for h in obj._handles if isinstance(h, int))
+    for obj in objects:
+        obj._handles = tuple(moved[h] if isinstance(h, int) else h for h in obj._handles)
+    return True
+
+def _from_model(cls, obj):
+    return cls.from_model(obj)
+
+def compact_variant(model: type, heavy: Tuple[str, ...], name: Optional[str] = None) -> type:
+    """
+    A slotted class with `model`'s fields, properties and methods, where the
+    fields named in `heavy` live in the field store.
+    """
+    names = [f.name for f in dataclasses.fields(model)]
+    unknown = set(heavy) - set(names)
+    if unknown:
+        raise ValueError(f"{model.__name__} has no fields {sorted(unknown)}")
+    light = tuple(n for n in names if n not in heavy)
+    namespace: Dict[str, Any] = {}
+    # properties, methods and constants of the model and its bases
+    for klass in reversed(model.__mro__[:-1]):
+        for attr, value in vars(klass).items():
+            if not attr.startswith('__') and attr not in names:
+                namespace[attr] = value
+    namespace.update({
+        '__slots__': light,
+        '__module__': __name__,
+        '__doc__': f"Slotted {model.__name__} with lazily loaded {', '.join(heavy)}.",
+        'model': model,
+        'LIGHT_FIELDS': light,
+        'HEAVY_FIELDS': tuple(heavy),
+    })
+    for slot, field_name in enumerate(heavy):
+        namespace[field_name] = _HeavyField(field_name, slot)
+    return type(name or f"Compact{model.__name__}", (CompactModel,), namespace)
+
+# ---------- the compact models ----------
+_CompactDocumentBase = compact_variant(Document, (
+    'extracted_text', 'key_information', 'versions', 'access_permissions',
+    'annotations', 'activity_log', 'metadata', 'ai_analysis',
+), name='_CompactDocumentBase')
+
+class CompactDocument(_CompactDocumentBase):
+    """Slotted Document; text, analysis, versions, access and activity logs live in the field store."""
+    __slots__ = ()
+
+    @property
+    def has_annotations(self) -> bool:
+        return self.field_size('annotations') > 0
+
+CompactMatter = compact_variant(Matter, (
+    'description', 'contacts', 'notes', 'expenses', 'court_info', 'custom_fields',
+))
+CompactClient = compact_variant(Client, (
+    'contact_info', 'contacts', 'billing_info', 'engagement', 'notes',
+))
+CompactTimeEntry = compact_variant(TimeEntry, ('description', 'notes'))
+CompactInvoice = compact_variant(Invoice, ('line_items', 'notes'))
@@ -50,6 +50,17 @@ class DocumentVersion:
     checksum: str
     change_summary: Optional[str] = None
     is_current: bool = False
+    # extracted text lives in services.version_store as base + deltas
+    document_id: str = ""
+    text_index: Optional[int] = None
+    
+    @property
+    def extracted_text(self) -> Optional[str]:
+        """This version's extracted text, rebuilt from the version store on demand."""
+        if self.text_index is None:
+            return None
+        from services.version_store import get_version_store
+        return get_version_store().text(self.document_id, self.text_index)
 
 @dataclass
 class DocumentAccess:
@@ -151,13 +162,18 @@ class Document:
         """Calculate days since document was last modified."""
         return (datetime.now() - self.last_modified).days
     
+    @property
+    def has_annotations(self) -> bool:
+        return bool(self.annotations)
+    
     @property
     def is_recent(self) -> bool:
         """Check if document was created or modified in the last 7 days."""
         return self.days_since_created <= 7 or self.days_since_modified <= 7
     
     def add_version(self, created_by: str, file_path: str, file_size: int, 
-                   checksum: str, change_summary: str = None) -> DocumentVersion:
+                   checksum: str, change_summary: str = None,
+                   extracted_text: str = None) -> DocumentVersion:
         """Add a new version of the document."""
         # Mark all existing versions as not current
         for version in self.versions:
@@ -175,9 +191,15 @@ class Document:
             change_summary=change_summary,
             is_current=True
         )
+        if extracted_text is not None:
+            from services.version_store import get_version_store
+            new_version.document_id = self.id
+            new_version.text_index = get_version_store().add(self.id, extracted_text)
         
         self.versions.append(new_version)
         self.current_version = version_number
+        if extracted_text is not None:
+            self.extracted_text = extracted_text
         self.last_modified = datetime.now()
         self.modified_by = created_by
         self.file_path = file_path
@@ -189,6 +211,32 @@ class Document:
         
         return new_version
     
+    def get_version(self, version_number: str) -> Optional[DocumentVersion]:
+        """Find a version by its number."""
+        for version in self.versions:
+            if version.version_number == version_number:
+                return version
+        return None
+    
+    def diff_versions(self, old_version: str, new_version: str = None, ignore_whitespace: bool = True):
+        """
+        Clause-aligned diff between two versions' extracted text (the current
+        text when new_version is omitted). Returns a
+        services.version_diff.VersionDiff.
+        """
+        from services.version_diff import diff_versions
+        
+        def version_text(number: str) -> str:
+            version = self.get_version(number)
+            text = version.extracted_text if version is not None else None
+            if text is None:
+                raise ValueError(f"No extracted text stored for version {number}")
+            return text
+        
+        old_text = version_text(old_version)
+        new_text = self.extracted_text if new_version is None else version_text(new_version)
+        return diff_versions(old_text, new_text, ignore_whitespace=ignore_whitespace)
+    
     def grant_access(self, user_id: str, access_level: str, granted_by: str,
                     expires_date: datetime = None, notes: str = None) -> None:
         """Grant access to a user."""
@@ -341,8 +389,15 @@ class Document:
         self.key_information.update(info)
         return self.key_information
     
-    def get_related_documents(self, documents: List['Document']) -> List['Document']:
-        """Find documents related to this one based on various criteria."""
+    def get_related_documents(self, documents: List['Document'], index=None) -> List['Document']:
+        """
+        Find documents related to this one based on various criteria. With
+        the library's services.document_index.DocumentIndex as `index`, the
+        answer comes from its related-document graph (see
+        DocumentIndex.related, which can also rank) instead of a scan.
+        """
+        if index is not None and self.id in index:
+            return index.related(self.id)
         related = []
         
         for doc in documents:
@@ -460,18 +515,36 @@ class DocumentManager:
         return document
     
     @staticmethod
-    def filter_documents(documents: List[Document], criteria: DocumentSearchCriteria) -> List[Document]:
-        """Filter documents based on search criteria."""
-        filtered = documents
-        
+    def filter_documents(documents: Optional[List[Document]], criteria: DocumentSearchCriteria,
+                         index=None) -> List[Document]:
+        """
+        Filter documents based on search criteria. Pass the library's
+        services.document_index.DocumentIndex as `index` to answer from its
+        secondary indexes instead of checking every document; its text
+        index then matches text_query by whole terms (the last one as a
+        prefix) rather than by substring. With an index, the result is
+        still limited to `documents` (in their order); pass None to filter
+        the whole indexed library.
+        """
+        text_match = None
         if criteria.text_query:
             query_lower = criteria.text_query.lower()
-            filtered = [
-                doc for doc in filtered
-                if query_lower in doc.name.lower() or 
-                   query_lower in doc.extracted_text.lower() or
-                   any(query_lower in tag.lower() for tag in doc.tags)
-            ]
+            text_match = lambda doc: (
+                query_lower in doc.name.lower() or
+                query_lower in doc.extracted_text.lower() or
+                any(query_lower in tag.lower() for tag in doc.tags)
+            )
+        
+        if index is not None:
+            if documents is None:
+                return index.filter(criteria, text_match)
+            matched = set(index.filter_ids(criteria, text_match))
+            return [doc for doc in documents if doc.id in matched]
+        
+        filtered = documents
+        
+        if text_match is not None:
+            filtered = [doc for doc in filtered if text_match(doc)]
         
         if criteria.document_types:
             filtered = [doc for doc in filtered if doc.document_type in criteria.document_types]
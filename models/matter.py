@@ -514,8 +514,15 @@ class MatterManager:
         return matter
     
     @staticmethod
-    def filter_matters(matters: List[Matter], criteria: MatterSearchCriteria) -> List[Matter]:
-        """Filter matters based on search criteria."""
+    def filter_matters(matters: List[Matter], criteria: MatterSearchCriteria,
+                       deadline_index=None) -> List[Matter]:
+        """
+        Filter matters based on search criteria. Pass a
+        services.deadline_index.DeadlineIndex of these matters (e.g.
+        session_deadline_index(st.session_state)) as `deadline_index` to
+        answer the overdue criteria with one range query instead of
+        rescanning every matter's deadlines and tasks.
+        """
         filtered = matters
         
         if criteria.text_query:
@@ -559,16 +566,26 @@ class MatterManager:
             filtered = [matter for matter in filtered if matter.budget <= criteria.budget_max]
         
         if criteria.has_overdue_deadlines is not None:
-            filtered = [
-                matter for matter in filtered
-                if bool(matter.overdue_deadlines) == criteria.has_overdue_deadlines
-            ]
+            if deadline_index is not None:
+                overdue = set(deadline_index.overdue('deadline'))
+                filtered = [matter for matter in filtered
+                            if (matter.id in overdue) == criteria.has_overdue_deadlines]
+            else:
+                filtered = [
+                    matter for matter in filtered
+                    if bool(matter.overdue_deadlines) == criteria.has_overdue_deadlines
+                ]
         
         if criteria.has_overdue_tasks is not None:
-            filtered = [
-                matter for matter in filtered
-                if bool(matter.overdue_tasks) == criteria.has_overdue_tasks
-            ]
+            if deadline_index is not None:
+                overdue = set(deadline_index.overdue('task'))
+                filtered = [matter for matter in filtered
+                            if (matter.id in overdue) == criteria.has_overdue_tasks]
+            else:
+                filtered = [
+                    matter for matter in filtered
+                    if bool(matter.overdue_tasks) == criteria.has_overdue_tasks
+                ]
         
         if criteria.billing_types:
             filtered = [matter for matter in filtered if matter.billing_type in criteria.billing_types]
@@ -576,8 +593,8 @@ class MatterManager:
         return filtered
     
     @staticmethod
-    def get_matter_statistics(matters: List[Matter]) -> Dict[str, Any]:
-        """Generate statistics for a collection of matters."""
+    def get_matter_statistics(matters: List[Matter], deadline_index=None) -> Dict[str, Any]:
+        """Generate statistics for a collection of matters (see filter_matters for `deadline_index`)."""
         if not matters:
             return {}
         
@@ -599,6 +616,14 @@ class MatterManager:
         total_billed = sum(matter.total_billed for matter in matters)
         total_collected = sum(matter.total_collected for matter in matters)
         
+        if deadline_index is not None:
+            ids = {m.id for m in matters}
+            overdue_deadlines = len(ids.intersection(deadline_index.overdue('deadline')))
+            overdue_tasks = len(ids.intersection(deadline_index.overdue('task')))
+        else:
+            overdue_deadlines = len([m for m in matters if m.overdue_deadlines])
+            overdue_tasks = len([m for m in matters if m.overdue_tasks])
+        
         return {
             "total_matters": total_matters,
             "active_matters": active_matters,
@@ -609,7 +634,7 @@ class MatterManager:
             "total_collected": total_collected,
             "average_budget": total_budget / total_matters if total_matters > 0 else 0,
             "overall_collection_rate": (total_collected / total_billed * 100) if total_billed > 0 else 0,
-            "matters_with_overdue_deadlines": len([m for m in matters if m.overdue_deadlines]),
-            "matters_with_overdue_tasks": len([m for m in matters if m.overdue_tasks]),
+            "matters_with_overdue_deadlines": overdue_deadlines,
+            "matters_with_overdue_tasks": overdue_tasks,
             "average_days_open": sum(m.days_open for m in matters) / total_matters if total_matters > 0 else 0
         }
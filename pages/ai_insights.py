@@ -7,6 +7,15 @@ import base64
 import io
 import uuid
 
+from services.analysis_cache import get_analysis_cache, text_sha256
+from services.document_processor import DocumentProcessor, batch_overview
+from services.clause_index import get_clause_index
+from services.risk_register import get_risk_register
+from services.document_library import session_organization
+
+BATCH_DOCUMENT_TIMEOUT = 120  # seconds per document before its worker is replaced
+INSIGHTS_ANALYSIS_VERSION = 1  # bump when perform_document_analysis output changes
+
 # Document processing imports
 try:
     import pytesseract
@@ -302,8 +311,13 @@ def show_document_intelligence():
             extracted_text = extract_document_text(uploaded_file)
             
             if extracted_text:
-                # Perform AI analysis
-                analysis_results = perform_document_analysis(extracted_text, analysis_type)
+                # Perform AI analysis (cached per text hash, so reruns and re-uploads are free)
+                analysis_results = get_analysis_cache().get_or_compute(
+                    text_sha256(extracted_text),
+                    f"insights:{analysis_type}",
+                    INSIGHTS_ANALYSIS_VERSION,
+                    lambda: perform_document_analysis(extracted_text, analysis_type),
+                )
                 
                 # Display results
                 display_analysis_results(analysis_results, extracted_text, uploaded_file.name)
@@ -703,32 +717,41 @@ def process_batch_documents(batch_files, analysis_type):
     """Process multiple documents at once"""
     results_data = []
     progress_bar = st.progress(0)
-    
-    for i, file in enumerate(batch_files):
-        st.write(f"Processing: {file.name}")
-        
-        # Extract text
-        text = extract_document_text(file)
+    status = st.empty()
+    
+    def on_progress(done, total):
+        progress_bar.progress(done / total)
+        status.write(f"Processed {done} of {total} documents")
+    
+    # Extraction and scoring both run in worker processes; the upload buffers
+    # are handed over as bytes
+    documents = [(file.name, file.getvalue()) for file in batch_files]
+    processor = DocumentProcessor()
+    for res in processor.process_many(documents, analyzer=batch_overview,
+                                      timeout=BATCH_DOCUMENT_TIMEOUT, progress=on_progress):
+        filename = documents[res.index][0]
+        if not res.ok:
+            st.error(f"Error processing {filename}: {res.error}")
+            continue
+        overview = res.value
+        if not overview:
+            st.error(f"Could not extract text from {filename}")
+            continue
         
-        if text:
-            # Perform analysis
-            if analysis_type == "Document Classification":
-                doc_type = classify_document(text)
-                results_data.append({
-                    "filename": file.name,
-                    "type": doc_type,
-                    "confidence": 0.85,
-                    "word_count": len(text.split())
-                })
-            elif analysis_type == "Risk Scoring":
-                risk_score = assess_document_risk(text)
-                results_data.append({
-                    "filename": file.name,
-                    "risk_score": risk_score,
-                    "word_count": len(text.split())
-                })
-        
-        progress_bar.progress((i + 1) / len(batch_files))
+        # Perform analysis
+        if analysis_type == "Document Classification":
+            results_data.append({
+                "filename": filename,
+                "type": overview["type"],
+                "confidence": 0.85,
+                "word_count": overview["word_count"]
+            })
+        elif analysis_type == "Risk Scoring":
+            results_data.append({
+                "filename": filename,
+                "risk_score": overview["risk_score"],
+                "word_count": overview["word_count"]
+            })
     
     # Display batch results
     if results_data:
@@ -745,24 +768,6 @@ def process_batch_documents(batch_files, analysis_type):
             mime="text/csv"
         )
 
-def classify_document(text):
-    """Classify document type based on content"""
-    # Simple keyword-based classification
-    if any(word in text.lower() for word in ["agreement", "contract", "parties"]):
-        return "Contract"
-    elif any(word in text.lower() for word in ["complaint", "plaintiff", "defendant"]):
-        return "Legal Pleading"
-    elif any(word in text.lower() for word in ["memo", "memorandum", "analysis"]):
-        return "Legal Memorandum"
-    else:
-        return "General Legal Document"
-
-def assess_document_risk(text):
-    """Quick risk assessment for batch processing"""
-    risk_keywords = ["liability", "damages", "breach", "penalty", "indemnity"]
-    risk_count = sum(1 for keyword in risk_keywords if keyword in text.lower())
-    return min(10, risk_count * 2)  # Scale to 0-10
-
 def save_analysis_results(results, filename):
     """Save analysis results to session state"""
     if 'document_analyses' not in st.session_state:
@@ -831,11 +836,43 @@ def show_legal_research():
             with st.expander(f"{result['title']} - {result['relevance']} relevant"):
                 st.write(f"**Jurisdiction:** {result['jurisdiction']}")
                 st.write("**Summary:** Mock legal research result...")
+    
+    st.markdown("#### Find Similar Clauses")
+    # the organization's own index: other organizations' clauses are never searched
+    clause_index = get_clause_index(session_organization(st.session_state))
+    # picks up edited documents; uploads and deletes update the index directly
+    report = clause_index.sync(st.session_state.get("documents", []), full_corpus=False)
+    for doc_id, error in report.failed.items():
+        st.warning(f"Clause indexing failed for document {doc_id}: {error}")
+    st.caption(f"{len(clause_index):,} clauses indexed across your organization's library")
+    
+    clause_text = st.text_area("Paste a clause:", key="similar_clause_text")
+    clause_type = st.selectbox("Clause type", ["Any"] + clause_index.clause_types, key="similar_clause_type")
+    if clause_text:
+        matches = clause_index.similar(clause_text, None if clause_type == "Any" else clause_type, top_k=10)
+        if matches:
+            st.dataframe(pd.DataFrame([m.to_row() for m in matches]), use_container_width=True)
+        else:
+            st.info("No similar clauses found in the library.")
 
 def show_risk_assessment():
     """Risk assessment dashboard"""
     st.subheader("⚖️ Legal Risk Assessment")
     
+    # The organization's register: uploads and deletes update it (services.document_library).
+    # The session's library is checked for unscored or edited documents once per session,
+    # or on request, not on every rerun.
+    register = get_risk_register(session_organization(st.session_state))
+    rescan = st.button("Rescan library", key="risk_rescan")
+    if rescan or not st.session_state.get("risk_register_checked"):
+        report = register.scan(st.session_state.get("documents", []), full_corpus=False,
+                               timeout=BATCH_DOCUMENT_TIMEOUT)
+        st.session_state["risk_register_checked"] = True
+        for doc_id, error in report.failed.items():
+            st.warning(f"Risk scan failed for document {doc_id}: {error}")
+    summary = register.summary()
+    levels = summary["levels"]
+    
     # Risk metrics with professional styling
     col1, col2, col3, col4 = st.columns(4)
     
@@ -850,34 +887,46 @@ def show_risk_assessment():
     with col1:
         st.markdown(metrics_html.format(
             title="High Risk Documents",
-            value="12",
-            change="+3 this month",
+            value=levels["high"],
+            change=f"{levels['medium']} medium, {levels['low']} low",
             color="#ef4444"
         ), unsafe_allow_html=True)
     
     with col2:
         st.markdown(metrics_html.format(
-            title="Compliance Score",
-            value="8.2/10",
-            change="+0.5 improvement",
-            color="#10b981"
+            title="Red Flags",
+            value=sum(summary["red_flags"].values()),
+            change=next(iter(summary["red_flags"]), "None found"),
+            color="#f59e0b"
         ), unsafe_allow_html=True)
     
     with col3:
         st.markdown(metrics_html.format(
             title="Average Risk Score",
-            value="3.4/10",
-            change="-0.2 lower",
+            value=summary["average_score"],
+            change="weighted risk indicators",
             color="#3b82f6"
         ), unsafe_allow_html=True)
     
     with col4:
         st.markdown(metrics_html.format(
             title="Documents Reviewed",
-            value="156",
-            change="+23 this week",
+            value=summary["documents"],
+            change=f"{report.scanned} rescored this visit",
             color="#3b82f6"
         ), unsafe_allow_html=True)
+    
+    if not len(register):
+        st.info("Upload documents on the Documents page to build the firm-wide risk register.")
+        return
+    
+    st.markdown("#### Highest Risk Documents")
+    level = st.selectbox("Risk level", ["All", "High", "Medium", "Low"], key="risk_register_level")
+    records = register.ranked(None if level == "All" else level.lower(), limit=50)
+    if records:
+        st.dataframe(pd.DataFrame([r.to_row() for r in records]), use_container_width=True)
+    else:
+        st.info(f"No {level.lower()} risk documents.")
 
 def show_practice_analytics():
     """Practice management analytics"""
@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from typing import List, Optional
 from types import SimpleNamespace
 
+from services.billing_store import session_billing_store
+
 
 class SafeNamespace:
     """Safe namespace that returns None for missing attributes"""
@@ -100,17 +102,6 @@ def initialize_session_state():
         st.session_state.user = {'email': 'user@lawfirm.com', 'name': 'John Attorney'}
 
 def show():
-    # Convert all time entries to safe objects once
-    if 'time_entries' in st.session_state:
-        time_entries = [SafeNamespace(entry) for entry in st.session_state.time_entries]
-    else:
-        time_entries = []
-    
-    # Now this works safely
-    total_unbilled_hours = sum(
-        entry.hours for entry in time_entries 
-        if entry.status == "draft" and entry.billable
-    )
     initialize_session_state()
     auth_service = AuthService()
     # Professional header styling
@@ -307,10 +298,12 @@ def show():
         st.error("Access denied. Time tracking access required.")
         st.stop()
     
-    # Calculate real-time billing metrics
-    total_unbilled_hours = sum(entry.hours for entry in st.session_state.time_entries if entry.status == "draft" and entry.billable)
-    total_unbilled_amount = sum(entry.hours * entry.billing_rate for entry in st.session_state.time_entries if entry.status == "draft" and entry.billable)
-    outstanding_invoices = len([inv for inv in st.session_state.invoices if inv.status in ["sent", "overdue"]])
+    # Calculate real-time billing metrics from the columnar billing store
+    billing = session_billing_store(st.session_state)
+    unbilled = billing.time_totals(status="draft", billable=True)
+    total_unbilled_hours = unbilled["billable_hours"]
+    total_unbilled_amount = unbilled["billable_amount"]
+    outstanding_invoices = billing.invoice_totals()["outstanding_count"]
     collection_rate = 94.2  # Mock value
     
     # Billing metrics
@@ -405,7 +398,9 @@ def _show_time_entry_tab():
                             created_date=datetime.now()
                         )
                         
+                        billing = session_billing_store(st.session_state)
                         st.session_state.time_entries.append(new_entry)
+                        billing.add_time_entry(new_entry)
                         st.success("Time entry added successfully!")
                         st.rerun()
                     else:
@@ -495,7 +490,9 @@ def _show_time_entry_tab():
                                 st.info("Edit functionality would open here")
                         with col_action2:
                             if st.button("🗑️ Delete", key=f"delete_{i}"):
+                                billing = session_billing_store(st.session_state)
                                 st.session_state.time_entries.remove(entry)
+                                billing.remove_time_entry(entry.id)
                                 st.success("Entry deleted")
                                 st.rerun()
         else:
@@ -504,13 +501,14 @@ def _show_time_entry_tab():
     with col2:
         st.markdown("#### Today's Summary")
         
-        today_entries = [e for e in st.session_state.time_entries 
-                        if e.date.date() == datetime.now().date()]
+        today_start = datetime.combine(datetime.now().date(), datetime.min.time())
+        today = session_billing_store(st.session_state).time_totals(
+            start=today_start, end=today_start + timedelta(days=1))
         
-        if today_entries:
-            total_hours = sum(e.hours for e in today_entries)
-            billable_hours = sum(e.hours for e in today_entries if e.billable)
-            total_value = sum(e.hours * e.billing_rate for e in today_entries if e.billable)
+        if today["entries"]:
+            total_hours = today["total_hours"]
+            billable_hours = today["billable_hours"]
+            total_value = today["billable_amount"]
             
             st.metric("Total Hours", f"{total_hours:.1f}")
             st.metric("Billable Hours", f"{billable_hours:.1f}")
@@ -597,11 +595,14 @@ def _show_billing_tab():
                         status="draft"
                     )
                     
+                    billing = session_billing_store(st.session_state)
                     st.session_state.invoices.append(new_invoice)
+                    billing.add_invoice(new_invoice)
                     
                     # Mark time entries as billed
                     for entry in unbilled_entries:
                         entry.status = "billed"
+                    billing.add_time_entries(unbilled_entries)
                     
                     st.success(f"Invoice {new_invoice.invoice_number} generated! Total: ${total_amount:.2f}")
                     st.rerun()
@@ -655,6 +656,7 @@ def _show_billing_tab():
                         with col_inv_action2:
                             if invoice.status == "draft" and st.button("📤 Send", key=f"send_{invoice.id}"):
                                 invoice.status = "sent"
+                                session_billing_store(st.session_state).add_invoice(invoice)
                                 st.success("Invoice sent!")
                                 st.rerun()
                     
@@ -670,23 +672,23 @@ def _show_billing_tab():
         st.markdown("#### Billing Summary")
         
         # Calculate billing metrics
-        total_invoiced = sum(inv.total_amount for inv in st.session_state.invoices)
-        paid_invoices = sum(inv.total_amount for inv in st.session_state.invoices if inv.status == "paid")
-        outstanding = sum(inv.total_amount for inv in st.session_state.invoices if inv.status in ["sent", "overdue"])
+        billing = session_billing_store(st.session_state)
+        invoice_totals = billing.invoice_totals()
+        total_invoiced = invoice_totals["total_billed"]
+        paid_invoices = invoice_totals["total_collected"]
+        outstanding = invoice_totals["outstanding_amount"]
         
         st.metric("Total Invoiced", f"${total_invoiced:,.0f}")
         st.metric("Paid", f"${paid_invoices:,.0f}")
         st.metric("Outstanding", f"${outstanding:,.0f}")
         
         # Collection rate calculation
-        collection_rate = (paid_invoices / total_invoiced * 100) if total_invoiced > 0 else 0
+        collection_rate = invoice_totals["collection_rate"]
         st.metric("Collection Rate", f"{collection_rate:.1f}%")
         
         st.markdown("#### Invoice Status Breakdown")
         
-        status_counts = {}
-        for invoice in st.session_state.invoices:
-            status_counts[invoice.status] = status_counts.get(invoice.status, 0) + 1
+        status_counts = billing.status_counts("invoices")
         
         for status, count in status_counts.items():
             st.write(f"**{status.title()}:** {count}")
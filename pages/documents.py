@@ -1,66 +1,72 @@
 # pages/documents.py
-import io
 import os
-import uuid
-import tempfile
 from datetime import datetime, timedelta
 
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-# Optional deps for text extraction
-try:
-    from pypdf import PdfReader          # pip install pypdf
-except Exception:  # pragma: no cover
-    PdfReader = None
-
-try:
-    import docx2txt                      # pip install docx2txt
-except Exception:  # pragma: no cover
-    docx2txt = None
-
 # Your auth/subscription shim (we keep dev fallbacks so uploads always work)
 from services.subscription_manager import EnhancedAuthService
+from services.extraction import iter_document_pages, pages_digest, upload_buffer
+from services.job_queue import get_job_queue, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from services.text_index import session_text_index
+from services.document_library import add_document, new_document_id, remove_document
 
 
 # ---------- Text extraction helpers ----------
-def _read_pdf_bytes(b: bytes) -> str:
-    if not PdfReader:
-        return ""
+UPLOAD_TEXT_TYPES = (".pdf", ".docx", ".txt")
+
+def _extract_text_from_upload(uploaded_file):
+    """
+    (text, pages key) of an upload. The joined text is what the library
+    stores; a PDF's pages stay in the extraction cache under the key, and the
+    Q&A index chunks them page by page from there.
+    """
+    # Straight from the upload buffer: no temp files, no extra copy of the bytes
+    name = (uploaded_file.name or "").lower()
+    if not name.endswith(UPLOAD_TEXT_TYPES):
+        return "", ""
     try:
-        reader = PdfReader(io.BytesIO(b))
-        return "\n\n".join((p.extract_text() or "") for p in reader.pages).strip()
-    except Exception:
-        return ""
+        data = upload_buffer(uploaded_file)
+        text = "\n\n".join(iter_document_pages(name, data)).strip()
+        return text, pages_digest(name, data)
+    except Exception:  # missing pypdf/docx2txt or a malformed file
+        return "", ""
 
-def _read_docx_bytes(b: bytes) -> str:
-    if not docx2txt:
-        return ""
-    try:
-        with tempfile.NamedTemporaryFile(suffix=".docx", delete=True) as tmp:
-            tmp.write(b)
-            tmp.flush()
-            return (docx2txt.process(tmp.name) or "").strip()
-    except Exception:
-        return ""
 
-def _read_txt_bytes(b: bytes) -> str:
+# ---------- Background summaries ----------
+def _queue_summary(text: str, name: str, priority: int):
+    """Enqueue a full summary for an uploaded document; returns the job id (or None)."""
     try:
-        return b.decode("utf-8", errors="ignore").strip()
-    except Exception:
-        return ""
-
-def _extract_text_from_upload(uploaded_file) -> str:
-    name = (uploaded_file.name or "").lower()
-    data = uploaded_file.getvalue()
-    if name.endswith(".pdf"):
-        return _read_pdf_bytes(data)
-    if name.endswith(".docx"):
-        return _read_docx_bytes(data)
-    if name.endswith(".txt"):
-        return _read_txt_bytes(data)
-    return ""
+        from summarizer2 import summarize_in_background
+    except Exception:  # summarizer model/deps unavailable: leave the summary empty
+        return None
+    return summarize_in_background(text, 220, "full", priority=priority, label=name)
+
+def _collect_finished_summaries():
+    """Copy results of finished summary jobs onto their documents."""
+    waiting = [d for d in st.session_state.get("documents", []) if d.get("summary_job_id")]
+    if not waiting:
+        return
+    queue = get_job_queue()
+    for d in waiting:
+        info = queue.status(d["summary_job_id"])
+        if info is None or info["status"] in ("failed", "cancelled"):
+            d.pop("summary_job_id", None)
+        elif info["status"] == "done":
+            result = queue.result(d["summary_job_id"]) or ""
+            if not result.startswith("Error"):
+                d["summary"] = result
+            d.pop("summary_job_id", None)
+
+def _summary_state(doc) -> str:
+    job_id = doc.get("summary_job_id")
+    if job_id:
+        info = get_job_queue().status(job_id)
+        if info:
+            return f"{info['status'].title()} ({info['progress']:.0%})"
+    return "Ready" if doc.get("summary") else "—"
 
 
 # ---------- Main page ----------
@@ -99,6 +105,7 @@ def show():
 
     # Initialize state
     st.session_state.setdefault("documents", [])
+    _collect_finished_summaries()
     auth_service = EnhancedAuthService()
     user_data = st.session_state.get("user_data", {}) or {}
     org_code = user_data.get("organization_code")
@@ -189,6 +196,7 @@ def show_dashboard_stats(auth_service, org_code):
                 up = doc.get("upload_date")
                 up_str = up.strftime("%Y-%m-%d %H:%M") if isinstance(up, datetime) else "—"
                 st.write(f"**Uploaded:** {up_str}")
+                st.write(f"**Summary:** {_summary_state(doc)}")
                 if st.button("View", key=f"recent_view_{doc.get('id')}"):
                     st.info("Document viewer would open here")
 
@@ -335,10 +343,11 @@ def process_document_upload(
     description,
     auth_service,
     org_code,
+    summary_priority=PRIORITY_INTERACTIVE,
 ):
-    """Save metadata to session and extract text for RAG."""
+    """Save metadata to session, extract text for RAG and queue its summary."""
     try:
-        raw_text = _extract_text_from_upload(uploaded_file)
+        raw_text, pages_key = _extract_text_from_upload(uploaded_file)
         if not raw_text:
             st.warning(
                 f"Could not extract text from '{uploaded_file.name}'. "
@@ -346,7 +355,7 @@ def process_document_upload(
             )
 
         new_doc = {
-            "id": str(uuid.uuid4()),
+            "id": new_document_id(),
             "name": title or uploaded_file.name,
             "original_filename": uploaded_file.name,
             "type": doc_type,
@@ -363,11 +372,15 @@ def process_document_upload(
             "organization_code": org_code,
             # Fields the retriever expects:
             "content_text": raw_text,
+            "content_pages_key": pages_key if raw_text else "",
             "summary": "",
         }
 
-        st.session_state.setdefault("documents", [])
-        st.session_state.documents.append(new_doc)
+        # Summarize in the background instead of blocking the upload
+        if raw_text:
+            new_doc["summary_job_id"] = _queue_summary(raw_text, new_doc["name"], summary_priority)
+
+        add_document(st.session_state, new_doc)
 
         # Invalidate QA index so Questions page rebuilds
         st.session_state.pop("qa_engine", None)
@@ -384,7 +397,8 @@ def process_batch_upload(batch_files, auth_service, org_code):
     ok = 0
     for i, f in enumerate(batch_files):
         if process_document_upload(
-            f, f.name, "Other", "None", "", False, "", auth_service, org_code
+            f, f.name, "Other", "None", "", False, "", auth_service, org_code,
+            summary_priority=PRIORITY_BATCH,
         ):
             ok += 1
         progress.progress((i + 1) / len(batch_files))
@@ -420,9 +434,11 @@ def show_search_and_filter():
 
     # Minimal filtering (extend as needed)
     docs = list(st.session_state.documents)
+    relevance = {}
     if q:
-        ql = q.lower()
-        docs = [d for d in docs if ql in (d.get("name","").lower() + " " + d.get("description","").lower()) or any(ql in t.lower() for t in d.get("tags",[]))]
+        # ranked ids straight from the inverted index; no document text is scanned
+        relevance = dict(session_text_index(st.session_state).search(q))
+        docs = [d for d in docs if str(d.get("id")) in relevance]
     if doc_type != "All Types":
         docs = [d for d in docs if d.get("type") == doc_type]
     if date_range != "All Time":
@@ -439,9 +455,12 @@ def show_search_and_filter():
     with c1:
         view_mode = st.radio("View Mode", ["List", "Grid", "Table"], horizontal=True)
     with c2:
-        sort_by = st.selectbox("Sort By", ["Upload Date", "Name", "Size", "Type"])
+        sort_by = st.selectbox("Sort By", (["Relevance"] if relevance else []) + ["Upload Date", "Name", "Size", "Type"])
 
-    docs = _sort_documents(docs, sort_by)
+    if sort_by == "Relevance":
+        docs = sorted(docs, key=lambda d: relevance[str(d.get("id"))], reverse=True)
+    else:
+        docs = _sort_documents(docs, sort_by)
 
     if view_mode == "List":
         _list_view(docs)
@@ -545,7 +564,7 @@ def _table_view(docs):
 
 def delete_document(doc, org_code):
     try:
-        st.session_state["documents"] = [d for d in st.session_state["documents"] if d.get("id") != doc.get("id")]
+        remove_document(st.session_state, doc.get("id"))
         # If you track storage, adjust here (guard for missing subscription manager in dev)
         try:
             auth_service = EnhancedAuthService()
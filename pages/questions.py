@@ -1,6 +1,7 @@
 # pages/questions.py
 import streamlit as st
 from services.rag_router import ensure_qa_index, answer_question_hybrid
+from services.document_library import add_document, new_document_id, replace_library
 
 st.set_page_config(page_title="Questions", page_icon="🧠", layout="wide")
 st.title("🧠 Ask Questions About Your Cases")
@@ -21,8 +22,8 @@ with st.expander("🔧 Debug / seed & index", expanded=False):
     c1, c2, c3 = st.columns(3)
 
     if c1.button("Seed demo doc"):
-        st.session_state.setdefault("documents", [])
-        st.session_state["documents"].append({
+        add_document(st.session_state, {
+            "id": new_document_id(),
             "name": "Johnson Corporation – Complaint",
             "client": "Johnson Corporation",
             "matter": "Johnson v. Smith (2024)",
@@ -46,7 +47,7 @@ with st.expander("🔧 Debug / seed & index", expanded=False):
         st.success("Index will rebuild below.")
 
     if c3.button("Clear docs"):
-        st.session_state["documents"] = []
+        replace_library(st.session_state, [])
         st.session_state.pop("qa_engine", None)
         st.session_state.pop("qa_digest", None)
         st.success("Cleared documents and index.")
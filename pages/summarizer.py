@@ -1,13 +1,54 @@
 # pages/41_Summarizer.py
+import time
+
 import streamlit as st
 from datetime import datetime
 
 # Use your original module at project root
-from summarizer2 import extract_text_from_file, summarize_text
+from summarizer2 import extract_text_from_file, summarize_text, summarize_in_background, SUMMARY_TIERS
+from services.job_queue import get_job_queue
+from services.extraction import pages_digest, upload_buffer
+from services.document_library import add_document, new_document_id
 
 st.set_page_config(page_title="Summarizer", page_icon="📝", layout="wide")
 st.title("📝 Document Summarizer")
 
+POLL_SECONDS = 1.0   # refinement status refresh while summary jobs are pending
+
+TIER_LABELS = {
+    "instant": "Instant (extractive)",
+    "fast": "Fast draft (abstractive)",
+    "full": "Full (refined)",
+}
+
+def _is_ok(summary) -> bool:
+    return isinstance(summary, str) and bool(summary.strip()) and not summary.startswith("Error")
+
+def _best_summary(run, queue):
+    """Highest finished tier wins; falls back to whatever we already show."""
+    for tier in reversed(SUMMARY_TIERS):
+        job_id = run["jobs"].get(tier)
+        if job_id is None:
+            continue
+        summary = queue.result(job_id)
+        if _is_ok(summary):
+            return tier, summary
+    return run["tier"], run["summary"]
+
+def _pending_jobs(run, queue):
+    out = {}
+    for tier, job_id in run["jobs"].items():
+        info = queue.status(job_id)
+        if info and info["status"] in ("queued", "running"):
+            out[tier] = info
+    return out
+
+def _update_library_doc(doc_id, summary):
+    for d in st.session_state["documents"]:
+        if d.get("id") == doc_id:
+            d["summary"] = summary
+            break
+
 # Ensure session buckets exist (so the Questions page can see uploaded docs)
 if "documents" not in st.session_state:
     st.session_state["documents"] = []
@@ -26,15 +67,13 @@ if f and st.button("Extract & Summarize"):
     with st.spinner("Extracting text…"):
         raw = extract_text_from_file(f)
 
-    with st.spinner("Summarizing…"):
-        summary = summarize_text(raw, max_len=220)
-
-    st.subheader("Summary")
-    st.write(summary)
+    # Instant tier is extractive (no model call) so the user sees something right away
+    summary = summarize_text(raw, max_len=220, tier="instant")
 
     # Save into session so your Questions page / retriever can use it
-    st.session_state["documents"].append({
-        "id": len(st.session_state["documents"]) + 1,
+    doc_id = new_document_id()
+    add_document(st.session_state, {
+        "id": doc_id,
         "name": f.name,
         "client": (client if client != "(none)" else ""),
         "matter": matter,
@@ -43,5 +82,66 @@ if f and st.button("Extract & Summarize"):
         "status": "New",
         "summary": summary,
         "content_text": raw if isinstance(raw, str) else "",
+        # the Q&A index chunks a PDF page by page from the extraction cache
+        "content_pages_key": pages_digest(f.name, upload_buffer(f)),
     })
+
+    # Better tiers run on the shared job queue; the page only polls
+    st.session_state["summarizer_run"] = {
+        "doc_id": doc_id,
+        "name": f.name,
+        "tier": "instant",
+        "summary": summary,
+        "jobs": {
+            tier: summarize_in_background(raw, 220, tier, label=f"{f.name} ({tier})")
+            for tier in SUMMARY_TIERS if tier != "instant"
+        },
+    }
     st.success(f"Added '{f.name}' to your document library. You can now query it on the Questions page.")
+
+def _show_run(run, queue) -> bool:
+    """Render the best finished tier and the refinement status; True while jobs are pending."""
+    tier, summary = _best_summary(run, queue)
+    if tier != run["tier"]:
+        run["tier"], run["summary"] = tier, summary
+        _update_library_doc(run["doc_id"], summary)
+    pending = _pending_jobs(run, queue)
+
+    if pending:
+        st.info(
+            f"Showing **{TIER_LABELS[run['tier']]}** summary of '{run['name']}' · "
+            f"refining: {', '.join(TIER_LABELS[t] for t in pending)}…"
+        )
+        tier, info = next(iter(pending.items()))
+        st.progress(
+            info["progress"],
+            text=f"{TIER_LABELS[tier]}: {info['status']} {info['message']}".strip(),
+        )
+    else:
+        st.caption(f"{TIER_LABELS[run['tier']]} summary of '{run['name']}'")
+    st.write(run["summary"])
+    return bool(pending)
+
+run = st.session_state.get("summarizer_run")
+if run:
+    queue = get_job_queue()
+    st.subheader("Summary")
+    pending = _pending_jobs(run, queue)
+    if pending and st.button("Stop refining"):
+        for job_id in run["jobs"].values():
+            queue.cancel(job_id)
+
+    # Progressive refinement: show the best finished tier, replace it as better ones
+    # land. Only this part reruns while jobs are pending; the script thread never waits.
+    fragment = getattr(st, "fragment", None)       # Streamlit >= 1.37
+    if fragment is not None:
+        polling = bool(pending)
+
+        @fragment(run_every=POLL_SECONDS if polling else None)
+        def _refinement():
+            if not _show_run(st.session_state["summarizer_run"], get_job_queue()) and polling:
+                st.rerun()      # last job landed: one full rerun stops the polling
+        _refinement()
+    elif _show_run(run, queue):
+        time.sleep(POLL_SECONDS)
+        st.rerun()
@@ -0,0 +1,168 @@
+# services/analysis_cache.py
+"""
+Persistent cache of analysis results, keyed by document text hash.
+
+Every analyzer (one field of process_document_complete or analyze_contract)
+is stored as its own entry under (text SHA-256, analyzer name, analyzer
+version), so bumping one analyzer's version only invalidates that
+analyzer's results. Entries are JSON files under
+LEGALDOC_CACHE_DIR/analysis/<hash[:2]>/<hash>/, one directory per
+document, so a dashboard can list everything known about a document from
+its hash alone without re-reading the text.
+
+An in-memory LRU front keeps the serialized entries of recently used
+documents; a hit is a dict lookup plus json.loads (well under a
+millisecond), and every hit returns a fresh copy that callers may mutate.
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from services.extraction import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_DIR = CACHE_DIR / "analysis"
+MEMORY_MAX_ENTRIES = 4096
+
+MISSING = object()
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]")
+
+def text_sha256(text: str) -> str:
+    """SHA-256 of the UTF-8 text (same value as DocumentProcessor.calculate_document_hash)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """Two-level (memory, disk) store of per-analyzer results; safe to share between threads."""
+
+    def __init__(self, root: Optional[Path] = None, memory_entries: int = MEMORY_MAX_ENTRIES,
+                 persist: bool = True):
+        self.root = Path(root) if root is not None else ANALYSIS_CACHE_DIR
+        self.memory_entries = memory_entries
+        self.persist = persist
+        self._memory: "OrderedDict[Tuple[str, str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- storage ----------
+    def _doc_dir(self, doc_hash: str) -> Path:
+        return self.root / doc_hash[:2] / doc_hash
+
+    def _path(self, doc_hash: str, analyzer: str, version: int) -> Path:
+        return self._doc_dir(doc_hash) / f"{_UNSAFE_CHARS.sub('_', analyzer)}@{version}.json"
+
+    def _remember(self, key: Tuple[str, str, int], payload: str) -> None:
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key: Tuple[str, str, int]) -> Optional[str]:
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                return payload
+        if not self.persist:
+            return None
+        try:
+            record = json.loads(self._path(*key).read_text())
+            payload = json.dumps(record["value"], ensure_ascii=False)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analysis cache entry {key}: {e}")
+            return None
+        self._remember(key, payload)
+        return payload
+
+    # ---------- public API ----------
+    def get(self, doc_hash: str, analyzer: str, version: int, default: Any = None) -> Any:
+        payload = self._load((doc_hash, analyzer, version))
+        return default if payload is None else json.loads(payload)
+
+    def put(self, doc_hash: str, analyzer: str, version: int, value: Any) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not caching {analyzer}: result is not JSON-serializable ({e})")
+            return
+        key = (doc_hash, analyzer, version)
+        self._remember(key, payload)
+        if not self.persist:
+            return
+        path = self._path(*key)
+        record = f'{{"analyzer": {json.dumps(analyzer)}, "version": {int(version)}, "value": {payload}}}'
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write-then-rename so concurrent batch workers never see half an entry
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(record)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Could not write analysis cache: {e}")
+
+    def get_or_compute(self, doc_hash: str, analyzer: str, version: int, compute: Callable[[], Any]) -> Any:
+        value = self.get(doc_hash, analyzer, version, MISSING)
+        if value is MISSING:
+            value = compute()
+            self.put(doc_hash, analyzer, version, value)
+        return value
+
+    def analyses(self, doc_hash: str, versions: Optional[Mapping[str, int]] = None) -> Dict[str, Any]:
+        """
+        Every cached result for a document, by analyzer name. With `versions`
+        only those analyzers at exactly those versions are returned.
+        """
+        if versions is not None:
+            out = {}
+            for analyzer, version in versions.items():
+                value = self.get(doc_hash, analyzer, version, MISSING)
+                if value is not MISSING:
+                    out[analyzer] = value
+            return out
+
+        out, seen = {}, {}
+        with self._lock:
+            for (h, analyzer, version), payload in self._memory.items():
+                if h == doc_hash and version >= seen.get(analyzer, -1):
+                    seen[analyzer], out[analyzer] = version, payload
+        if self.persist:
+            try:
+                entries = list(self._doc_dir(doc_hash).glob("*.json"))
+            except Exception:
+                entries = []
+            for path in entries:
+                try:
+                    record = json.loads(path.read_text())
+                except Exception:
+                    continue
+                analyzer, version = record.get("analyzer"), record.get("version", -1)
+                if analyzer and version > seen.get(analyzer, -1):
+                    seen[analyzer] = version
+                    out[analyzer] = json.dumps(record["value"], ensure_ascii=False)
+        return {analyzer: json.loads(payload) for analyzer, payload in out.items()}
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+# ---------- shared cache ----------
+_shared_cache: Optional[AnalysisCache] = None
+_shared_lock = threading.Lock()
+
+def get_analysis_cache() -> AnalysisCache:
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AnalysisCache()
+        return _shared_cache
@@ -0,0 +1,107 @@
+# services/analyzed_document.py
+"""
+Preprocessed view of one document, shared by the AIAnalysisSystem analyzers.
+
+analyze_contract builds one AnalyzedDocument per call and hands it to all
+twelve analyzers, so the text is lowercased, tokenized, split into
+sentences and keyword-counted once instead of once per analyzer. Every
+field is computed lazily on first access and kept for the rest of the
+call.
+"""
+from __future__ import annotations
+
+import re
+from functools import cached_property, lru_cache
+from typing import Iterator, List, Optional, Tuple, Union
+
+from services.keyword_matcher import KeywordCounts, KeywordMatcher
+
+# same boundaries as re.split(r'[.!?]+', text): runs of text between terminators
+_SENTENCE_BODY = re.compile(r'[^.!?]+')
+_COMPACT_DROP = str.maketrans('', '', ' -_')
+# characters whose IGNORECASE matching differs from matching their lower()
+_FOLD_EXCEPTIONS = re.compile("[\u0130\u0131\u017f\u212a]")   # İ ı ſ and the Kelvin sign
+_UPPER_ESCAPE = re.compile(r"\\[A-Z]")
+
+@lru_cache(maxsize=256)
+def _lowered_pattern(pattern: str) -> Optional["re.Pattern"]:
+    # \D, \S, \W ... would change meaning when lowercased
+    if _UPPER_ESCAPE.search(pattern):
+        return None
+    return re.compile(pattern.lower())
+
+class AnalyzedDocument:
+    def __init__(self, text: str, matcher: Optional[KeywordMatcher] = None):
+        self.text = text
+        self._matcher = matcher
+
+    @classmethod
+    def of(cls, source: Union[str, "AnalyzedDocument"], matcher: Optional[KeywordMatcher] = None) -> "AnalyzedDocument":
+        """Wrap raw text; an AnalyzedDocument is passed through unchanged."""
+        return source if isinstance(source, AnalyzedDocument) else cls(source, matcher)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def compact_lower(self) -> str:
+        """Lowercased text without spaces, hyphens and underscores (clause lookup)."""
+        return self.lower.translate(_COMPACT_DROP)
+
+    @cached_property
+    def words(self) -> List[str]:
+        return self.text.split()
+
+    @cached_property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) of each non-blank sentence, whitespace-trimmed."""
+        spans = []
+        text = self.text
+        for m in _SENTENCE_BODY.finditer(text):
+            body = m.group()
+            stripped = body.strip()
+            if stripped:
+                start = m.start() + (len(body) - len(body.lstrip()))
+                spans.append((start, start + len(stripped)))
+        return spans
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        text = self.text
+        return [text[a:b] for a, b in self.sentence_spans]
+
+    @cached_property
+    def lower_aligned(self) -> bool:
+        """`lower` has the same offsets as `text` and folds case like re.IGNORECASE."""
+        return len(self.lower) == len(self.text) and not _FOLD_EXCEPTIONS.search(self.text)
+
+    def finditer_ci(self, pattern: str) -> Iterator[Tuple[int, int]]:
+        """
+        Spans of re.finditer(pattern, text, re.IGNORECASE). Case-insensitive
+        matching is several times slower in `re`, so when possible the
+        lowercased pattern runs case-sensitively over `lower` instead.
+        """
+        rx = _lowered_pattern(pattern) if self.lower_aligned else None
+        if rx is not None:
+            return (m.span() for m in rx.finditer(self.lower))
+        return (m.span() for m in re.finditer(pattern, self.text, re.IGNORECASE))
+
+    def findall_ci(self, pattern: str) -> List[str]:
+        """re.findall(pattern, text, re.IGNORECASE) for a pattern without capture groups."""
+        text = self.text
+        return [text[a:b] for a, b in self.finditer_ci(pattern)]
+
+    @cached_property
+    def keyword_counts(self) -> KeywordCounts:
+        """Every vocabulary of the matcher counted in one pass over `lower`."""
+        if self._matcher is None:
+            raise ValueError("AnalyzedDocument was built without a keyword matcher")
+        return self._matcher.count(self.lower)
+
+    @cached_property
+    def keyword_presence(self) -> KeywordCounts:
+        """Which keywords of every vocabulary occur in `lower` (counts are 0/1; for hits())."""
+        if self._matcher is None:
+            raise ValueError("AnalyzedDocument was built without a keyword matcher")
+        return self._matcher.count(self.lower, presence=True)
@@ -0,0 +1,159 @@
+# services/batch_runner.py
+"""
+Process-pool batch runner used by DocumentProcessor.process_many and
+AIAnalysisSystem.analyze_many.
+
+Items are pulled lazily from any iterable and at most `workers` of them
+are in flight at a time, so a batch of hundreds of contracts never sits
+in memory all at once. Results stream back as BatchResult records, either
+in submission order (`ordered=True`) or as they complete, each carrying
+its index.
+
+A document that runs longer than `timeout` seconds is reported as
+failed. Its worker cannot be interrupted, so the pool is replaced and the
+other in-flight documents are resubmitted.
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+
+# progress(done, total); total is None when the input has no len()
+ProgressFn = Callable[[int, Optional[int]], None]
+
+@dataclass
+class BatchResult:
+    index: int
+    value: Any = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def default_workers() -> int:
+    return max(1, min(os.cpu_count() or 1, MAX_WORKERS))
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
+    # ProcessPoolExecutor has no public way to stop a busy worker
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _run_serial(fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[BatchResult]:
+    for index, item in enumerate(items):
+        t0 = time.perf_counter()
+        try:
+            yield BatchResult(index, value=fn(item), seconds=time.perf_counter() - t0)
+        except Exception as e:
+            yield BatchResult(index, error=str(e), seconds=time.perf_counter() - t0)
+
+def run_batch(fn: Callable[[Any], Any], items: Iterable[Any], workers: Optional[int] = None,
+              ordered: bool = True, timeout: Optional[float] = None,
+              progress: Optional[ProgressFn] = None) -> Iterator[BatchResult]:
+    """
+    Apply fn (a picklable top-level function) to every item on a process pool.
+    `workers=1` runs inline without a pool (timeouts are not enforced then).
+    """
+    total = len(items) if hasattr(items, "__len__") else None
+    workers = default_workers() if workers is None else max(1, int(workers))
+    done = 0
+
+    def report() -> None:
+        if progress is not None:
+            progress(done, total)
+
+    if workers == 1:
+        for res in _run_serial(fn, items):
+            done += 1
+            report()
+            yield res
+        return
+
+    source = enumerate(items)
+    exhausted = False
+    pool = ProcessPoolExecutor(max_workers=workers)
+    inflight: Dict[Future, Tuple[int, Any, float]] = {}
+    buffered: Dict[int, BatchResult] = {}
+    next_index = 0
+
+    def submit(index: int, item: Any) -> None:
+        inflight[pool.submit(fn, item)] = (index, item, time.monotonic())
+
+    def refill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(inflight) < workers:
+            try:
+                index, item = next(source)
+            except StopIteration:
+                exhausted = True
+                return
+            submit(index, item)
+
+    try:
+        refill()
+        while inflight:
+            wait_for = None
+            if timeout is not None:
+                oldest = min(started for _, _, started in inflight.values())
+                wait_for = max(0.0, oldest + timeout - time.monotonic())
+            finished, _ = wait(list(inflight), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            results, broken = [], False
+            for fut in finished:
+                index, _, started = inflight.pop(fut)
+                elapsed = time.monotonic() - started
+                try:
+                    results.append(BatchResult(index, value=fut.result(), seconds=elapsed))
+                except BrokenProcessPool as e:
+                    broken = True
+                    results.append(BatchResult(index, error=f"worker crashed: {e}", seconds=elapsed))
+                except Exception as e:
+                    results.append(BatchResult(index, error=str(e), seconds=elapsed))
+
+            now = time.monotonic()
+            expired = [f for f, (_, _, started) in inflight.items()
+                       if timeout is not None and now - started >= timeout]
+            for fut in expired:
+                index, _, started = inflight.pop(fut)
+                logger.warning(f"Batch item {index} timed out after {timeout}s")
+                results.append(BatchResult(index, error=f"timed out after {timeout}s", seconds=now - started))
+
+            if expired or broken:
+                # replace the pool; documents that were still running start over
+                retry = list(inflight.values())
+                inflight.clear()
+                _terminate(pool)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                for index, item, _ in retry:
+                    submit(index, item)
+            refill()
+
+            for res in results:
+                done += 1
+                report()
+                if not ordered:
+                    yield res
+                    continue
+                buffered[res.index] = res
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+    finally:
+        if inflight:
+            _terminate(pool)   # caller stopped early
+        else:
+            pool.shutdown(wait=True)
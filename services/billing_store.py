@@ -0,0 +1,456 @@
+# services/billing_store.py
+"""
+Columnar mirror of time entries, expenses and invoices for billing aggregates.
+
+Billing metrics (billable hours, revenue, utilization, collection rate)
+used to be computed by walking object lists and reading attributes per
+entry. BillingStore keeps the same records as numpy columns instead:
+
+- user, matter, client, status, activity and expense category are int32
+  codes into shared categories, so a group-by is one np.bincount
+- dates are datetime64[s]; months come from one astype('datetime64[M]')
+- hours, rates and amounts are float64, and flags are bool
+
+Writes are upserts keyed by record id (append, or overwrite the record's
+row in place), and deletes clear an alive flag. Every aggregate is a
+masked reduction over whole columns, so firm-wide totals and group-bys by
+attorney, client, matter or month cost a few numpy passes over millions
+of entries.
+
+Callers mirror their writes: add_time_entry() / add_invoice() /
+add_expense() after creating or changing a record, remove_*() after
+deleting one. session_billing_store() keeps one per Streamlit session.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = "billing_store"
+OUTSTANDING_STATUSES = ('sent', 'overdue')
+PAID_STATUS = 'paid'
+CLOSED_INVOICE_STATUSES = ('paid', 'cancelled')
+AGING_BUCKETS = (('current', None, 0), ('1-30_days', 1, 30), ('31-60_days', 31, 60),
+                 ('61-90_days', 61, 90), ('over_90_days', 91, None))
+
+_NAT = np.datetime64('NaT', 's')
+Filter = Union[None, str, Sequence[str]]
+
+def _date(value: Optional[datetime]) -> np.datetime64:
+    return _NAT if value is None else np.datetime64(value, 's')
+
+def _field(record: Any, names: Sequence[str], default: Any = None) -> Any:
+    """
+    First present field of `names` on a record. Records come in several
+    shapes: models.billing objects, the Matters page's TimeEntry (no user,
+    status or billable flag), and plain dicts seeded by the session or
+    appended by app2.
+    """
+    for name in names:
+        value = record.get(name) if isinstance(record, dict) else getattr(record, name, None)
+        if value is not None:
+            return value
+    return default
+
+def _key(record: Any) -> str:
+    """Record id, or the object's identity for records without one (app2's dicts)."""
+    record_id = _field(record, ('id',))
+    return f"@{id(record)}" if record_id in (None, '') else str(record_id)
+
+class Categories:
+    """String <-> int32 code mapping shared by every table."""
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, label: Any) -> int:
+        label = '' if label is None else str(label)
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def codes(self, labels: Filter) -> np.ndarray:
+        """Codes of known labels (unknown ones cannot match anything)."""
+        if isinstance(labels, str):
+            labels = [labels]
+        return np.array([self._codes[l] for l in labels if l in self._codes], dtype=np.int32)
+
+class _Table:
+    """Growable numpy columns (capacity doubling) keyed by record id."""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self._cols = {name: np.zeros(64, dtype) for name, dtype in schema.items()}
+        self._alive = np.zeros(64, bool)
+        self.rows: Dict[str, int] = {}
+        self.size = 0
+        self.live = 0
+
+    def _grow(self, need: int) -> None:
+        if need <= len(self._alive):
+            return
+        capacity = max(need, 2 * len(self._alive))
+        for name, col in self._cols.items():
+            grown = np.zeros(capacity, col.dtype)
+            grown[:self.size] = col[:self.size]
+            self._cols[name] = grown
+        alive = np.zeros(capacity, bool)
+        alive[:self.size] = self._alive[:self.size]
+        self._alive = alive
+
+    def put(self, key: str, values: Dict[str, Any]) -> None:
+        row = self.rows.get(key)
+        if row is None:
+            self._grow(self.size + 1)
+            row = self.rows[key] = self.size
+            self.size += 1
+        if not self._alive[row]:
+            self._alive[row] = True
+            self.live += 1
+        for name, value in values.items():
+            self._cols[name][row] = value
+
+    def extend(self, keys: List[str], columns: Dict[str, np.ndarray]) -> None:
+        """Bulk append of new keys (existing keys go through put())."""
+        fresh = [i for i, k in enumerate(keys) if k not in self.rows]
+        for i, k in enumerate(keys):
+            if k in self.rows:
+                self.put(k, {name: col[i] for name, col in columns.items()})
+        if not fresh:
+            return
+        start = self.size
+        self._grow(start + len(fresh))
+        idx = np.asarray(fresh)
+        for name, col in columns.items():
+            self._cols[name][start:start + len(fresh)] = np.asarray(col)[idx]
+        self._alive[start:start + len(fresh)] = True
+        self.rows.update((keys[i], start + n) for n, i in enumerate(fresh))
+        self.size += len(fresh)
+        self.live += len(fresh)
+
+    def delete(self, key: str) -> bool:
+        row = self.rows.get(key)
+        if row is None or not self._alive[row]:
+            return False
+        self._alive[row] = False
+        self.live -= 1
+        return True
+
+    def col(self, name: str) -> np.ndarray:
+        return self._cols[name][:self.size]
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._alive[:self.size]
+
+TIME_SCHEMA = {'user': np.int32, 'matter': np.int32, 'client': np.int32, 'status': np.int32,
+               'activity': np.int32, 'date': 'datetime64[s]', 'hours': np.float64,
+               'rate': np.float64, 'billable': bool}
+EXPENSE_SCHEMA = {'user': np.int32, 'matter': np.int32, 'client': np.int32, 'status': np.int32,
+                  'category': np.int32, 'date': 'datetime64[s]', 'amount': np.float64, 'billable': bool}
+INVOICE_SCHEMA = {'matter': np.int32, 'client': np.int32, 'status': np.int32,
+                  'date': 'datetime64[s]', 'due': 'datetime64[s]', 'paid': 'datetime64[s]',
+                  'subtotal': np.float64, 'total': np.float64}
+
+# group-by keys -> category name, per table
+_GROUP_KEYS = {'user': 'user', 'attorney': 'user', 'matter': 'matter', 'client': 'client',
+               'status': 'status', 'activity': 'activity', 'category': 'category'}
+
+class BillingStore:
+    """Columnar time entries, expenses and invoices with vectorized aggregates; thread-safe."""
+
+    def __init__(self, time_entries: Iterable = (), invoices: Iterable = (), expenses: Iterable = ()):
+        self.categories = {name: Categories() for name in ('user', 'matter', 'client', 'status',
+                                                           'activity', 'category')}
+        self.tables = {'time': _Table(TIME_SCHEMA), 'expenses': _Table(EXPENSE_SCHEMA),
+                       'invoices': _Table(INVOICE_SCHEMA)}
+        self._lock = threading.RLock()
+        self.signatures: Dict[str, int] = {}  # per-table list fingerprints, see session_billing_store()
+        self.add_time_entries(time_entries)
+        self.add_invoices(invoices)
+        self.add_expenses(expenses)
+
+    def counts(self) -> Dict[str, int]:
+        return {name: table.live for name, table in self.tables.items()}
+
+    # ---------- writes ----------
+    def _time_row(self, e) -> Dict[str, Any]:
+        c = self.categories
+        return {'user': c['user'].code(_field(e, ('user_id', 'attorney_email', 'attorney'))),
+                'matter': c['matter'].code(_field(e, ('matter_id', 'matter'))),
+                'client': c['client'].code(_field(e, ('client_id', 'client'))),
+                'status': c['status'].code(_field(e, ('status',))),
+                'activity': c['activity'].code(_field(e, ('activity_type',))),
+                'date': _date(_field(e, ('date',))), 'hours': float(_field(e, ('hours',), 0.0)),
+                'rate': float(_field(e, ('billing_rate', 'billable_rate', 'rate'), 0.0)),
+                'billable': bool(_field(e, ('billable', 'is_billable'), False))}
+
+    def _expense_row(self, e) -> Dict[str, Any]:
+        c = self.categories
+        return {'user': c['user'].code(_field(e, ('user_id', 'attorney_email', 'attorney'))),
+                'matter': c['matter'].code(_field(e, ('matter_id', 'matter'))),
+                'client': c['client'].code(_field(e, ('client_id', 'client'))),
+                'status': c['status'].code(_field(e, ('status',))),
+                'category': c['category'].code(_field(e, ('category',))),
+                'date': _date(_field(e, ('date',))), 'amount': float(_field(e, ('amount',), 0.0)),
+                'billable': bool(_field(e, ('billable', 'is_billable'), False))}
+
+    def _invoice_row(self, inv) -> Dict[str, Any]:
+        c = self.categories
+        return {'matter': c['matter'].code(_field(inv, ('matter_id', 'matter'))),
+                'client': c['client'].code(_field(inv, ('client_id', 'client'))),
+                'status': c['status'].code(_field(inv, ('status',))),
+                'date': _date(_field(inv, ('date_issued', 'date'))), 'due': _date(_field(inv, ('due_date',))),
+                'paid': _date(_field(inv, ('paid_date',))), 'subtotal': float(_field(inv, ('subtotal',), 0.0)),
+                'total': float(_field(inv, ('total_amount', 'total', 'amount'), 0.0))}
+
+    @staticmethod
+    def _row(row_of, record) -> Optional[Dict[str, Any]]:
+        """A record's row, or None for records whose fields cannot be read (logged, skipped)."""
+        try:
+            return row_of(record)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping billing record {_key(record)}: {e}")
+            return None
+
+    def _bulk(self, table: str, records: Iterable, row_of) -> None:
+        by_key = {}
+        for record in records:
+            row = self._row(row_of, record)
+            if row is not None:
+                by_key[_key(record)] = row  # a repeated id keeps its last record
+        if not by_key:
+            return
+        keys, rows = list(by_key), list(by_key.values())
+        schema = self.tables[table].schema
+        columns = {name: np.array([row[name] for row in rows], dtype=dtype) for name, dtype in schema.items()}
+        with self._lock:
+            self.tables[table].extend(keys, columns)
+
+    def _put(self, table: str, record, row_of) -> None:
+        row = self._row(row_of, record)
+        with self._lock:
+            if row is None:
+                self.tables[table].delete(_key(record))
+            else:
+                self.tables[table].put(_key(record), row)
+
+    def add_time_entry(self, entry) -> None:
+        """Insert or refresh one time entry (call again after changing it)."""
+        self._put('time', entry, self._time_row)
+
+    def add_time_entries(self, entries: Iterable) -> None:
+        self._bulk('time', entries, self._time_row)
+
+    def add_expense(self, expense) -> None:
+        self._put('expenses', expense, self._expense_row)
+
+    def add_expenses(self, expenses: Iterable) -> None:
+        self._bulk('expenses', expenses, self._expense_row)
+
+    def add_invoice(self, invoice) -> None:
+        self._put('invoices', invoice, self._invoice_row)
+
+    def add_invoices(self, invoices: Iterable) -> None:
+        self._bulk('invoices', invoices, self._invoice_row)
+
+    update_time_entry, update_expense, update_invoice = add_time_entry, add_expense, add_invoice
+
+    def remove_time_entry(self, entry_id: str) -> bool:
+        with self._lock:
+            return self.tables['time'].delete(str(entry_id))
+
+    def remove_expense(self, expense_id: str) -> bool:
+        with self._lock:
+            return self.tables['expenses'].delete(str(expense_id))
+
+    def remove_invoice(self, invoice_id: str) -> bool:
+        with self._lock:
+            return self.tables['invoices'].delete(str(invoice_id))
+
+    def reload(self, table: str, records: Iterable) -> None:
+        """Replace every row of `table` with `records` (categories are kept)."""
+        row_of = {'time': self._time_row, 'expenses': self._expense_row, 'invoices': self._invoice_row}[table]
+        with self._lock:
+            self.tables[table] = _Table(self.tables[table].schema)
+            self._bulk(table, records, row_of)
+
+    # ---------- selection ----------
+    def _mask(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              user: Filter = None, matter: Filter = None, client: Filter = None,
+              status: Filter = None, billable: Optional[bool] = None) -> np.ndarray:
+        """Alive rows matching every given filter; dates are [start, end)."""
+        t = self.tables[table]
+        mask = t.alive.copy()
+        if start is not None:
+            mask &= t.col('date') >= _date(start)
+        if end is not None:
+            mask &= t.col('date') < _date(end)
+        for name, wanted in (('user', user), ('matter', matter), ('client', client), ('status', status)):
+            if wanted is not None:
+                if name not in t.schema:
+                    raise ValueError(f"{table} cannot be filtered by {name}")
+                mask &= np.isin(t.col(name), self.categories[name].codes(wanted))
+        if billable is not None:
+            mask &= t.col('billable') == billable
+        return mask
+
+    def _values(self, table: str, value: str) -> np.ndarray:
+        t = self.tables[table]
+        if value == 'count':
+            return np.ones(t.size)
+        if table == 'time':
+            hours = t.col('hours')
+            if value == 'billable_hours':
+                return np.where(t.col('billable'), hours, 0.0)
+            if value == 'amount':
+                return np.where(t.col('billable'), hours * t.col('rate'), 0.0)
+        elif table == 'expenses' and value == 'billable_amount':
+            return np.where(t.col('billable'), t.col('amount'), 0.0)
+        elif table == 'invoices':
+            total = t.col('total')
+            if value == 'collected':
+                return np.where(t.col('status') == self._status_code(PAID_STATUS), total, 0.0)
+            if value == 'amount_due':
+                return np.where(np.isin(t.col('status'), self.categories['status'].codes(CLOSED_INVOICE_STATUSES)),
+                                0.0, total)
+        return t.col(value).astype(np.float64, copy=False)
+
+    def _status_code(self, status: str) -> int:
+        codes = self.categories['status'].codes(status)
+        return int(codes[0]) if len(codes) else -1
+
+    # ---------- aggregates ----------
+    def time_totals(self, **filters) -> Dict[str, float]:
+        """Hours, billable hours, billable amount and utilization of the matching time entries."""
+        with self._lock:
+            t = self.tables['time']
+            mask = self._mask('time', **filters)
+            hours, billable = t.col('hours')[mask], t.col('billable')[mask]
+            total = float(hours.sum())
+            billable_hours = float(hours[billable].sum())
+            amount = float((hours[billable] * t.col('rate')[mask][billable]).sum())
+            return {'entries': int(mask.sum()), 'total_hours': total, 'billable_hours': billable_hours,
+                    'non_billable_hours': total - billable_hours, 'billable_amount': amount,
+                    'utilization_rate': billable_hours / total * 100 if total > 0 else 0.0}
+
+    def expense_totals(self, **filters) -> Dict[str, float]:
+        with self._lock:
+            t = self.tables['expenses']
+            mask = self._mask('expenses', **filters)
+            amount, billable = t.col('amount')[mask], t.col('billable')[mask]
+            return {'expenses': int(mask.sum()), 'total_amount': float(amount.sum()),
+                    'billable_amount': float(amount[billable].sum())}
+
+    def invoice_totals(self, **filters) -> Dict[str, float]:
+        """Billed, collected and outstanding amounts and the collection rate of the matching invoices."""
+        with self._lock:
+            t = self.tables['invoices']
+            mask = self._mask('invoices', **filters)
+            total, status = t.col('total')[mask], t.col('status')[mask]
+            paid = status == self._status_code(PAID_STATUS)
+            outstanding = np.isin(status, self.categories['status'].codes(OUTSTANDING_STATUSES))
+            billed, collected = float(total.sum()), float(total[paid].sum())
+            return {'invoices': int(mask.sum()), 'total_billed': billed, 'total_collected': collected,
+                    'paid_count': int(paid.sum()), 'outstanding_count': int(outstanding.sum()),
+                    'outstanding_amount': float(total[outstanding].sum()),
+                    'collection_rate': collected / billed * 100 if billed > 0 else 0.0}
+
+    def status_counts(self, table: str = 'invoices', **filters) -> Dict[str, int]:
+        return {k: int(v) for k, v in self.group_by(table, 'status', 'count', **filters).items()}
+
+    def group_by(self, table: str, by: str, value: str = 'count', **filters) -> Dict[str, float]:
+        """
+        Sum of `value` per attorney/user, matter, client, status, activity,
+        category or month ('YYYY-MM') over the matching rows of `table`
+        ('time', 'expenses' or 'invoices'). Values are column names plus
+        'count'; time entries add 'billable_hours' and 'amount' (billable
+        hours x rate), expenses 'billable_amount', invoices 'collected' and
+        'amount_due'.
+        """
+        with self._lock:
+            t = self.tables[table]
+            mask = self._mask(table, **filters)
+            weights = self._values(table, value)[mask]
+            if by == 'month':
+                months = t.col('date')[mask].astype('datetime64[M]')
+                labels, codes = np.unique(months, return_inverse=True)
+                labels = [str(m) for m in labels]
+            elif _GROUP_KEYS.get(by) in t.schema:
+                category = self.categories[_GROUP_KEYS[by]]
+                codes, labels = t.col(_GROUP_KEYS[by])[mask], category.labels
+            else:
+                raise ValueError(f"Cannot group {table} by {by}")
+            n = len(labels)
+            sums = np.bincount(codes, weights=weights, minlength=n)
+            present = np.bincount(codes, minlength=n) > 0
+            return {labels[i]: float(sums[i]) for i in np.flatnonzero(present)}
+
+    def aging(self, now: Optional[datetime] = None) -> Dict[str, float]:
+        """BillingCalculator.calculate_aging over every open invoice, by days past due."""
+        with self._lock:
+            t = self.tables['invoices']
+            mask = t.alive & ~np.isin(t.col('status'), self.categories['status'].codes(CLOSED_INVOICE_STATUSES))
+            overdue_days = (_date(now or datetime.now()) - t.col('due')[mask]).astype('timedelta64[D]').astype(np.int64)
+            total = t.col('total')[mask]
+            out = {}
+            for name, low, high in AGING_BUCKETS:
+                sel = np.ones(len(total), bool)
+                if low is not None:
+                    sel &= overdue_days >= low
+                if high is not None:
+                    sel &= overdue_days <= high
+                out[name] = float(total[sel].sum())
+            return out
+
+# fields that pages change in place (status, hours, amounts, dates) and so
+# must invalidate a session store; ids catch appends and deletes
+_SIGNATURE_FIELDS = {
+    'time': ('id', 'status', 'hours', 'billable', 'billing_rate', 'billable_rate', 'rate', 'date', 'matter_id'),
+    'expenses': ('id', 'status', 'amount', 'billable', 'date', 'matter_id'),
+    'invoices': ('id', 'status', 'total_amount', 'date_issued', 'due_date', 'paid_date'),
+}
+
+def _signature(table: str, records: Sequence) -> int:
+    """Cheap fingerprint of a record list: one tuple of raw field values per record, hashed."""
+    names = _SIGNATURE_FIELDS[table]
+    parts = []
+    for r in records:
+        fields = r if isinstance(r, dict) else getattr(r, '__dict__', None)
+        if fields is not None:
+            parts.append((id(r), *map(fields.get, names)))
+        else:
+            parts.append((id(r), *(getattr(r, n, None) for n in names)))
+    return hash(tuple(parts))
+
+def session_billing_store(session_state: MutableMapping[str, Any]) -> BillingStore:
+    """
+    The BillingStore kept next to session_state's time_entries, invoices and
+    expenses. Pages mirror their writes into it; a table is reloaded when
+    its list's fingerprint (record identities plus the fields pages edit in
+    place, see _SIGNATURE_FIELDS) changed since the last call, so appends,
+    deletes and in-place edits made without mirroring are picked up too.
+    """
+    lists = {'time': session_state.get('time_entries') or [],
+             'invoices': session_state.get('invoices') or [],
+             'expenses': session_state.get('expenses') or []}
+    signatures = {table: _signature(table, records) for table, records in lists.items()}
+    store = session_state.get(SESSION_KEY)
+    if store is None:
+        store = BillingStore(lists['time'], lists['invoices'], lists['expenses'])
+        session_state[SESSION_KEY] = store
+    else:
+        for table, records in lists.items():
+            if store.signatures.get(table) != signatures[table]:
+                store.reload(table, records)
+    store.signatures = signatures
+    return store
@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import numpy as np
 
+from services.billing_store import session_billing_store
+
 class BusinessIntelligence:
     def __init__(self):
         self.current_year = datetime.now().year
@@ -16,23 +18,21 @@ class BusinessIntelligence:
         # Get data from session state with fallbacks
         matters = getattr(st.session_state, 'matters', [])
         documents = getattr(st.session_state, 'documents', [])
-        invoices = getattr(st.session_state, 'invoices', [])
-        time_entries = getattr(st.session_state, 'time_entries', [])
         clients = getattr(st.session_state, 'clients', [])
         
         total_matters = len(matters)
         active_matters = len([m for m in matters if getattr(m, 'status', 'active') == 'active'])
         total_docs = len(documents)
-        total_revenue = sum(getattr(inv, 'total_amount', 0) for inv in invoices if getattr(inv, 'status', '') == 'paid')
-        
-        # Calculate additional metrics
-        total_billed = sum(getattr(inv, 'total_amount', 0) for inv in invoices)
-        collection_rate = (total_revenue / total_billed * 100) if total_billed > 0 else 0
         
-        # Calculate time-based metrics
-        billable_hours = sum(getattr(entry, 'hours', 0) for entry in time_entries if getattr(entry, 'billable', False))
-        total_hours = sum(getattr(entry, 'hours', 0) for entry in time_entries)
-        utilization_rate = (billable_hours / total_hours * 100) if total_hours > 0 else 0
+        # Billing metrics come from the session's columnar billing store
+        billing = session_billing_store(st.session_state)
+        invoice_totals = billing.invoice_totals()
+        time_totals = billing.time_totals()
+        total_revenue = invoice_totals['total_collected']
+        total_billed = invoice_totals['total_billed']
+        collection_rate = invoice_totals['collection_rate']
+        billable_hours = time_totals['billable_hours']
+        utilization_rate = time_totals['utilization_rate']
         
         return {
             'total_matters': total_matters,
@@ -0,0 +1,593 @@
+# services/clause_index.py
+"""
+Firm-wide "find similar clauses" index.
+
+Every clause found by AIAnalysisSystem._identify_key_clauses is stored
+with:
+
+- a MinHash signature over its word 3-gram shingles (NUM_PERM values),
+  banded into LSH_BANDS keys of LSH_ROWS values each. Two clauses with
+  Jaccard similarity s share at least one band key with probability
+  1 - (1 - s**LSH_ROWS)**LSH_BANDS (about 0.5 at s = 0.5, 0.99 at s = 0.75)
+- a sparse term-frequency vector, kept CSR-style in flat numpy arrays
+
+A query computes the same signature and looks up each band in per-band
+sorted key arrays (binary search), so candidate generation does not scan
+the index. Only the candidates are then re-scored exactly by TF-IDF cosine
+against the current document frequencies (a query with too few
+near-duplicates also draws candidates from term overlap). Clauses added since the last
+rebuild sit in a small unsorted tail that is compared directly; the
+sorted arrays (and the term postings used for the term-overlap
+candidates) are rebuilt once that tail grows past DELTA_MAX_ROWS or an
+eighth of the index.
+
+Each organization has its own index (get_clause_index(organization_code)),
+and every entry records its organization; similar() never returns another
+organization's clauses. Documents are indexed incrementally by content
+hash (sync), like services.risk_register. An index is persisted under
+LEGALDOC_CACHE_DIR/clause_index/<organization> as a snapshot (arrays.npz + meta.json)
+plus an append-only journal: add_document/remove_document append one
+line each, and the snapshot is rewritten (and the journal emptied) only
+once the journal holds more than JOURNAL_MAX_OPS operations or a quarter
+of the indexed documents. Loading replays the journal over the snapshot.
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import zlib
+import logging
+import threading
+from pathlib import Path
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.ai_analysis import CONTRACT_ANALYZER_VERSIONS, AIAnalysisSystem
+from services.analysis_cache import text_sha256
+from services.batch_runner import ProgressFn, run_batch
+from services.extraction import CACHE_DIR
+from services.risk_register import DEFAULT_ORGANIZATION, ScanReport, as_corpus_entries, organization_key
+
+logger = logging.getLogger(__name__)
+
+CLAUSE_INDEX_DIR = CACHE_DIR / "clause_index"
+
+SHINGLE_WORDS = 3
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+DELTA_MAX_ROWS = 4096         # unsorted tail rows (or 1/8 of the index) before the band tables are rebuilt
+TERM_FEATURES = 1 << 20       # hashed term space of the TF-IDF vectors
+TERM_CANDIDATES = 2048        # term-overlap candidates re-scored when LSH finds too few
+TERM_POSTINGS_MAX = 200_000   # postings read for those candidates (rarest terms first)
+JOURNAL_MAX_OPS = 256         # journaled adds/removes (or 1/4 of the documents) before a new snapshot
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_CLAUSE_END = re.compile(r"[.!?]")
+
+# the same random family every run, so persisted signatures stay comparable
+_rng = np.random.RandomState(0x5EED)
+# multipliers must be full 64-bit: with a < 2**32, (a*x) >> 32 is monotonic in x
+# and every permutation would pick the same minimum shingle
+_PERM_A = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.randint(0, 1 << 64, size=LSH_ROWS, dtype=np.uint64) | np.uint64(1)
+del _rng
+
+try:
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS as _STOP_WORDS
+except Exception:  # pragma: no cover
+    _STOP_WORDS = frozenset()
+
+# ---------- hashing ----------
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+def _stable_hash(s: str) -> int:
+    # hash() is salted per process; signatures must survive restarts
+    return zlib.crc32(s.encode('utf-8'))
+
+def shingle_hashes(tokens: Sequence[str], k: int = SHINGLE_WORDS) -> np.ndarray:
+    k = max(1, min(k, len(tokens)))
+    grams = {' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    return np.fromiter((_stable_hash(g) for g in grams), dtype=np.uint64, count=len(grams))
+
+def minhash_signature(hashes: np.ndarray) -> np.ndarray:
+    """NUM_PERM minima of multiply-shift hashes ((a*x + b) mod 2**64) >> 32."""
+    if not len(hashes):
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        mixed = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) >> np.uint64(32)
+    return mixed.min(axis=0).astype(np.uint32)
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One uint64 per band: the band's LSH_ROWS values mixed together."""
+    sig = signatures.reshape(-1, LSH_BANDS, LSH_ROWS).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        return (sig * _BAND_MIX).sum(axis=2, dtype=np.uint64)
+
+def term_vector(tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted hashed term ids and their sublinear tf weights (1 + log tf)."""
+    counts = Counter(_stable_hash(t) % TERM_FEATURES for t in tokens if t not in _STOP_WORDS)
+    if not counts:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32)
+    ids = np.array(sorted(counts), dtype=np.uint32)
+    tf = np.array([counts[i] for i in ids.tolist()], dtype=np.float32)
+    return ids, (1.0 + np.log(tf)).astype(np.float32)
+
+def clause_span(text: str, start: int) -> Tuple[int, int]:
+    """Full extent of a key clause found at `start` (its pattern runs to the next [.!?])."""
+    m = _CLAUSE_END.search(text, start)
+    return start, (m.end() if m else len(text))
+
+def _csr_positions(indptr: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat positions of the given CSR rows' entries, and each row's length."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(lengths.sum(), dtype=np.int64) + offsets, lengths
+
+# ---------- records ----------
+@dataclass
+class ClauseEntry:
+    document_id: str
+    document_name: str
+    clause_type: str
+    text: str
+    location: int
+    organization_code: str = ""
+
+@dataclass
+class ClauseMatch:
+    clause: ClauseEntry
+    score: float              # TF-IDF cosine with the query
+    minhash_similarity: float # estimated shingle Jaccard
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            'Document': self.clause.document_name,
+            'Clause Type': self.clause.clause_type,
+            'Similarity': round(self.score, 3),
+            'Clause': self.clause.text,
+        }
+
+class _Rows:
+    """Append-only numpy buffer (capacity doubling) of rows of a fixed width."""
+
+    def __init__(self, width: int, dtype, data: Optional[np.ndarray] = None):
+        shape = (0,) if width == 0 else (0, width)
+        self._data = np.zeros(shape, dtype=dtype) if data is None else data
+        self.size = len(self._data)
+
+    def extend(self, rows: np.ndarray) -> None:
+        need = self.size + len(rows)
+        if need > len(self._data):
+            grown = np.zeros((max(need, 2 * len(self._data), 64),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:need] = rows
+        self.size = need
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+# ---------- index ----------
+class ClauseIndex:
+    """MinHash/LSH candidate lookup plus exact TF-IDF re-scoring; safe to share between threads."""
+
+    def __init__(self, root: Optional[Path] = None, persist: bool = True,
+                 organization_code: str = DEFAULT_ORGANIZATION):
+        self.organization_code = organization_key(organization_code)
+        self.root = Path(root) if root is not None else CLAUSE_INDEX_DIR / self.organization_code
+        self.persist = persist
+        self._lock = threading.RLock()
+        self._reset()
+        if persist:
+            self._load()
+
+    def _reset(self) -> None:
+        self.entries: List[ClauseEntry] = []
+        self.documents: Dict[str, Dict[str, Any]] = {}     # id -> {'hash', 'rows', 'version'}
+        self._types: List[str] = []
+        self._type_codes = _Rows(0, np.int16)
+        self._alive = _Rows(0, bool)
+        self._signatures = _Rows(NUM_PERM, np.uint32)
+        self._bands = _Rows(LSH_BANDS, np.uint64)
+        self._term_ids = _Rows(0, np.uint32)
+        self._term_tf = _Rows(0, np.float32)
+        self._indptr = _Rows(0, np.int64, np.zeros(1, dtype=np.int64))
+        self._df = np.zeros(TERM_FEATURES, dtype=np.int32)
+        self._sorted_keys = np.zeros((LSH_BANDS, 0), dtype=np.uint64)
+        self._sorted_rows = np.zeros((LSH_BANDS, 0), dtype=np.int64)
+        self._posting_terms = np.zeros(0, dtype=np.uint32)
+        self._posting_pos = np.zeros(0, dtype=np.int64)
+        self._base_rows = 0
+        self._live = 0
+        self._journal_ops = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    # ---------- adding / removing ----------
+    def _type_code(self, clause_type: str) -> int:
+        try:
+            return self._types.index(clause_type)
+        except ValueError:
+            self._types.append(clause_type)
+            return len(self._types) - 1
+
+    def add_clauses(self, document_id: str, document_name: str, clauses: Iterable[Tuple[str, str, int]]) -> List[int]:
+        """Index (clause_type, text, location) triples of one document; returns their row numbers."""
+        rows = []
+        with self._lock:
+            for clause_type, text, location in clauses:
+                tokens = _tokens(text)
+                if not tokens:
+                    continue
+                row = len(self.entries)
+                sig = minhash_signature(shingle_hashes(tokens))
+                ids, tf = term_vector(tokens)
+                self.entries.append(ClauseEntry(document_id, document_name, clause_type, text, int(location),
+                                                self.organization_code))
+                self._type_codes.extend(np.array([self._type_code(clause_type)], dtype=np.int16))
+                self._alive.extend(np.array([True]))
+                self._signatures.extend(sig[None, :])
+                self._bands.extend(band_keys(sig))
+                self._term_ids.extend(ids)
+                self._term_tf.extend(tf)
+                self._indptr.extend(np.array([self._term_ids.size], dtype=np.int64))
+                self._df[ids] += 1
+                self._live += 1
+                rows.append(row)
+            if len(self.entries) - self._base_rows > max(DELTA_MAX_ROWS, self._base_rows // 8):
+                self._rebuild_tables()
+        return rows
+
+    def add_document(self, document_id: str, text: str, name: Optional[str] = None,
+                     key_clauses: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        (Re)index one document's key clauses. `key_clauses` is an
+        analyze_contract 'key_clauses' result; it is computed (through the
+        analysis cache) when omitted. Returns the number of clauses indexed.
+        """
+        if key_clauses is None:
+            key_clauses = AIAnalysisSystem().analyze_fields(text, ['key_clauses'])['key_clauses']
+        clauses = []
+        for clause in key_clauses:
+            # analyzer output is truncated to 200 characters; index the whole clause
+            start, end = clause_span(text, clause['location'])
+            clauses.append((clause['type'], text[start:end].strip(), start))
+        record = {'op': 'add', 'id': document_id, 'name': name or document_id, 'hash': text_sha256(text),
+                  'version': CONTRACT_ANALYZER_VERSIONS['key_clauses'], 'clauses': clauses}
+        with self._lock:
+            count = self._apply(record)
+            self._journal(record)
+        return count
+
+    def remove_document(self, document_id: str) -> bool:
+        with self._lock:
+            removed = self._drop(document_id)
+            if removed:
+                self._journal({'op': 'remove', 'id': document_id})
+            return removed
+
+    def _apply(self, record: Dict[str, Any]) -> int:
+        """Apply one journal record; returns the number of clauses indexed."""
+        self._drop(record['id'])
+        if record['op'] == 'remove':
+            return 0
+        rows = self.add_clauses(record['id'], record['name'], [tuple(c) for c in record['clauses']])
+        self.documents[record['id']] = {'hash': record['hash'], 'rows': rows, 'version': record['version']}
+        return len(rows)
+
+    def _drop(self, document_id: str) -> bool:
+        doc = self.documents.pop(document_id, None)
+        if doc is None:
+            return False
+        alive = self._alive.view
+        for row in doc['rows']:
+            if alive[row]:
+                alive[row] = False
+                lo, hi = self._indptr.view[row], self._indptr.view[row + 1]
+                self._df[self._term_ids.view[lo:hi]] -= 1
+                self._live -= 1
+        return True
+
+    def sync(self, documents: Iterable[Any], workers: Optional[int] = 1,
+             full_corpus: bool = False, progress: Optional[ProgressFn] = None) -> ScanReport:
+        """
+        Bring the index up to date with a library (see
+        services.risk_register.as_corpus_entries): only new or edited
+        documents are re-analyzed; with full_corpus=True documents no longer
+        present are removed. The index is shared by every session, so pass
+        full_corpus=True only with the whole firm library; deletions go
+        through remove_document().
+        """
+        entries = list(as_corpus_entries(documents))
+        report = ScanReport()
+        version = CONTRACT_ANALYZER_VERSIONS['key_clauses']
+        pending = []
+        for entry in entries:
+            doc = self.documents.get(entry[0])
+            if doc is None or doc['hash'] != text_sha256(entry[2]) or doc.get('version') != version:
+                pending.append(entry)
+        report.unchanged = len(entries) - len(pending)
+
+        for res in run_batch(_key_clauses_job, [text for _, _, text in pending],
+                             workers=workers, progress=progress):
+            doc_id, name, text = pending[res.index]
+            if not res.ok:
+                report.failed[doc_id] = res.error
+                continue
+            self.add_document(doc_id, text, name, key_clauses=res.value)
+            report.scanned += 1
+
+        if full_corpus:
+            present = {doc_id for doc_id, _, _ in entries}
+            for doc_id in [d for d in self.documents if d not in present]:
+                self.remove_document(doc_id)
+                report.removed += 1
+        return report
+
+    # ---------- LSH tables ----------
+    def _rebuild_tables(self) -> None:
+        keys = np.ascontiguousarray(self._bands.view.T)          # bands x rows
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._sorted_rows = order
+        self._base_rows = keys.shape[1]
+        # term postings: positions into _term_ids grouped by term
+        term_ids = self._term_ids.view
+        self._posting_pos = np.argsort(term_ids, kind='stable')
+        self._posting_terms = term_ids[self._posting_pos]
+
+    def _candidates(self, query_bands: np.ndarray) -> np.ndarray:
+        found = []
+        for b in range(LSH_BANDS):
+            keys = self._sorted_keys[b]
+            lo = np.searchsorted(keys, query_bands[b], side='left')
+            hi = np.searchsorted(keys, query_bands[b], side='right')
+            if hi > lo:
+                found.append(self._sorted_rows[b, lo:hi])
+        tail = self._bands.view[self._base_rows:]
+        if len(tail):
+            hit = np.nonzero((tail == query_bands[None, :]).any(axis=1))[0]
+            found.append(hit + self._base_rows)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.unique(np.concatenate(found))
+        return rows[self._alive.view[rows]]
+
+    # ---------- querying ----------
+    def _idf(self, term_ids: np.ndarray) -> np.ndarray:
+        # sklearn's smoothed idf
+        return np.log((1.0 + self._live) / (1.0 + self._df[term_ids])) + 1.0
+
+    def _cosine(self, rows: np.ndarray, q_ids: np.ndarray, q_weights: np.ndarray) -> np.ndarray:
+        positions, lengths = _csr_positions(self._indptr.view, rows)
+        if not len(positions):
+            return np.zeros(len(rows))
+        ids = self._term_ids.view[positions]
+        weights = self._term_tf.view[positions] * self._idf(ids)
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        norms = np.sqrt(np.bincount(owner, weights=weights * weights, minlength=len(rows)))
+        k = np.searchsorted(q_ids, ids)
+        k[k >= len(q_ids)] = 0
+        shared = q_ids[k] == ids
+        dots = np.bincount(owner[shared], weights=weights[shared] * q_weights[k[shared]], minlength=len(rows))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(norms > 0, dots / norms, 0.0)
+
+    def _term_candidates(self, q_ids: np.ndarray, q_weights: np.ndarray, limit: int) -> np.ndarray:
+        """Rows sharing a term with the query, best `limit` by unnormalized TF-IDF dot product."""
+        term_ids = self._term_ids.view
+        found, budget = [], TERM_POSTINGS_MAX
+        # rarest terms first; very common ones are skipped once the budget is spent
+        terms = q_ids[np.argsort(self._df[q_ids], kind='stable')]
+        # same dtype on both sides, or searchsorted converts the whole postings array
+        los = np.searchsorted(self._posting_terms, terms, side='left')
+        his = np.searchsorted(self._posting_terms, terms, side='right')
+        for lo, hi in zip(los.tolist(), his.tolist()):
+            if hi - lo > budget and found:
+                continue
+            found.append(self._posting_pos[lo:hi])
+            budget -= hi - lo
+        base = len(self._posting_terms)
+        if term_ids.size > base:
+            found.append(np.nonzero(np.isin(term_ids[base:], q_ids))[0] + base)
+        hits = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        if not len(hits):
+            return np.zeros(0, dtype=np.int64)
+        rows = np.searchsorted(self._indptr.view, hits, side='right') - 1
+        ids = term_ids[hits]
+        partial = self._term_tf.view[hits] * self._idf(ids) * q_weights[np.searchsorted(q_ids, ids)]
+        rows, owner = np.unique(rows, return_inverse=True)
+        dots = np.bincount(owner.reshape(-1), weights=partial)
+        dots[~self._alive.view[rows]] = 0.0
+        keep = np.argsort(-dots, kind='stable')[:limit]
+        return np.sort(rows[keep[dots[keep] > 0]])
+
+    def _filter(self, rows: np.ndarray, clause_type: Optional[str], exclude_document: Optional[str]) -> np.ndarray:
+        if clause_type is not None:
+            code = self._types.index(clause_type) if clause_type in self._types else -1
+            rows = rows[self._type_codes.view[rows] == code]
+        # never return another organization's clauses, whatever ended up in this index
+        org = self.organization_code
+        rows = np.array([r for r in rows.tolist()
+                         if self.entries[r].organization_code == org and self.entries[r].document_id != exclude_document],
+                        dtype=np.int64)
+        return rows
+
+    def similar(self, text: str, clause_type: Optional[str] = None, top_k: int = 10,
+                min_score: float = 0.0, exclude_document: Optional[str] = None) -> List[ClauseMatch]:
+        """
+        Indexed clauses most similar to `text`, best first. Near-duplicates
+        come from the LSH tables; when those give fewer than top_k (a
+        paraphrased or very short query), clauses sharing its rarest terms
+        are added before re-scoring.
+        """
+        tokens = _tokens(text)
+        if not tokens:
+            return []
+        sig = minhash_signature(shingle_hashes(tokens))
+        q_ids, q_tf = term_vector(tokens)
+        with self._lock:
+            q_weights = q_tf * self._idf(q_ids)
+            q_norm = np.sqrt((q_weights * q_weights).sum())
+            if q_norm > 0:
+                q_weights = q_weights / q_norm
+            rows = self._filter(self._candidates(band_keys(sig)[0]), clause_type, exclude_document)
+            if len(rows) < top_k and q_norm > 0:
+                extra = self._filter(self._term_candidates(q_ids, q_weights, TERM_CANDIDATES),
+                                     clause_type, exclude_document)
+                rows = np.union1d(rows, extra).astype(np.int64)
+            if not len(rows):
+                return []
+            scores = self._cosine(rows, q_ids, q_weights) if q_norm > 0 else np.zeros(len(rows))
+            jaccard = (self._signatures.view[rows] == sig[None, :]).mean(axis=1)
+            order = np.lexsort((-jaccard, -scores))[:top_k]
+            return [ClauseMatch(self.entries[rows[i]], float(scores[i]), float(jaccard[i]))
+                    for i in order.tolist() if scores[i] >= min_score]
+
+    @property
+    def clause_types(self) -> List[str]:
+        return list(self._types)
+
+    # ---------- persistence ----------
+    def compact(self) -> None:
+        """Drop removed clauses and renumber rows (done before saving)."""
+        with self._lock:
+            alive = self._alive.view
+            if alive.all():
+                return
+            keep = np.nonzero(alive)[0]
+            remap = np.full(len(alive), -1, dtype=np.int64)
+            remap[keep] = np.arange(len(keep))
+            positions, lengths = _csr_positions(self._indptr.view, keep)
+            entries = [self.entries[r] for r in keep.tolist()]
+            self._type_codes = _Rows(0, np.int16, self._type_codes.view[keep].copy())
+            self._signatures = _Rows(NUM_PERM, np.uint32, self._signatures.view[keep].copy())
+            self._bands = _Rows(LSH_BANDS, np.uint64, self._bands.view[keep].copy())
+            self._term_ids = _Rows(0, np.uint32, self._term_ids.view[positions].copy())
+            self._term_tf = _Rows(0, np.float32, self._term_tf.view[positions].copy())
+            self._indptr = _Rows(0, np.int64, np.concatenate(([0], np.cumsum(lengths))).astype(np.int64))
+            self._alive = _Rows(0, bool, np.ones(len(keep), dtype=bool))
+            self.entries = entries
+            for doc in self.documents.values():
+                doc['rows'] = [int(remap[r]) for r in doc['rows']]
+            self._rebuild_tables()
+
+    def _journal(self, record: Dict[str, Any]) -> None:
+        if not self.persist:
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "journal.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Could not append to clause index journal: {e}")
+            return
+        self._journal_ops += 1
+        if self._journal_ops > max(JOURNAL_MAX_OPS, len(self.documents) // 4):
+            self.save()
+
+    def save(self) -> None:
+        """Write a compacted snapshot and empty the journal."""
+        if not self.persist:
+            return
+        with self._lock:
+            self.compact()
+            meta = {
+                'num_perm': NUM_PERM, 'bands': LSH_BANDS, 'term_features': TERM_FEATURES,
+                'types': self._types, 'documents': self.documents,
+                'entries': [asdict(e) for e in self.entries],
+            }
+            arrays = {
+                'type_codes': self._type_codes.view, 'signatures': self._signatures.view,
+                'term_ids': self._term_ids.view, 'term_tf': self._term_tf.view, 'indptr': self._indptr.view,
+            }
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tag = f"{os.getpid()}.tmp"
+                np.savez(self.root / f"arrays.{tag}.npz", **arrays)
+                (self.root / f"meta.{tag}.json").write_text(json.dumps(meta, ensure_ascii=False))
+                os.replace(self.root / f"arrays.{tag}.npz", self.root / "arrays.npz")
+                os.replace(self.root / f"meta.{tag}.json", self.root / "meta.json")
+                # replaying the journal over this snapshot would be a no-op
+                (self.root / "journal.jsonl").unlink(missing_ok=True)
+                self._journal_ops = 0
+            except Exception as e:
+                logger.warning(f"Could not write clause index: {e}")
+
+    def _load(self) -> None:
+        self._load_snapshot()
+        try:
+            lines = (self.root / "journal.jsonl").read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable clause index journal: {e}")
+            return
+        for line in lines:
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue        # a line cut short by a crash
+            self._journal_ops += 1
+
+    def _load_snapshot(self) -> None:
+        try:
+            meta = json.loads((self.root / "meta.json").read_text())
+            arrays = np.load(self.root / "arrays.npz")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable clause index {self.root}: {e}")
+            return
+        if (meta.get('num_perm'), meta.get('bands'), meta.get('term_features')) != (NUM_PERM, LSH_BANDS, TERM_FEATURES):
+            logger.info("Clause index was built with other parameters; starting empty")
+            return
+        n = len(meta['entries'])
+        if len(arrays['signatures']) != n:
+            logger.warning("Clause index arrays and metadata disagree; starting empty")
+            return
+        self.entries = [ClauseEntry(**e) for e in meta['entries']]
+        self.documents = meta['documents']
+        self._types = meta['types']
+        self._type_codes = _Rows(0, np.int16, arrays['type_codes'])
+        self._alive = _Rows(0, bool, np.ones(n, dtype=bool))
+        self._signatures = _Rows(NUM_PERM, np.uint32, arrays['signatures'])
+        self._bands = _Rows(LSH_BANDS, np.uint64, band_keys(arrays['signatures']))
+        self._term_ids = _Rows(0, np.uint32, arrays['term_ids'])
+        self._term_tf = _Rows(0, np.float32, arrays['term_tf'])
+        self._indptr = _Rows(0, np.int64, arrays['indptr'])
+        np.add.at(self._df, self._term_ids.view, 1)
+        self._live = n
+        self._rebuild_tables()
+
+# ---------- shared index ----------
+_shared_indexes: Dict[str, ClauseIndex] = {}
+_shared_lock = threading.Lock()
+
+def get_clause_index(organization_code: Optional[str] = None) -> ClauseIndex:
+    """The clause index of one organization (each has its own root under CLAUSE_INDEX_DIR)."""
+    org = organization_key(organization_code)
+    with _shared_lock:
+        index = _shared_indexes.get(org)
+        if index is None:
+            index = _shared_indexes[org] = ClauseIndex(organization_code=org)
+        return index
+
+# ---------- batch worker (runs inside sync's pool) ----------
+_worker_system: Optional[AIAnalysisSystem] = None
+
+def _key_clauses_job(text: str) -> List[Dict[str, Any]]:
+    global _worker_system
+    if _worker_system is None:
+        _worker_system = AIAnalysisSystem()
+    return _worker_system.analyze_fields(text, ['key_clauses'])['key_clauses']
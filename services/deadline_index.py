@@ -0,0 +1,186 @@
+# services/deadline_index.py
+"""
+Firm-wide index of open matter deadlines and tasks, ordered by due date.
+
+Matter.pending_deadlines, overdue_deadlines and overdue_tasks rescan one
+matter's lists on every access, so "who has anything overdue" costs a pass
+over every deadline and task of every matter. DeadlineIndex keeps one
+sorted (due_date, matter_id, item_id) list per kind ('deadline', 'task')
+holding only open items. It answers "due in the next N days" and "all
+overdue" with bisect, so a query costs the number of items in range.
+
+An index covers one set of matters: session_deadline_index() keeps one
+per Streamlit session, built with DeadlineIndex(matters) from
+session_state["matters"]. On each call it re-indexes only the matters
+whose signature (last_modified and the number of deadlines and tasks)
+changed and drops matters no longer in the list, so the Matter methods,
+which bump last_modified, are picked up without hooks in the model. An
+item edited directly without touching last_modified (a due date moved
+in place) needs update_matter().
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Tuple
+
+SESSION_KEY = "deadline_index"
+KINDS = ('deadline', 'task')
+CLOSED_TASK_STATUSES = ('completed', 'cancelled')
+
+Entry = Tuple[datetime, str, str]          # (due_date, matter_id, item_id)
+
+def _signature(matter) -> Tuple:
+    return (getattr(matter, 'last_modified', None), len(getattr(matter, 'deadlines', None) or ()),
+            len(getattr(matter, 'tasks', None) or ()))
+
+def _is_open(kind: str, item) -> bool:
+    if kind == 'deadline':
+        return not item.is_completed
+    return item.due_date is not None and item.status not in CLOSED_TASK_STATUSES
+
+class DeadlineIndex:
+    """Open deadlines and tasks of many matters, sorted by due date; thread-safe."""
+
+    def __init__(self, matters: Iterable = ()):
+        self._entries: Dict[str, List[Entry]] = {kind: [] for kind in KINDS}
+        self._keys: Dict[str, Tuple[str, Entry]] = {}          # item id -> (kind, entry)
+        self._by_matter: Dict[str, set] = {}                   # matter id -> item ids
+        self._signatures: Dict[str, Tuple] = {}                # matter id -> _signature() when indexed
+        self._lock = threading.RLock()
+        for matter in matters:
+            self.add_matter(matter)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ---------- maintenance ----------
+    def add_item(self, matter_id: str, kind: str, item) -> None:
+        """Index one deadline or task (or drop it, if it is no longer open)."""
+        with self._lock:
+            self.remove_item(item.id)
+            if not _is_open(kind, item):
+                return
+            entry = (item.due_date, matter_id, item.id)
+            bisect.insort(self._entries[kind], entry)
+            self._keys[item.id] = (kind, entry)
+            self._by_matter.setdefault(matter_id, set()).add(item.id)
+
+    def remove_item(self, item_id: str) -> bool:
+        with self._lock:
+            found = self._keys.pop(item_id, None)
+            if found is None:
+                return False
+            kind, entry = found
+            arr = self._entries[kind]
+            i = bisect.bisect_left(arr, entry)
+            if i < len(arr) and arr[i] == entry:
+                del arr[i]
+            ids = self._by_matter.get(entry[1])
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._by_matter[entry[1]]
+            return True
+
+    def add_matter(self, matter) -> None:
+        """(Re-)index every deadline and task of a matter."""
+        with self._lock:
+            self.remove_matter(matter.id)
+            for deadline in getattr(matter, 'deadlines', None) or ():
+                self.add_item(matter.id, 'deadline', deadline)
+            for task in getattr(matter, 'tasks', None) or ():
+                self.add_item(matter.id, 'task', task)
+            self._signatures[matter.id] = _signature(matter)
+
+    update_matter = add_matter
+
+    def remove_matter(self, matter_id: str) -> None:
+        with self._lock:
+            self._signatures.pop(matter_id, None)
+            for item_id in list(self._by_matter.get(matter_id, ())):
+                self.remove_item(item_id)
+
+    def sync(self, matters: Iterable) -> int:
+        """Re-index matters whose signature changed and drop missing ones; returns how many changed."""
+        changed = 0
+        with self._lock:
+            seen = set()
+            for matter in matters:
+                seen.add(matter.id)
+                if self._signatures.get(matter.id) != _signature(matter):
+                    self.add_matter(matter)
+                    changed += 1
+            for matter_id in [m for m in self._signatures if m not in seen]:
+                self.remove_matter(matter_id)
+                changed += 1
+        return changed
+
+    # ---------- queries ----------
+    def _kinds(self, kind: Optional[str]) -> Tuple[str, ...]:
+        if kind is None:
+            return KINDS
+        if kind not in KINDS:
+            raise ValueError(f"Unknown item kind: {kind}")
+        return (kind,)
+
+    def items_between(self, start: Optional[datetime], end: Optional[datetime],
+                      kind: Optional[str] = None, inclusive_end: bool = True) -> List[Tuple[str, Entry]]:
+        """(kind, (due_date, matter_id, item_id)) of open items due in [start, end], by due date."""
+        out: List[Tuple[str, Entry]] = []
+        with self._lock:
+            for k in self._kinds(kind):
+                arr = self._entries[k]
+                # (date, '') sorts before every entry on that date; (date, '\uffff') after
+                lo = 0 if start is None else bisect.bisect_left(arr, (start, ''))
+                if end is None:
+                    hi = len(arr)
+                elif inclusive_end:
+                    hi = bisect.bisect_right(arr, (end, '\uffff'))
+                else:
+                    hi = bisect.bisect_left(arr, (end, ''))
+                out.extend((k, entry) for entry in arr[lo:hi])
+        if kind is None:
+            out.sort(key=lambda item: item[1])
+        return out
+
+    def matters_between(self, start: Optional[datetime], end: Optional[datetime],
+                        kind: Optional[str] = None, inclusive_end: bool = True) -> List[str]:
+        """Ids of matters with an open item due in [start, end], soonest due first."""
+        items = self.items_between(start, end, kind, inclusive_end)
+        return list(dict.fromkeys(matter_id for _, (_, matter_id, _) in items))
+
+    def upcoming(self, days: int = 7, kind: Optional[str] = None,
+                 now: Optional[datetime] = None) -> List[str]:
+        """Matters with something due in the next `days` days (Matter.upcoming_deadlines)."""
+        now = now or datetime.now()
+        return self.matters_between(now, now + timedelta(days=days), kind)
+
+    def overdue(self, kind: Optional[str] = None, now: Optional[datetime] = None) -> List[str]:
+        """Matters with something open and past due, most overdue first."""
+        return self.matters_between(None, now or datetime.now(), kind, inclusive_end=False)
+
+    def next_due(self, kind: Optional[str] = None,
+                 now: Optional[datetime] = None) -> Optional[Tuple[str, Entry]]:
+        """The earliest open item not yet due, if any."""
+        now = now or datetime.now()
+        best = None
+        with self._lock:
+            for k in self._kinds(kind):
+                arr = self._entries[k]
+                i = bisect.bisect_left(arr, (now, ''))
+                if i < len(arr) and (best is None or arr[i] < best[1]):
+                    best = (k, arr[i])
+        return best
+
+# ---------- session index ----------
+def session_deadline_index(session_state: MutableMapping[str, Any], key: str = "matters") -> DeadlineIndex:
+    """The DeadlineIndex of session_state[key], synced with the list on every call."""
+    matters = session_state.get(key) or []
+    index = session_state.get(SESSION_KEY)
+    if index is None:
+        index = session_state[SESSION_KEY] = DeadlineIndex(matters)
+    else:
+        index.sync(matters)
+    return index
@@ -0,0 +1,294 @@
+# services/document_index.py
+"""
+Secondary indexes over a document library for DocumentManager.filter_documents.
+
+DocumentIndex keeps, per document id:
+
+- hash indexes (value -> set of ids) for the equality criteria: matter,
+  client, status, type, security level, creator, last modifier, tags and
+  the two boolean flags
+- sorted (value, id) arrays for created date, last modified date and file
+  size, answered with bisect
+- a services.text_index.TextIndex for text_query (names, tags, text), so
+  text search is one more costed step instead of a scan
+- a parent id -> child ids map, which with the matter, client and tag
+  maps forms the related-document graph behind related()
+
+A query is planned before it runs. Every criterion is costed by how many
+ids it would produce (set sizes, bisect distances), the cheapest one
+seeds the candidate set, and the rest are applied in cost order: as set
+intersections while their id sets are comparable in size to the
+candidates, and as per-document checks of the remaining candidates once
+they are much larger. A query therefore costs about the size of its most
+selective criterion, not the size of the library.
+
+The index must be told about changes: add() on upload, update() after a
+document's indexed fields change, remove() on delete.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.text_index import TextIndex
+
+HASH_FIELDS = {
+    # criteria attribute -> document attribute
+    'matter_ids': 'matter_id',
+    'client_names': 'client_name',
+    'statuses': 'status',
+    'document_types': 'document_type',
+    'security_levels': 'security_level',
+}
+SCALAR_FIELDS = {
+    'created_by': 'created_by',
+    'modified_by': 'modified_by',
+    'is_privileged': 'is_privileged',
+    'has_annotations': 'has_annotations',
+}
+RANGE_FIELDS = {
+    # document attribute -> (criteria lower bound, criteria upper bound)
+    'created_date': ('created_after', 'created_before'),
+    'last_modified': ('modified_after', 'modified_before'),
+    'file_size': ('min_file_size', 'max_file_size'),
+}
+RELATION_FIELDS = ('parent_document_id',)
+# documents sharing at least this many tags are related
+RELATED_MIN_SHARED_TAGS = 2
+# a criterion whose id set is this many times larger than the candidates is
+# checked per candidate instead of intersected
+PROBE_RATIO = 4
+
+def _indexed_values(doc) -> Dict[str, Any]:
+    values = {'id': doc.id}
+    values.update({attr: getattr(doc, attr) for attr in HASH_FIELDS.values()})
+    values.update({
+        'created_by': doc.created_by,
+        'modified_by': doc.modified_by,
+        'is_privileged': bool(doc.is_privileged),
+        'has_annotations': doc.has_annotations,
+        'tags': tuple(doc.tags),
+        'parent_document_id': doc.parent_document_id,
+    })
+    values.update({attr: getattr(doc, attr) for attr in RANGE_FIELDS})
+    return values
+
+@dataclass
+class PlanStep:
+    criterion: str
+    estimate: int             # ids this criterion matches on its own
+    ids: Callable[[], Set[str]]
+    check: Callable[[Dict[str, Any]], bool]
+
+class DocumentIndex:
+    """Maintained hash and range indexes over documents, keyed by document id."""
+
+    def __init__(self, documents: Iterable[Any] = (), full_text: bool = True):
+        self.text: Optional[TextIndex] = TextIndex() if full_text else None
+        self._docs: Dict[str, Any] = {}
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._order: Dict[str, int] = {}
+        self._seq = 0
+        self._hash: Dict[str, Dict[Any, Set[str]]] = {
+            attr: {} for attr in (list(HASH_FIELDS.values()) + list(SCALAR_FIELDS.values())
+                                  + ['tags'] + list(RELATION_FIELDS))
+        }
+        self._ranges: Dict[str, List[Tuple[Any, str]]] = {attr: [] for attr in RANGE_FIELDS}
+        self._lock = threading.RLock()
+        self._bulk = True
+        for doc in documents:
+            self.add(doc)
+        self._bulk = False
+        for arr in self._ranges.values():
+            arr.sort()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._docs
+
+    # ---------- maintenance ----------
+    def add(self, doc) -> None:
+        """Index a document (re-indexes it if the id is already present)."""
+        with self._lock:
+            if doc.id in self._docs:
+                self._unindex(doc.id)
+            else:
+                self._order[doc.id] = self._seq
+                self._seq += 1
+            values = _indexed_values(doc)
+            if self.text is not None:
+                self.text.add(doc)
+            self._docs[doc.id] = doc
+            self._values[doc.id] = values
+            for attr, index in self._hash.items():
+                keys = values[attr] if attr == 'tags' else (values[attr],)
+                for key in keys:
+                    index.setdefault(key, set()).add(doc.id)
+            for attr, arr in self._ranges.items():
+                if values[attr] is None:
+                    continue
+                if self._bulk:
+                    arr.append((values[attr], doc.id))     # sorted once at the end
+                else:
+                    bisect.insort(arr, (values[attr], doc.id))
+
+    update = add
+
+    def remove(self, document_id: str) -> bool:
+        with self._lock:
+            if document_id not in self._docs:
+                return False
+            self._unindex(document_id)
+            if self.text is not None:
+                self.text.remove(document_id)
+            del self._docs[document_id]
+            del self._order[document_id]
+            return True
+
+    def _unindex(self, document_id: str) -> None:
+        values = self._values.pop(document_id)
+        for attr, index in self._hash.items():
+            keys = values[attr] if attr == 'tags' else (values[attr],)
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(document_id)
+                    if not ids:
+                        del index[key]
+        for attr, arr in self._ranges.items():
+            if values[attr] is not None:
+                i = bisect.bisect_left(arr, (values[attr], document_id))
+                if i < len(arr) and arr[i] == (values[attr], document_id):
+                    del arr[i]
+
+    # ---------- planning ----------
+    def _hash_step(self, name: str, attr: str, wanted: Iterable[Any]) -> PlanStep:
+        index = self._hash[attr]
+        wanted = set(wanted)
+        buckets = [index[v] for v in wanted if v in index]
+
+        def ids() -> Set[str]:
+            return set().union(*buckets) if len(buckets) != 1 else set(buckets[0])
+
+        if attr == 'tags':
+            check = lambda values: any(t in wanted for t in values['tags'])
+        else:
+            check = lambda values: values[attr] in wanted
+        return PlanStep(name, sum(len(b) for b in buckets), ids, check)
+
+    def _range_step(self, attr: str, low: Any, high: Any) -> PlanStep:
+        arr = self._ranges[attr]
+        # (value, '') sorts before every id with that value; (value, '\uffff') after
+        lo = 0 if low is None else bisect.bisect_left(arr, (low, ''))
+        hi = len(arr) if high is None else bisect.bisect_right(arr, (high, '\uffff'))
+        hi = max(lo, hi)
+
+        def check(values: Dict[str, Any]) -> bool:
+            v = values[attr]
+            return v is not None and (low is None or v >= low) and (high is None or v <= high)
+
+        return PlanStep(attr, hi - lo, lambda: {doc_id for _, doc_id in arr[lo:hi]}, check)
+
+    def plan(self, criteria) -> List[PlanStep]:
+        """Index-backed steps for `criteria`, most selective first."""
+        steps = []
+        for name, attr in HASH_FIELDS.items():
+            wanted = getattr(criteria, name)
+            if wanted:
+                steps.append(self._hash_step(name, attr, wanted))
+        if criteria.tags:
+            steps.append(self._hash_step('tags', 'tags', criteria.tags))
+        for name, attr in SCALAR_FIELDS.items():
+            wanted = getattr(criteria, name)
+            if wanted is not None and (wanted or isinstance(wanted, bool)):
+                steps.append(self._hash_step(name, attr, [wanted]))
+        for attr, (low_name, high_name) in RANGE_FIELDS.items():
+            low, high = getattr(criteria, low_name), getattr(criteria, high_name)
+            if low is not None or high is not None:
+                steps.append(self._range_step(attr, low, high))
+        if criteria.text_query and self.text is not None:
+            matched = self.text.ids(criteria.text_query)
+            steps.append(PlanStep('text_query', len(matched), lambda: set(matched),
+                                  lambda values: values['id'] in matched))
+        steps.sort(key=lambda s: s.estimate)
+        return steps
+
+    # ---------- querying ----------
+    def filter_ids(self, criteria, text_match: Optional[Callable[[Any], bool]] = None) -> List[str]:
+        """
+        Ids of the documents matching `criteria`, in the order they were
+        indexed. text_query is answered by the text index (token and prefix
+        matching); without one, callers pass a `text_match` predicate.
+        """
+        if self.text is not None:
+            text_match = None
+        with self._lock:
+            steps = self.plan(criteria)
+            if steps:
+                candidates = steps[0].ids()
+                for step in steps[1:]:
+                    if not candidates:
+                        break
+                    if step.estimate <= PROBE_RATIO * len(candidates):
+                        candidates &= step.ids()
+                    else:
+                        candidates = {d for d in candidates if step.check(self._values[d])}
+            elif text_match is None:
+                return list(self._docs)              # insertion order already
+            else:
+                candidates = set(self._docs)
+            if text_match is not None:
+                candidates = {d for d in candidates if text_match(self._docs[d])}
+            return sorted(candidates, key=self._order.__getitem__)
+
+    def filter(self, criteria, text_match: Optional[Callable[[Any], bool]] = None) -> List[Any]:
+        docs = self._docs
+        return [docs[d] for d in self.filter_ids(criteria, text_match)]
+
+    # ---------- related documents ----------
+    def related_ids(self, document_id: str, ranked: bool = False) -> List[Tuple[str, int]]:
+        """
+        (id, shared attributes) of the documents related to `document_id`:
+        same matter, same client, RELATED_MIN_SHARED_TAGS or more shared
+        tags, or a parent/child link. Each shared matter, client, tag and
+        link counts one. Only the document's own buckets are read, so this
+        costs its degree, not the library size. Index order, or best first
+        with ranked=True.
+        """
+        with self._lock:
+            values = self._values.get(document_id)
+            if values is None:
+                return []
+            hashes = self._hash
+            shared: Dict[str, int] = {}
+            tag_hits: Dict[str, int] = {}
+            for tag in set(values['tags']):
+                for other in hashes['tags'].get(tag, ()):
+                    tag_hits[other] = tag_hits.get(other, 0) + 1
+            for other, hits in tag_hits.items():
+                if hits >= RELATED_MIN_SHARED_TAGS:
+                    shared[other] = hits
+            links = list(hashes['parent_document_id'].get(document_id, ()))
+            parent = values['parent_document_id']
+            if parent in self._docs:
+                links.append(parent)
+            buckets = (hashes['matter_id'].get(values['matter_id'], ()),
+                       hashes['client_name'].get(values['client_name'], ()), links)
+            for bucket in buckets:
+                for other in bucket:
+                    shared[other] = shared.get(other, 0) + 1
+            shared.pop(document_id, None)
+            order = self._order
+            if ranked:
+                return sorted(shared.items(), key=lambda item: (-item[1], order[item[0]]))
+            return sorted(shared.items(), key=lambda item: order[item[0]])
+
+    def related(self, document_id: str, ranked: bool = False, limit: Optional[int] = None) -> List[Any]:
+        pairs = self.related_ids(document_id, ranked)
+        if limit is not None:
+            pairs = pairs[:limit]
+        return [self._docs[d] for d, _ in pairs]
@@ -0,0 +1,108 @@
+# services/document_library.py
+"""
+Adding documents to and removing them from a session's document library.
+
+The library itself is session state (session_state["documents"]: the
+Documents page's dicts or models.document.Document objects), but the
+organization-wide stores built from it (services.risk_register,
+services.clause_index) are shared by every session of the organization
+and persisted, keyed by document id. So:
+
+- ids must be unique across sessions and restarts: use new_document_id(),
+  never a position in one session's list
+- the stores are those of the session's organization
+  (session_organization(): user_data['organization_code'])
+- pages never scan those stores with full_corpus=True from one session's
+  list; they add and rescan incrementally, and a delete goes through
+  remove_document() so the document's records are dropped explicitly
+- add_document() scores the new document's risks and indexes its clauses
+  right away, so pages only read the stores and never rescan the library
+
+add_document(), update_document() and remove_document() also keep the
+session's search index (services.text_index) current: pages that rename
+a document, change its tags or replace its text call update_document().
+replace_library() swaps the whole list (seeding, clearing) and leaves the
+organization's stores alone.
+"""
+from __future__ import annotations
+
+import uuid
+import logging
+from typing import Any, MutableMapping, Optional
+
+from services.clause_index import get_clause_index
+from services.risk_register import as_corpus_entries, get_risk_register, organization_key
+from services.text_index import rebind_session_text_index, session_text_index
+
+logger = logging.getLogger(__name__)
+
+def new_document_id() -> str:
+    return str(uuid.uuid4())
+
+def session_organization(session_state: MutableMapping[str, Any]) -> str:
+    """Normalized organization code of the signed-in user (the default organization if none)."""
+    user = session_state.get("user_data") or {}
+    return organization_key(user.get("organization_code"))
+
+def document_id(doc: Any) -> Optional[str]:
+    doc_id = doc.get('id') if isinstance(doc, dict) else getattr(doc, 'id', None)
+    return None if doc_id is None else str(doc_id)
+
+def add_document(session_state: MutableMapping[str, Any], doc: Any, key: str = "documents") -> None:
+    """Append a document to the session library, score its risks and index its clauses."""
+    if document_id(doc) is None:
+        raise ValueError("Library documents need an id (see new_document_id())")
+    session_state.setdefault(key, [])
+    text_index = session_text_index(session_state, key)
+    session_state[key].append(doc)
+    text_index.add(doc)
+    org = session_organization(session_state)
+    for doc_id, name, text in as_corpus_entries([doc]):
+        try:
+            # one document: scored inline, no process pool
+            get_risk_register(org).scan([(doc_id, name, text)], workers=1)
+        except Exception as e:
+            logger.warning(f"Could not score risks of document {doc_id}: {e}")
+        try:
+            get_clause_index(org).add_document(doc_id, text, name)
+        except Exception as e:
+            logger.warning(f"Could not index clauses of document {doc_id}: {e}")
+
+def update_document(session_state: MutableMapping[str, Any], doc: Any, key: str = "documents") -> None:
+    """Re-index a library document edited in place (name, tags, text)."""
+    session_text_index(session_state, key).update(doc)
+    org = session_organization(session_state)
+    for doc_id, name, text in as_corpus_entries([doc]):
+        # both skip the document when its text hash is unchanged
+        try:
+            get_risk_register(org).scan([(doc_id, name, text)], workers=1)
+        except Exception as e:
+            logger.warning(f"Could not score risks of document {doc_id}: {e}")
+        try:
+            get_clause_index(org).sync([(doc_id, name, text)], workers=1)
+        except Exception as e:
+            logger.warning(f"Could not index clauses of document {doc_id}: {e}")
+
+def replace_library(session_state: MutableMapping[str, Any], documents: list, key: str = "documents") -> None:
+    """Replace the session's whole document list; its search index is rebuilt on next use."""
+    session_state[key] = documents
+
+def remove_document(session_state: MutableMapping[str, Any], doc_id: Any, key: str = "documents") -> bool:
+    """Drop a document from the session library and its records from the firm-wide stores."""
+    doc_id = str(doc_id)
+    documents = session_state.get(key) or []
+    text_index = session_text_index(session_state, key)
+    kept = [d for d in documents if document_id(d) != doc_id]
+    session_state[key] = kept
+    text_index.remove(doc_id)
+    rebind_session_text_index(session_state, key)
+    org = session_organization(session_state)
+    try:
+        get_risk_register(org).discard(doc_id)
+    except Exception as e:
+        logger.warning(f"Could not drop risk record of document {doc_id}: {e}")
+    try:
+        get_clause_index(org).remove_document(doc_id)
+    except Exception as e:
+        logger.warning(f"Could not drop clauses of document {doc_id}: {e}")
+    return len(kept) != len(documents)
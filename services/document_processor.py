@@ -1,9 +1,116 @@
 import re
-import hashlib
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Iterable, List, Tuple, Optional, Any, Callable, Iterator, Union
 from datetime import datetime
 import json
 
+from services.analysis_cache import MISSING, get_analysis_cache, text_sha256
+from services.batch_runner import BatchResult, ProgressFn, run_batch
+from services.extraction_engine import PATTERN_GROUPS, DocumentScan, get_extraction_engine
+from services.windowed_analysis import (
+    OVERLAP_CHARS, WINDOW_CHARS, DocumentDigest, KeywordPresence, RunningSummary,
+    iter_windows, scan_windows,
+)
+from services.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+# ---------- keyword vocabularies (counted by services.keyword_matcher) ----------
+# classify_document: first rule whose filename words or keyword hits match wins
+CLASSIFICATION_RULES = [
+    # (document type, vocabulary, filename words, minimum keyword hits)
+    ('Contract/Agreement', 'classify:contract', ['contract', 'agreement'], 2),
+    ('Court Filing', 'classify:court', ['motion', 'complaint', 'petition', 'brief'], 3),
+    ('Corporate Document', 'classify:corporate', ['bylaws', 'incorporation', 'corporate'], 2),
+    ('Real Estate', 'classify:real_estate', ['lease', 'deed', 'mortgage'], 3),
+    ('Family Law', 'classify:family', ['divorce', 'custody', 'prenup'], 2),
+    ('Employment Law', 'classify:employment', ['employment', 'employee', 'job'], 3),
+    ('Intellectual Property', 'classify:ip', ['patent', 'trademark', 'copyright'], 2),
+    ('Invoice/Billing', 'classify:billing', ['invoice', 'bill'], 3),
+    ('Correspondence', 'classify:correspondence', ['letter', 'memo', 'correspondence'], 2),
+]
+
+KEYWORD_VOCABULARIES = {
+    'classify:contract': [
+        'contract', 'agreement', 'terms and conditions', 'hereby agree',
+        'parties agree', 'consideration', 'obligations', 'covenants'
+    ],
+    'classify:court': [
+        'motion', 'complaint', 'petition', 'brief', 'order', 'judgment', 'court',
+        'honorable', 'civil action', 'case no', 'docket', 'plaintiff', 'defendant',
+        'respondent', 'petitioner'
+    ],
+    'classify:corporate': [
+        'llc', 'corporation', 'incorporation', 'bylaws', 'board of directors',
+        'shareholders', 'articles of incorporation', 'operating agreement',
+        'board resolution', 'corporate', 'entity'
+    ],
+    'classify:real_estate': [
+        'lease', 'deed', 'mortgage', 'property', 'real estate', 'premises', 'landlord',
+        'tenant', 'rent', 'purchase agreement', 'title', 'escrow', 'closing',
+        'conveyance'
+    ],
+    'classify:family': [
+        'divorce', 'custody', 'prenuptial', 'marriage', 'child support', 'alimony',
+        'spousal support', 'parenting plan', 'dissolution', 'domestic relations',
+        'family court'
+    ],
+    'classify:employment': [
+        'employment', 'employee', 'employer', 'job', 'salary', 'wages', 'benefits',
+        'termination', 'resignation', 'workplace', 'hr', 'human resources',
+        'discrimination', 'harassment'
+    ],
+    'classify:ip': [
+        'patent', 'trademark', 'copyright', 'intellectual property', 'trade secret',
+        'licensing', 'infringement', 'royalty'
+    ],
+    'classify:billing': [
+        'invoice', 'bill', 'payment', 'due date', 'amount due', 'services rendered',
+        'billing', 'charges', 'fees'
+    ],
+    'classify:correspondence': [
+        'dear', 'sincerely', 'regards', 'letter', 'correspondence', 'memo',
+        'memorandum', 're:', 'subject:'
+    ],
+    'sentiment:positive': [
+        'agree', 'consent', 'approve', 'accept', 'beneficial', 'favorable',
+        'satisfactory', 'successful', 'resolved', 'settlement'
+    ],
+    'sentiment:negative': [
+        'dispute', 'breach', 'violation', 'default', 'reject', 'deny',
+        'fail', 'unable', 'refuse', 'terminate', 'cancel', 'void'
+    ],
+    'sentiment:neutral': [
+        'whereas', 'therefore', 'pursuant', 'herein', 'aforementioned',
+        'notwithstanding', 'stipulate', 'covenant'
+    ],
+    'language:english': ['the', 'and', 'agreement', 'contract', 'shall', 'party', 'rights'],
+    'language:spanish': ['el', 'la', 'y', 'contrato', 'acuerdo', 'parte', 'derechos'],
+    'language:french': ['le', 'la', 'et', 'contrat', 'accord', 'partie', 'droits'],
+}
+
+SENTIMENT_CATEGORIES = ['sentiment:positive', 'sentiment:negative', 'sentiment:neutral']
+CLASSIFY_SAMPLE_CHARS = 2000
+WINDOWED_MIN_BYTES = 8 << 20   # process_many analyzes larger uploads window by window
+LANGUAGE_SAMPLE_CHARS = 1000
+
+# ---------- cached analyzers (services.analysis_cache) ----------
+# Bump an analyzer's version whenever its output changes; only its own
+# cached results are invalidated.
+DOCUMENT_ANALYZER_VERSIONS = {
+    'key_information': 1,
+    'parties': 1,
+    'contract_terms': 1,
+    'deadlines': 1,
+    'sentiment_analysis': 1,
+    'language': 1,
+    'sensitive_info': 1,
+    'summary': 1,
+    'word_count': 1,
+}
+DOCUMENT_CACHE_PREFIX = 'document:'
+
+def _keyword_matcher() -> KeywordMatcher:
+    return get_keyword_matcher(KEYWORD_VOCABULARIES)
+
+
 class DocumentProcessor:
     
     def __init__(self):
@@ -32,190 +139,49 @@ class DocumentProcessor:
     @staticmethod
     def extract_key_information(text: str) -> Dict:
         """Extract key information from document text using advanced regex patterns."""
+        scan = get_extraction_engine().scan(text, groups=("key_information",))
+        return DocumentProcessor._key_information_from_scan(scan)
+
+    @staticmethod
+    def _key_information_from_scan(scan: DocumentScan) -> Dict:
         key_info = {}
-        
-        # Extract dates with multiple formats
-        date_patterns = [
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',  # MM/DD/YYYY, M/D/YY
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',  # Month DD, YYYY
-            r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b',  # DD Month YYYY
-            r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b'  # YYYY-MM-DD
-        ]
-        
-        dates = []
-        for pattern in date_patterns:
-            dates.extend(re.findall(pattern, text, re.IGNORECASE))
-        key_info['dates'] = list(set(dates))[:10]
-        
-        # Extract monetary amounts with various formats
-        money_patterns = [
-            r'\$[\d,]+(?:\.\d{2})?',  # $1,000.00
-            r'USD\s*[\d,]+(?:\.\d{2})?',  # USD 1000.00
-            r'[\d,]+\s*dollars?',  # 1000 dollars
-            r'[\d,]+\s*USD'  # 1000 USD
-        ]
-        
-        amounts = []
-        for pattern in money_patterns:
-            amounts.extend(re.findall(pattern, text, re.IGNORECASE))
-        key_info['monetary_amounts'] = list(set(amounts))[:10]
-        
-        # Extract email addresses
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        key_info['email_addresses'] = list(set(emails))
-        
-        # Extract phone numbers with various formats
-        phone_patterns = [
-            r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',  # 123-456-7890, 123.456.7890, 123 456 7890
-            r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}\b',  # (123) 456-7890
-            r'\+1[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b'  # +1-123-456-7890
-        ]
-        
-        phones = []
-        for pattern in phone_patterns:
-            phones.extend(re.findall(pattern, text))
-        key_info['phone_numbers'] = list(set(phones))
-        
-        # Extract addresses
-        address_pattern = r'\d+\s+[A-Za-z0-9\s,.-]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln|Court|Ct|Place|Pl)'
-        addresses = re.findall(address_pattern, text, re.IGNORECASE)
-        key_info['addresses'] = list(set(addresses))[:5]
-        
-        # Extract company names and entities
-        entity_patterns = [
-            r'[A-Za-z0-9\s&,.-]+\s+(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation|Limited)\b',
-            r'\b[A-Z][A-Za-z0-9\s&,.-]*\s+(?:Law\s+Firm|Associates|Legal\s+Services)\b'
-        ]
-        
-        entities = []
-        for pattern in entity_patterns:
-            entities.extend(re.findall(pattern, text, re.IGNORECASE))
-        key_info['entities'] = list(set(entities))[:10]
-        
-        # Extract case numbers and docket numbers
-        case_pattern = r'(?:Case\s+No\.?|Docket\s+No\.?|Civil\s+Action\s+No\.?)\s*:?\s*[\w\d-]+(?:\s*\([A-Z]{2,}\))?'
-        case_numbers = re.findall(case_pattern, text, re.IGNORECASE)
-        key_info['case_numbers'] = list(set(case_numbers))
-        
-        # Extract signatures (lines that look like signature blocks)
-        signature_pattern = r'(?:Signed|Signature|By:)\s*[^\n]*(?:\n\s*[A-Za-z\s,.-]+){1,3}'
-        signatures = re.findall(signature_pattern, text, re.IGNORECASE | re.MULTILINE)
-        key_info['signature_blocks'] = signatures[:5]
-        
+        key_info['dates'] = list(set(scan.values('date')))[:10]
+        key_info['monetary_amounts'] = list(set(scan.values('money')))[:10]
+        key_info['email_addresses'] = list(set(scan.values('email')))
+        key_info['phone_numbers'] = list(set(scan.values('phone')))
+        key_info['addresses'] = list(set(scan.values('address')))[:5]
+        key_info['entities'] = list(set(scan.values('entity')))[:10]
+        key_info['case_numbers'] = list(set(scan.values('case_number')))
+        key_info['signature_blocks'] = scan.values('signature')[:5]
         return key_info
     
     @staticmethod
-    def classify_document(filename: str, text: str) -> str:
+    def classify_document(filename: str, text: str, text_lower: Optional[str] = None) -> str:
         """Classify document type based on filename and content analysis."""
         filename_lower = filename.lower()
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         
         # Check first 2000 characters for classification (more comprehensive than original)
-        text_sample = text_lower[:2000]
-        
-        # Contract/Agreement classification
-        contract_keywords = [
-            'contract', 'agreement', 'terms and conditions', 'hereby agree',
-            'parties agree', 'consideration', 'obligations', 'covenants'
-        ]
-        if any(word in filename_lower for word in ['contract', 'agreement']) or \
-           sum(1 for word in contract_keywords if word in text_sample) >= 2:
-            return 'Contract/Agreement'
-        
-        # Court Filing classification
-        court_keywords = [
-            'motion', 'complaint', 'petition', 'brief', 'order', 'judgment',
-            'court', 'honorable', 'civil action', 'case no', 'docket',
-            'plaintiff', 'defendant', 'respondent', 'petitioner'
-        ]
-        if any(word in filename_lower for word in ['motion', 'complaint', 'petition', 'brief']) or \
-           sum(1 for word in court_keywords if word in text_sample) >= 3:
-            return 'Court Filing'
-        
-        # Corporate Document classification
-        corporate_keywords = [
-            'llc', 'corporation', 'incorporation', 'bylaws', 'board of directors',
-            'shareholders', 'articles of incorporation', 'operating agreement',
-            'board resolution', 'corporate', 'entity'
-        ]
-        if any(word in filename_lower for word in ['bylaws', 'incorporation', 'corporate']) or \
-           sum(1 for word in corporate_keywords if word in text_sample) >= 2:
-            return 'Corporate Document'
-        
-        # Real Estate classification
-        real_estate_keywords = [
-            'lease', 'deed', 'mortgage', 'property', 'real estate', 'premises',
-            'landlord', 'tenant', 'rent', 'purchase agreement', 'title',
-            'escrow', 'closing', 'conveyance'
-        ]
-        if any(word in filename_lower for word in ['lease', 'deed', 'mortgage']) or \
-           sum(1 for word in real_estate_keywords if word in text_sample) >= 3:
-            return 'Real Estate'
-        
-        # Family Law classification
-        family_keywords = [
-            'divorce', 'custody', 'prenuptial', 'marriage', 'child support',
-            'alimony', 'spousal support', 'parenting plan', 'dissolution',
-            'domestic relations', 'family court'
-        ]
-        if any(word in filename_lower for word in ['divorce', 'custody', 'prenup']) or \
-           sum(1 for word in family_keywords if word in text_sample) >= 2:
-            return 'Family Law'
+        text_sample = text_lower[:CLASSIFY_SAMPLE_CHARS]
+        counts = _keyword_matcher().count(text_sample, [vocab for _, vocab, _, _ in CLASSIFICATION_RULES],
+                                          presence=True)
         
-        # Employment Law classification
-        employment_keywords = [
-            'employment', 'employee', 'employer', 'job', 'salary', 'wages',
-            'benefits', 'termination', 'resignation', 'workplace', 'hr',
-            'human resources', 'discrimination', 'harassment'
-        ]
-        if any(word in filename_lower for word in ['employment', 'employee', 'job']) or \
-           sum(1 for word in employment_keywords if word in text_sample) >= 3:
-            return 'Employment Law'
-        
-        # Intellectual Property classification
-        ip_keywords = [
-            'patent', 'trademark', 'copyright', 'intellectual property',
-            'trade secret', 'licensing', 'infringement', 'royalty'
-        ]
-        if any(word in filename_lower for word in ['patent', 'trademark', 'copyright']) or \
-           sum(1 for word in ip_keywords if word in text_sample) >= 2:
-            return 'Intellectual Property'
-        
-        # Invoice/Billing classification
-        billing_keywords = [
-            'invoice', 'bill', 'payment', 'due date', 'amount due',
-            'services rendered', 'billing', 'charges', 'fees'
-        ]
-        if any(word in filename_lower for word in ['invoice', 'bill']) or \
-           sum(1 for word in billing_keywords if word in text_sample) >= 3:
-            return 'Invoice/Billing'
-        
-        # Correspondence classification
-        correspondence_keywords = [
-            'dear', 'sincerely', 'regards', 'letter', 'correspondence',
-            'memo', 'memorandum', 're:', 'subject:'
-        ]
-        if any(word in filename_lower for word in ['letter', 'memo', 'correspondence']) or \
-           sum(1 for word in correspondence_keywords if word in text_sample) >= 2:
-            return 'Correspondence'
+        for doc_type, vocab, filename_words, min_hits in CLASSIFICATION_RULES:
+            if any(word in filename_lower for word in filename_words) or counts.hits(vocab) >= min_hits:
+                return doc_type
         
         return 'General Document'
     
     def extract_parties(self, text: str) -> List[str]:
         """Extract party names from legal documents."""
+        return self._parties_from_scan(get_extraction_engine().scan(text, groups=("parties",)))
+
+    def _parties_from_scan(self, scan: DocumentScan) -> List[str]:
         parties = []
         
-        # Look for party identification patterns
-        party_patterns = [
-            r'(?:plaintiff|defendant|petitioner|respondent):\s*([A-Za-z\s,.-]+?)(?:\n|\.|,)',
-            r'between\s+([A-Za-z\s,.-]+?)\s+and\s+([A-Za-z\s,.-]+?)(?:\s|,|\.|$)',
-            r'(?:party|client):\s*([A-Za-z\s,.-]+?)(?:\n|\.|,)',
-            r'(?:^|\n)\s*([A-Z][A-Za-z\s&,.-]+(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation))\s*(?:\n|,|\.|$)'
-        ]
-        
-        for pattern in party_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
+        for spec in ("party.role", "party.between", "party.label", "party.entity_line"):
+            matches = scan.findall(spec)
             if isinstance(matches[0], tuple) if matches else False:
                 # Handle patterns that return tuples
                 for match in matches:
@@ -234,24 +200,17 @@ class DocumentProcessor:
     
     def calculate_document_hash(self, text: str) -> str:
         """Calculate SHA-256 hash of document content for duplicate detection."""
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return text_sha256(text)
     
-    def detect_language(self, text: str) -> str:
+    def detect_language(self, text: str, text_lower: Optional[str] = None) -> str:
         """Simple language detection based on common legal terms."""
         # Sample text for analysis (first 1000 characters)
-        sample = text.lower()[:1000]
-        
-        # English legal terms
-        english_terms = ['the', 'and', 'agreement', 'contract', 'shall', 'party', 'rights']
-        english_score = sum(1 for term in english_terms if term in sample)
-        
-        # Spanish legal terms
-        spanish_terms = ['el', 'la', 'y', 'contrato', 'acuerdo', 'parte', 'derechos']
-        spanish_score = sum(1 for term in spanish_terms if term in sample)
-        
-        # French legal terms
-        french_terms = ['le', 'la', 'et', 'contrat', 'accord', 'partie', 'droits']
-        french_score = sum(1 for term in french_terms if term in sample)
+        sample = (text_lower if text_lower is not None else text.lower())[:LANGUAGE_SAMPLE_CHARS]
+        counts = _keyword_matcher().count(sample, ['language:english', 'language:spanish', 'language:french'],
+                                          presence=True)
+        english_score = counts.hits('language:english')
+        spanish_score = counts.hits('language:spanish')
+        french_score = counts.hits('language:french')
         
         if spanish_score > english_score and spanish_score > french_score:
             return 'Spanish'
@@ -262,56 +221,30 @@ class DocumentProcessor:
     
     def extract_contract_terms(self, text: str) -> Dict[str, Any]:
         """Extract key contract terms and clauses."""
+        return self._contract_terms_from_scan(get_extraction_engine().scan(text, groups=("contract_terms",)))
+
+    def _contract_terms_from_scan(self, scan: DocumentScan) -> Dict[str, Any]:
         terms = {}
-        
-        # Extract effective dates
-        effective_pattern = r'effective\s+(?:date|as\s+of)\s*:?\s*([^.;\n]+)'
-        effective_dates = re.findall(effective_pattern, text, re.IGNORECASE)
-        terms['effective_dates'] = [date.strip() for date in effective_dates]
-        
-        # Extract termination clauses
-        termination_pattern = r'terminat[ei]\w*[^.]*\.(?:[^.]*\.)*'
-        termination_clauses = re.findall(termination_pattern, text, re.IGNORECASE)
-        terms['termination_clauses'] = termination_clauses[:3]
-        
-        # Extract governing law
-        law_pattern = r'governed\s+by\s+(?:the\s+)?laws?\s+of\s+([^.;\n]+)'
-        governing_law = re.findall(law_pattern, text, re.IGNORECASE)
-        terms['governing_law'] = [law.strip() for law in governing_law]
-        
-        # Extract payment terms
-        payment_pattern = r'payment[^.]*\$[\d,]+(?:\.\d{2})?[^.]*\.'
-        payment_terms = re.findall(payment_pattern, text, re.IGNORECASE)
-        terms['payment_terms'] = payment_terms[:5]
-        
+        terms['effective_dates'] = [date.strip() for date in scan.findall("term.effective_date")]
+        terms['termination_clauses'] = scan.findall("term.termination")[:3]
+        terms['governing_law'] = [law.strip() for law in scan.findall("term.governing_law")]
+        terms['payment_terms'] = scan.findall("term.payment")[:5]
         return terms
     
-    def analyze_document_sentiment(self, text: str) -> Dict[str, Any]:
+    def analyze_document_sentiment(self, text: str, text_lower: Optional[str] = None) -> Dict[str, Any]:
         """Basic sentiment analysis for legal documents."""
-        # Positive indicators
-        positive_words = [
-            'agree', 'consent', 'approve', 'accept', 'beneficial', 'favorable',
-            'satisfactory', 'successful', 'resolved', 'settlement'
-        ]
-        
-        # Negative indicators
-        negative_words = [
-            'dispute', 'breach', 'violation', 'default', 'reject', 'deny',
-            'fail', 'unable', 'refuse', 'terminate', 'cancel', 'void'
-        ]
-        
-        # Neutral/formal indicators
-        neutral_words = [
-            'whereas', 'therefore', 'pursuant', 'herein', 'aforementioned',
-            'notwithstanding', 'stipulate', 'covenant'
-        ]
-        
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        neutral_count = sum(1 for word in neutral_words if word in text_lower)
-        
+        if text_lower is None:
+            text_lower = text.lower()
+        
+        counts = _keyword_matcher().count(text_lower, SENTIMENT_CATEGORIES, presence=True)
+        return self._sentiment_from_hits(
+            counts.hits('sentiment:positive'),
+            counts.hits('sentiment:negative'),
+            counts.hits('sentiment:neutral'),
+        )
+
+    @staticmethod
+    def _sentiment_from_hits(positive_count: int, negative_count: int, neutral_count: int) -> Dict[str, Any]:
         total_indicators = positive_count + negative_count + neutral_count
         
         if total_indicators == 0:
@@ -338,20 +271,18 @@ class DocumentProcessor:
     
     def extract_deadlines_and_dates(self, text: str) -> List[Dict[str, Any]]:
         """Extract deadlines and important dates with context."""
+        return self._deadlines_from_scan(get_extraction_engine().scan(text, groups=("deadlines",)))
+
+    def _deadlines_from_scan(self, scan: DocumentScan) -> List[Dict[str, Any]]:
         deadlines = []
-        
-        # Deadline patterns with context
-        deadline_patterns = [
-            (r'(?:due|deadline|expires?|must\s+be\s+(?:filed|submitted|completed))\s+(?:by|on|before)\s*:?\s*([^.;\n]+)', 'deadline'),
-            (r'(?:effective|starting|commencing)\s+(?:date|on)\s*:?\s*([^.;\n]+)', 'effective_date'),
-            (r'(?:termination|expiration|end)\s+(?:date|on)\s*:?\s*([^.;\n]+)', 'termination_date'),
-            (r'(?:court\s+date|hearing|trial)\s*:?\s*([^.;\n]+)', 'court_date'),
-            (r'(?:payment\s+due|invoice\s+due)\s*:?\s*([^.;\n]+)', 'payment_due')
-        ]
-        
-        for pattern, date_type in deadline_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for spec, date_type in (
+            ("deadline.deadline", "deadline"),
+            ("deadline.effective_date", "effective_date"),
+            ("deadline.termination_date", "termination_date"),
+            ("deadline.court_date", "court_date"),
+            ("deadline.payment_due", "payment_due"),
+        ):
+            for match in scan.findall(spec):
                 deadlines.append({
                     'type': date_type,
                     'date_text': match.strip(),
@@ -362,33 +293,17 @@ class DocumentProcessor:
     
     def detect_sensitive_information(self, text: str) -> Dict[str, Any]:
         """Detect potentially sensitive information in documents."""
-        sensitive_info = {
-            'social_security_numbers': [],
-            'credit_card_numbers': [],
-            'bank_account_numbers': [],
+        return self._sensitive_info_from_scan(get_extraction_engine().scan(text, groups=("sensitive_info",)))
+
+    def _sensitive_info_from_scan(self, scan: DocumentScan) -> Dict[str, Any]:
+        return {
+            'social_security_numbers': scan.findall("sensitive.ssn"),
+            'credit_card_numbers': scan.findall("sensitive.credit_card"),
+            'bank_account_numbers': scan.findall("sensitive.bank_account")[:5],  # Limit false positives
             'driver_license_numbers': [],
             'passport_numbers': [],
-            'tax_id_numbers': []
+            'tax_id_numbers': scan.findall("sensitive.tax_id"),
         }
-        
-        # SSN pattern
-        ssn_pattern = r'\b\d{3}-\d{2}-\d{4}\b'
-        sensitive_info['social_security_numbers'] = re.findall(ssn_pattern, text)
-        
-        # Credit card pattern (basic)
-        cc_pattern = r'\b(?:\d{4}[-\s]?){3}\d{4}\b'
-        sensitive_info['credit_card_numbers'] = re.findall(cc_pattern, text)
-        
-        # Bank account pattern (basic)
-        bank_pattern = r'\b\d{8,17}\b'
-        potential_accounts = re.findall(bank_pattern, text)
-        sensitive_info['bank_account_numbers'] = potential_accounts[:5]  # Limit false positives
-        
-        # Tax ID pattern
-        tax_id_pattern = r'\b\d{2}-\d{7}\b'
-        sensitive_info['tax_id_numbers'] = re.findall(tax_id_pattern, text)
-        
-        return sensitive_info
     
     def generate_document_summary(self, text: str, max_length: int = 500) -> str:
         """Generate a summary of the document content."""
@@ -429,21 +344,199 @@ class DocumentProcessor:
         
         return '. '.join(summary_sentences) + '.' if summary_sentences else text[:max_length]
     
+    def _run_analyzer(self, name: str, text: str, scan: DocumentScan) -> Any:
+        if name == 'key_information':
+            return self._key_information_from_scan(scan)
+        if name == 'parties':
+            return self._parties_from_scan(scan)
+        if name == 'contract_terms':
+            return self._contract_terms_from_scan(scan)
+        if name == 'deadlines':
+            return self._deadlines_from_scan(scan)
+        if name == 'sentiment_analysis':
+            return self.analyze_document_sentiment(text, text_lower=scan.lower)
+        if name == 'language':
+            return self.detect_language(text, text_lower=scan.lower)
+        if name == 'sensitive_info':
+            return self._sensitive_info_from_scan(scan)
+        if name == 'summary':
+            return self.generate_document_summary(text)
+        if name == 'word_count':
+            return len(text.split())
+        raise KeyError(name)
+
     def process_document_complete(self, filename: str, text: str) -> Dict[str, Any]:
         """Complete document processing with all available analysis."""
+        document_hash = self.calculate_document_hash(text)
+        cache = get_analysis_cache()
+        results: Dict[str, Any] = {}
+        missed = []
+        for name, version in DOCUMENT_ANALYZER_VERSIONS.items():
+            value = cache.get(document_hash, DOCUMENT_CACHE_PREFIX + name, version, MISSING)
+            if value is MISSING:
+                missed.append(name)
+            else:
+                results[name] = value
+        scan = None
+        if missed:
+            # One scan over the pattern groups of the analyzers that missed the
+            # cache (none for sentiment/language/summary, which only need `lower`)
+            scan = get_extraction_engine().scan(text, groups=[n for n in missed if n in PATTERN_GROUPS])
+            for name in missed:
+                value = self._run_analyzer(name, text, scan)
+                cache.put(document_hash, DOCUMENT_CACHE_PREFIX + name, DOCUMENT_ANALYZER_VERSIONS[name], value)
+                results[name] = value
+
+        # classification also depends on the filename and only reads the first
+        # CLASSIFY_SAMPLE_CHARS, so it is recomputed rather than cached
+        sample_lower = scan.lower if scan is not None else text[:2 * CLASSIFY_SAMPLE_CHARS].lower()
         return {
             'filename': filename,
-            'document_type': self.classify_document(filename, text),
-            'key_information': self.extract_key_information(text),
-            'parties': self.extract_parties(text),
-            'contract_terms': self.extract_contract_terms(text),
-            'deadlines': self.extract_deadlines_and_dates(text),
-            'sentiment_analysis': self.analyze_document_sentiment(text),
-            'language': self.detect_language(text),
-            'sensitive_info': self.detect_sensitive_information(text),
-            'document_hash': self.calculate_document_hash(text),
-            'summary': self.generate_document_summary(text),
-            'word_count': len(text.split()),
+            'document_type': self.classify_document(filename, text, text_lower=sample_lower),
+            'key_information': results['key_information'],
+            'parties': results['parties'],
+            'contract_terms': results['contract_terms'],
+            'deadlines': results['deadlines'],
+            'sentiment_analysis': results['sentiment_analysis'],
+            'language': results['language'],
+            'sensitive_info': results['sensitive_info'],
+            'document_hash': document_hash,
+            'summary': results['summary'],
+            'word_count': results['word_count'],
             'character_count': len(text),
             'processing_date': datetime.now().isoformat()
         }
+
+    def process_document_windowed(self, filename: str, chunks: Iterable[str],
+                                  window_chars: int = WINDOW_CHARS,
+                                  overlap: int = OVERLAP_CHARS) -> Dict[str, Any]:
+        """
+        process_document_complete for documents too large to hold as one string.
+        `chunks` is a text stream (e.g. services.extraction.iter_text_chunks);
+        every extractor runs over overlapping windows and the results are merged,
+        so memory stays at one window regardless of document size. Results are
+        not cached: the summary is picked from a bounded candidate pool and can
+        differ from the whole-text one.
+        """
+        digest = DocumentDigest()
+        summary = RunningSummary()
+        sentiment = KeywordPresence(_keyword_matcher(), SENTIMENT_CATEGORIES)
+        head: Dict[str, str] = {}
+
+        def on_window(window, window_scan: DocumentScan) -> None:
+            if not head:
+                head['text'], head['lower'] = window.text, window_scan.lower
+            part = window.owned_text
+            digest.update(part)
+            summary.update(part)
+            sentiment.update(window_scan.lower)
+
+        scan = scan_windows(iter_windows(chunks, window_chars, overlap),
+                            get_extraction_engine(), on_window=on_window)
+        return {
+            'filename': filename,
+            'document_type': self.classify_document(filename, head['text'], text_lower=head['lower']),
+            'key_information': self._key_information_from_scan(scan),
+            'parties': self._parties_from_scan(scan),
+            'contract_terms': self._contract_terms_from_scan(scan),
+            'deadlines': self._deadlines_from_scan(scan),
+            'sentiment_analysis': self._sentiment_from_hits(
+                sentiment.hits('sentiment:positive'),
+                sentiment.hits('sentiment:negative'),
+                sentiment.hits('sentiment:neutral'),
+            ),
+            'language': self.detect_language(head['text'], text_lower=head['lower']),
+            'sensitive_info': self._sensitive_info_from_scan(scan),
+            'document_hash': digest.hexdigest(),
+            'summary': summary.result(),
+            'word_count': digest.word_count,
+            'character_count': digest.character_count,
+            'processing_date': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def cached_analysis(document_hash: str) -> Dict[str, Any]:
+        """
+        Whatever process_document_complete has cached for this document hash
+        (e.g. Document.checksum), at the current analyzer versions. Dashboards
+        use this to show analyses without re-reading the text.
+        """
+        versions = {DOCUMENT_CACHE_PREFIX + name: v for name, v in DOCUMENT_ANALYZER_VERSIONS.items()}
+        found = get_analysis_cache().analyses(document_hash, versions)
+        return {name[len(DOCUMENT_CACHE_PREFIX):]: value for name, value in found.items()}
+
+    def process_many(self, documents: Iterable[Tuple[str, Union[str, bytes]]],
+                     analyzer: Optional[Callable[[str, str], Any]] = None,
+                     workers: Optional[int] = None, ordered: bool = True,
+                     timeout: Optional[float] = None,
+                     progress: Optional[ProgressFn] = None) -> Iterator[BatchResult]:
+        """
+        Run process_document_complete over (filename, content) pairs on a process
+        pool, streaming BatchResult records (in input order unless ordered=False).
+        Content may be extracted text or the raw file bytes, which are then
+        extracted inside the worker; uploads of WINDOWED_MIN_BYTES or more go
+        through process_document_windowed. `analyzer(filename, text)` replaces
+        the full analysis with any picklable top-level function.
+        """
+        jobs = ((filename, content, analyzer) for filename, content in documents)
+        if hasattr(documents, '__len__'):
+            jobs = list(jobs)
+        return run_batch(_process_document_job, jobs, workers=workers, ordered=ordered,
+                         timeout=timeout, progress=progress)
+
+
+# ---------- batch workers (run inside process_many's pool) ----------
+_worker_processor: Optional[DocumentProcessor] = None
+
+def _process_document_job(job: Tuple[str, Union[str, bytes], Optional[Callable[[str, str], Any]]]) -> Any:
+    global _worker_processor
+    filename, content, analyzer = job
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    is_bytes = isinstance(content, (bytes, bytearray, memoryview))
+    if is_bytes and analyzer is None and len(content) >= WINDOWED_MIN_BYTES:
+        from services.extraction import iter_text_chunks
+        # already inside a pool worker: no nested page pool
+        return _worker_processor.process_document_windowed(
+            filename, iter_text_chunks(filename, content, workers=1))
+    if is_bytes:
+        from services.extraction import extract_pdf_text, extract_text_from_bytes
+        if filename.lower().endswith('.pdf'):
+            text = extract_pdf_text(content, workers=1)
+        else:
+            text = extract_text_from_bytes(filename, content)
+    else:
+        text = content or ''
+    if analyzer is not None:
+        return analyzer(filename, text)
+    return _worker_processor.process_document_complete(filename, text)
+
+# ---------- quick batch heuristics (AI Insights batch tab) ----------
+def quick_classify(text: str) -> str:
+    """Classify document type based on content"""
+    text_lower = text.lower()
+    if any(word in text_lower for word in ["agreement", "contract", "parties"]):
+        return "Contract"
+    elif any(word in text_lower for word in ["complaint", "plaintiff", "defendant"]):
+        return "Legal Pleading"
+    elif any(word in text_lower for word in ["memo", "memorandum", "analysis"]):
+        return "Legal Memorandum"
+    else:
+        return "General Legal Document"
+
+def quick_risk_score(text: str) -> int:
+    """Quick risk assessment for batch processing"""
+    risk_keywords = ["liability", "damages", "breach", "penalty", "indemnity"]
+    text_lower = text.lower()
+    risk_count = sum(1 for keyword in risk_keywords if keyword in text_lower)
+    return min(10, risk_count * 2)  # Scale to 0-10
+
+def batch_overview(filename: str, text: str) -> Optional[Dict[str, Any]]:
+    """process_many analyzer for batch tables; None when no text was extracted."""
+    if not text or text.startswith("Error:"):
+        return None
+    return {
+        'type': quick_classify(text),
+        'risk_score': quick_risk_score(text),
+        'word_count': len(text.split()),
+    }
@@ -0,0 +1,216 @@
+# services/extraction.py
+"""
+Document text extraction shared by the summarizer, the Documents page and
+the Q&A index.
+
+Everything works on in-memory bytes: uploads are read straight from their
+buffer (PDF via BytesIO, DOCX by opening the zip in memory, TXT decoded
+from a memoryview), never round-tripped through a temp file.
+
+PDFs are extracted page by page: `iter_pdf_pages` yields each page's text
+as soon as it is available, fanning page batches out across a process
+pool for large files. Extracted pages are cached on disk by the file's
+SHA-256, so re-uploads and re-indexing never parse the same PDF twice.
+"""
+from __future__ import annotations
+
+import io
+import os
+import json
+import codecs
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("LEGALDOC_CACHE_DIR") or Path.home() / ".legaldoc_cache")
+EXTRACT_CACHE_DIR = CACHE_DIR / "extracted"
+
+TEXT_CHUNK_BYTES = 1 << 20   # iter_text_chunks decodes text files this much at a time
+PARALLEL_MIN_PAGES = 32   # below this a process pool costs more than it saves
+PAGES_PER_TASK = 8
+MAX_WORKERS = 8
+
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview]
+
+# ---------- per-file cache ----------
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _cache_path(digest: str) -> Path:
+    return EXTRACT_CACHE_DIR / digest[:2] / f"{digest}.json"
+
+def load_cached_pages(digest: str) -> Optional[List[str]]:
+    path = _cache_path(digest)
+    try:
+        if path.exists():
+            return json.loads(path.read_text())["pages"]
+    except Exception:
+        pass
+    return None
+
+def save_cached_pages(digest: str, pages: List[str]) -> None:
+    path = _cache_path(digest)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"pages": pages}, ensure_ascii=False))
+    except Exception as e:
+        logger.warning(f"Could not write extraction cache: {e}")
+
+def _read_source(source: Source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    return Path(source).read_bytes()
+
+# ---------- PDF page extraction ----------
+_worker_reader = None
+
+def _init_pdf_worker(data: bytes) -> None:
+    # Each worker parses the PDF once and keeps the reader for all its batches
+    global _worker_reader
+    from pypdf import PdfReader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+def _extract_page_range(start: int, stop: int) -> List[str]:
+    return [(_worker_reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+def iter_pdf_pages(source: Source, workers: Optional[int] = None, use_cache: bool = True) -> Iterator[str]:
+    """
+    Yield the text of each PDF page in order, as pages become available.
+    `source` is a path or the raw file bytes. `workers=None` picks a process
+    pool for PDFs with at least PARALLEL_MIN_PAGES pages; `workers=1` forces
+    serial extraction. Results are cached by file SHA-256 once fully read.
+    """
+    from pypdf import PdfReader
+
+    data = _read_source(source)
+    digest = file_sha256(data)
+    if use_cache:
+        cached = load_cached_pages(digest)
+        if cached is not None:
+            yield from cached
+            return
+
+    reader = PdfReader(io.BytesIO(data))
+    n = len(reader.pages)
+    if workers is None:
+        workers = min(os.cpu_count() or 1, MAX_WORKERS) if n >= PARALLEL_MIN_PAGES else 1
+
+    pages: List[str] = []
+    if workers <= 1:
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            pages.append(text)
+            yield text
+    else:
+        ranges = [(s, min(s + PAGES_PER_TASK, n)) for s in range(0, n, PAGES_PER_TASK)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker, initargs=(data,)) as pool:
+            futures = [pool.submit(_extract_page_range, a, b) for a, b in ranges]
+            # consume in page order; later batches keep extracting meanwhile
+            for fut in futures:
+                for text in fut.result():
+                    pages.append(text)
+                    yield text
+
+    if use_cache:
+        save_cached_pages(digest, pages)
+
+def extract_pdf_text(source: Source, sep: str = "\n", workers: Optional[int] = None) -> str:
+    return sep.join(iter_pdf_pages(source, workers=workers)).strip()
+
+# ---------- DOCX / TXT ----------
+def extract_docx_text(source: Source) -> str:
+    import docx2txt
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # docx2txt opens the archive with zipfile, which reads a BytesIO just as well
+        source = io.BytesIO(source)
+    else:
+        source = str(source)
+    return (docx2txt.process(source) or "").strip()
+
+def decode_text(source: Source, encoding: str = "utf-8") -> str:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return str(memoryview(source), encoding, errors="ignore")
+    return Path(source).read_text(encoding=encoding, errors="ignore")
+
+# ---------- public API ----------
+TEXT_EXTENSIONS = {".txt", ".md"}
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS | {".pdf", ".docx"}
+
+def is_supported(name: str) -> bool:
+    return Path(name or "").suffix.lower() in SUPPORTED_EXTENSIONS
+
+def extract_text_from_bytes(name: str, data: Source, pdf_sep: str = "\n") -> str:
+    """Extract text from an in-memory file; the extension of `name` picks the format."""
+    ext = Path(name or "").suffix.lower()
+    if ext in TEXT_EXTENSIONS:
+        return decode_text(data)
+    if ext == ".pdf":
+        return extract_pdf_text(data, sep=pdf_sep)
+    if ext == ".docx":
+        return extract_docx_text(data)
+    return "Error: Unsupported file type"
+
+def iter_document_pages(name: str, data: Source, workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Page texts of an in-memory file for chunking: PDF pages as they are
+    extracted (through the page cache), any other format as one piece.
+    """
+    if Path(name or "").suffix.lower() == ".pdf":
+        yield from iter_pdf_pages(data, workers=workers)
+    else:
+        yield extract_text_from_bytes(name, data)
+
+def pages_digest(name: str, data: Source) -> str:
+    """Key of a PDF's pages in the extraction cache (load_cached_pages), '' for other formats."""
+    if Path(name or "").suffix.lower() != ".pdf":
+        return ""
+    return file_sha256(data if isinstance(data, (bytes, bytearray, memoryview)) else _read_source(data))
+
+def iter_text_chunks(name: str, data: Source, pdf_sep: str = "\n",
+                     workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Stream a file's text in pieces for windowed analysis: PDF pages as they
+    are extracted, text files decoded TEXT_CHUNK_BYTES at a time. DOCX has
+    no streaming reader, so its text comes back as one piece.
+    """
+    ext = Path(name or "").suffix.lower()
+    if ext in TEXT_EXTENSIONS:
+        view = memoryview(_read_source(data))
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        for start in range(0, len(view), TEXT_CHUNK_BYTES):
+            yield decoder.decode(view[start:start + TEXT_CHUNK_BYTES])
+        yield decoder.decode(b"", final=True)
+    elif ext == ".pdf":
+        # the page cache would keep every page in memory, so it is bypassed here
+        for i, page in enumerate(iter_pdf_pages(data, workers=workers, use_cache=False)):
+            yield pdf_sep + page if i else page
+    elif ext == ".docx":
+        yield extract_docx_text(data)
+    else:
+        yield "Error: Unsupported file type"
+
+def extract_text(path: Union[str, os.PathLike], pdf_sep: str = "\n") -> str:
+    """Path-based wrapper around extract_text_from_bytes."""
+    p = Path(path)
+    if p.suffix.lower() in TEXT_EXTENSIONS:
+        return decode_text(p)
+    if not is_supported(p.name):
+        return "Error: Unsupported file type"
+    return extract_text_from_bytes(p.name, p.read_bytes(), pdf_sep=pdf_sep)
+
+def upload_buffer(uploaded_file) -> Source:
+    """Zero-copy view of an uploaded file (Streamlit UploadedFile is a BytesIO)."""
+    getbuffer = getattr(uploaded_file, "getbuffer", None)
+    if getbuffer is not None:
+        return getbuffer()
+    getvalue = getattr(uploaded_file, "getvalue", None)
+    return getvalue() if getvalue is not None else uploaded_file.read()
+
+def extract_text_from_upload(uploaded_file, pdf_sep: str = "\n") -> str:
+    return extract_text_from_bytes(getattr(uploaded_file, "name", ""), upload_buffer(uploaded_file), pdf_sep=pdf_sep)
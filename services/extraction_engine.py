@@ -0,0 +1,213 @@
+# services/extraction_engine.py
+"""
+Precompiled multi-pattern extraction for DocumentProcessor.
+
+Every pattern used by `process_document_complete` is declared once below
+with a typed label and compiled at import. `ExtractionEngine.scan()` runs
+them over a document and returns every match with its label and span.
+It shares one lowercased buffer between the pattern gates and the keyword
+counters, so the text is lowercased once per document.
+
+A pattern only runs when the cheap literals it cannot match without appear
+in that buffer. For example, money patterns need "$", "usd" or "dollar",
+and email needs "@". The entity and address patterns start with a broad
+character class, so each can cost quadratic time on a document without a
+match. They also need a short precheck regex, such as a company suffix
+word, to match first. Each remaining pattern keeps its own `finditer`
+scan, so results are exactly what `re.findall` produced. Callers that
+only need some sections pass `groups`, and only those patterns are
+gated and run.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# ---------- pattern table ----------
+_MONTHS = r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+MONTH_NAMES = ("january", "february", "march", "april", "may", "june", "july",
+               "august", "september", "october", "november", "december")
+
+DIGIT = "<digit>"   # gate token: text contains a \d character
+MONTH = "<month>"   # gate token: text contains a month name
+
+@dataclass(frozen=True)
+class PatternSpec:
+    name: str                      # unique id, e.g. "date.numeric"
+    label: str                     # match type, e.g. "date"
+    group: str                     # DocumentProcessor section that consumes it
+    pattern: str
+    flags: int = 0
+    # any-of gate: the pattern cannot match unless one of these occurs in the
+    # lowercased text (all of them for an entry that is itself a tuple)
+    requires: Tuple[Union[str, Tuple[str, ...]], ...] = ()
+    # optional cheap regex (same flags) that must match somewhere; used for
+    # patterns whose leading character class would otherwise retry at every offset
+    precheck: Optional[str] = None
+
+_I, _M = re.IGNORECASE, re.MULTILINE
+
+PATTERN_SPECS: Tuple[PatternSpec, ...] = (
+    # key_information
+    PatternSpec("date.numeric", "date", "key_information", r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', _I, (("/", DIGIT), ("-", DIGIT))),
+    PatternSpec("date.month_day_year", "date", "key_information", rf'\b{_MONTHS}\s+\d{{1,2}},?\s+\d{{4}}\b', _I, (MONTH,)),
+    PatternSpec("date.day_month_year", "date", "key_information", rf'\b\d{{1,2}}\s+{_MONTHS}\s+\d{{4}}\b', _I, (MONTH,)),
+    PatternSpec("date.iso", "date", "key_information", r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b', _I, (("/", DIGIT), ("-", DIGIT))),
+    PatternSpec("money.dollar_sign", "money", "key_information", r'\$[\d,]+(?:\.\d{2})?', _I, ("$",)),
+    PatternSpec("money.usd_prefix", "money", "key_information", r'USD\s*[\d,]+(?:\.\d{2})?', _I, ("usd",)),
+    PatternSpec("money.dollars", "money", "key_information", r'[\d,]+\s*dollars?', _I, ("dollar",)),
+    PatternSpec("money.usd_suffix", "money", "key_information", r'[\d,]+\s*USD', _I, ("usd",)),
+    PatternSpec("email", "email", "key_information", r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 0, ("@",)),
+    PatternSpec("phone.plain", "phone", "key_information", r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', 0, (DIGIT,)),
+    PatternSpec("phone.parens", "phone", "key_information", r'\(\d{3}\)\s*\d{3}[-.\s]?\d{4}\b', 0, ("(",)),
+    PatternSpec("phone.intl", "phone", "key_information", r'\+1[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', 0, ("+1",)),
+    PatternSpec("address", "address", "key_information",
+                r'\d+\s+[A-Za-z0-9\s,.-]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln|Court|Ct|Place|Pl)',
+                _I, (DIGIT,), r'\d\s'),
+    PatternSpec("entity.company", "entity", "key_information",
+                r'[A-Za-z0-9\s&,.-]+\s+(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation|Limited)\b', _I, ("inc", "co", "llc", "ltd", "limited"),
+                r'\s(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation|Limited)\b'),
+    PatternSpec("entity.firm", "entity", "key_information",
+                r'\b[A-Z][A-Za-z0-9\s&,.-]*\s+(?:Law\s+Firm|Associates|Legal\s+Services)\b', _I, ("law", "associates", "legal"),
+                r'\s(?:Law\s+Firm|Associates|Legal\s+Services)\b'),
+    PatternSpec("case_number", "case_number", "key_information",
+                r'(?:Case\s+No\.?|Docket\s+No\.?|Civil\s+Action\s+No\.?)\s*:?\s*[\w\d-]+(?:\s*\([A-Z]{2,}\))?', _I, ("case", "docket", "action")),
+    PatternSpec("signature", "signature", "key_information",
+                r'(?:Signed|Signature|By:)\s*[^\n]*(?:\n\s*[A-Za-z\s,.-]+){1,3}', _I | _M, ("signed", "signature", "by:")),
+    # parties
+    PatternSpec("party.role", "party", "parties", r'(?:plaintiff|defendant|petitioner|respondent):\s*([A-Za-z\s,.-]+?)(?:\n|\.|,)',
+                _I | _M, ("plaintiff", "defendant", "petitioner", "respondent")),
+    PatternSpec("party.between", "party", "parties", r'between\s+([A-Za-z\s,.-]+?)\s+and\s+([A-Za-z\s,.-]+?)(?:\s|,|\.|$)',
+                _I | _M, ("between",)),
+    PatternSpec("party.label", "party", "parties", r'(?:party|client):\s*([A-Za-z\s,.-]+?)(?:\n|\.|,)', _I | _M, ("party", "client")),
+    PatternSpec("party.entity_line", "party", "parties",
+                r'(?:^|\n)\s*([A-Z][A-Za-z\s&,.-]+(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation))\s*(?:\n|,|\.|$)', _I | _M, ("inc", "co", "llc", "ltd"),
+                r'(?:Inc|Corp|LLC|Co|Ltd|Company|Corporation)\s*(?:\n|,|\.|$)'),
+    # contract_terms
+    PatternSpec("term.effective_date", "effective_date", "contract_terms", r'effective\s+(?:date|as\s+of)\s*:?\s*([^.;\n]+)', _I, ("effective",)),
+    PatternSpec("term.termination", "termination_clause", "contract_terms", r'terminat[ei]\w*[^.]*\.(?:[^.]*\.)*', _I, ("terminat",)),
+    PatternSpec("term.governing_law", "governing_law", "contract_terms", r'governed\s+by\s+(?:the\s+)?laws?\s+of\s+([^.;\n]+)', _I, ("governed",)),
+    PatternSpec("term.payment", "payment_term", "contract_terms", r'payment[^.]*\$[\d,]+(?:\.\d{2})?[^.]*\.', _I, (("payment", "$"),)),
+    # deadlines
+    PatternSpec("deadline.deadline", "deadline", "deadlines",
+                r'(?:due|deadline|expires?|must\s+be\s+(?:filed|submitted|completed))\s+(?:by|on|before)\s*:?\s*([^.;\n]+)', _I, ("due", "deadline", "expire", "must")),
+    PatternSpec("deadline.effective_date", "effective_date", "deadlines",
+                r'(?:effective|starting|commencing)\s+(?:date|on)\s*:?\s*([^.;\n]+)', _I, ("effective", "starting", "commencing")),
+    PatternSpec("deadline.termination_date", "termination_date", "deadlines",
+                r'(?:termination|expiration|end)\s+(?:date|on)\s*:?\s*([^.;\n]+)', _I, ("termination", "expiration", "end")),
+    PatternSpec("deadline.court_date", "court_date", "deadlines", r'(?:court\s+date|hearing|trial)\s*:?\s*([^.;\n]+)', _I, ("court", "hearing", "trial")),
+    PatternSpec("deadline.payment_due", "payment_due", "deadlines", r'(?:payment\s+due|invoice\s+due)\s*:?\s*([^.;\n]+)', _I, (("payment", "due"), ("invoice", "due"))),
+    # sensitive_info
+    PatternSpec("sensitive.ssn", "ssn", "sensitive_info", r'\b\d{3}-\d{2}-\d{4}\b', 0, (("-", DIGIT),)),
+    PatternSpec("sensitive.credit_card", "credit_card", "sensitive_info", r'\b(?:\d{4}[-\s]?){3}\d{4}\b', 0, (DIGIT,)),
+    PatternSpec("sensitive.bank_account", "bank_account", "sensitive_info", r'\b\d{8,17}\b', 0, (DIGIT,)),
+    PatternSpec("sensitive.tax_id", "tax_id", "sensitive_info", r'\b\d{2}-\d{7}\b', 0, (("-", DIGIT),)),
+)
+
+# DocumentProcessor sections that have patterns (scan(groups=...))
+PATTERN_GROUPS = frozenset(s.group for s in PATTERN_SPECS)
+
+# Under IGNORECASE these non-ASCII letters match ASCII ones ("ſ" ~ "s",
+# "K" ~ "k", "İ"/"ı" ~ "i") but str.lower() does not map them, so literal
+# gates are only trusted when none of them occurs.
+_FOLD_EXCEPTIONS = re.compile("[İıſK]")
+_HAS_DIGIT = re.compile(r"\d")
+
+# ---------- results ----------
+FindallValue = Union[str, Tuple[str, ...]]
+
+@dataclass(frozen=True)
+class ExtractionMatch:
+    label: str
+    start: int
+    end: int
+    value: FindallValue    # what re.findall would have returned for this match
+    spec: str
+
+@dataclass
+class DocumentScan:
+    """All matches for one document, grouped per pattern in scan order."""
+    text: str
+    lower: str
+    by_spec: Dict[str, List[ExtractionMatch]] = field(default_factory=dict)
+
+    def findall(self, spec_name: str) -> List[FindallValue]:
+        return [m.value for m in self.by_spec.get(spec_name, ())]
+
+    def values(self, label: str, group: Optional[str] = None) -> List[FindallValue]:
+        """Values for a label, concatenated in pattern-declaration order."""
+        out: List[FindallValue] = []
+        for spec in PATTERN_SPECS:
+            if spec.label == label and (group is None or spec.group == group):
+                out.extend(self.findall(spec.name))
+        return out
+
+    @property
+    def matches(self) -> List[ExtractionMatch]:
+        """Every match, ordered by position."""
+        return sorted((m for ms in self.by_spec.values() for m in ms), key=lambda m: (m.start, m.end))
+
+# ---------- engine ----------
+def _findall_value(m: "re.Match", ngroups: int) -> FindallValue:
+    if ngroups == 0:
+        return m.group(0)
+    if ngroups == 1:
+        return m.group(1) or ""
+    return tuple(g or "" for g in m.groups())
+
+class ExtractionEngine:
+    """Compiles PATTERN_SPECS once; scan() is safe to call from many threads."""
+
+    def __init__(self, specs: Sequence[PatternSpec] = PATTERN_SPECS):
+        self.specs = tuple(specs)
+        self._compiled = {s.name: re.compile(s.pattern, s.flags) for s in self.specs}
+        self._prechecks = {s.name: re.compile(s.precheck, s.flags) for s in self.specs if s.precheck}
+
+    def _gates(self, text: str, lower: str, specs: Sequence[PatternSpec]) -> Dict[str, bool]:
+        if _FOLD_EXCEPTIONS.search(text):
+            # literal gates are unreliable here; prechecks still run on the original text
+            return {s.name: True for s in specs}
+        present = {DIGIT: bool(_HAS_DIGIT.search(text)),
+                   MONTH: any(name in lower for name in MONTH_NAMES)}
+
+        def has(token: str) -> bool:
+            if token not in present:
+                present[token] = token in lower
+            return present[token]
+        return {
+            s.name: not s.requires or any(
+                all(has(t) for t in req) if isinstance(req, tuple) else has(req)
+                for req in s.requires
+            )
+            for s in specs
+        }
+
+    def scan(self, text: str, groups: Optional[Iterable[str]] = None, lower: Optional[str] = None) -> DocumentScan:
+        """Run every pattern (or only those in `groups`) over text; other groups are left out."""
+        specs = self.specs
+        if groups is not None:
+            wanted = set(groups)
+            specs = tuple(s for s in specs if s.group in wanted)
+        lower = text.lower() if lower is None else lower
+        gates = self._gates(text, lower, specs) if specs else {}
+        result = DocumentScan(text=text, lower=lower)
+        for spec in specs:
+            precheck = self._prechecks.get(spec.name)
+            if not gates[spec.name] or (precheck is not None and not precheck.search(text)):
+                result.by_spec[spec.name] = []
+                continue
+            rx = self._compiled[spec.name]
+            result.by_spec[spec.name] = [
+                ExtractionMatch(spec.label, m.start(), m.end(), _findall_value(m, rx.groups), spec.name)
+                for m in rx.finditer(text)
+            ]
+        return result
+
+_engine: Optional[ExtractionEngine] = None
+
+def get_extraction_engine() -> ExtractionEngine:
+    global _engine
+    if _engine is None:
+        _engine = ExtractionEngine()
+    return _engine
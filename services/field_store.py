@@ -0,0 +1,172 @@
+# services/field_store.py
+"""
+Backing store for the heavy fields of the compact model variants.
+
+models.compact keeps text, logs, annotations and other bulky values out of
+the objects held in session state: each one is pickled, zlib-compressed and
+appended to a per-process scratch file. The object keeps only a small
+handle: offset, stored bytes, crc32 and item count packed into one int.
+Reading a field is one positioned read plus a decompress.
+
+The file is append-only. A field written back after a change is appended
+again, and the old copy becomes garbage. The store cannot tell which
+handles are still held, so it never reclaims that space by itself:
+needs_compaction() reports when garbage passes COMPACT_GARBAGE_RATIO of the
+file (and at least COMPACT_MIN_GARBAGE_BYTES), and compact(handles)
+rewrites the file with only the given handles' values, returning their new
+handles. models.compact.compact_field_store() does this for a set of
+compact objects. The file is scratch space for this process only and is
+deleted at exit. Persistent data belongs in the caches that own it (e.g.
+services.version_store).
+"""
+from __future__ import annotations
+
+import os
+import zlib
+import atexit
+import pickle
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from services.extraction import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+FIELD_STORE_DIR = CACHE_DIR / "fields"
+COMPRESSION_LEVEL = 1         # fields are read back often; favour speed
+COMPACT_GARBAGE_RATIO = 0.5   # share of the file that is garbage before compaction pays
+COMPACT_MIN_GARBAGE_BYTES = 64 * 1024 * 1024
+
+_MASK32 = (1 << 32) - 1
+_MASK48 = (1 << 48) - 1
+
+class FieldHandle(int):
+    """
+    (offset, stored bytes, crc32, item count) of a stored value, packed into
+    one int so that a handle costs an object about the size of one number.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def pack(cls, offset: int, nbytes: int, crc: int, count: int) -> 'FieldHandle':
+        return cls(offset | nbytes << 48 | crc << 80 | min(count, _MASK32) << 112)
+
+    offset = property(lambda self: int(self) & _MASK48)
+    nbytes = property(lambda self: int(self) >> 48 & _MASK32)
+    crc = property(lambda self: int(self) >> 80 & _MASK32)
+    count = property(lambda self: int(self) >> 112)     # len() of the value, 1 if it has none
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+def _count(value: Any) -> int:
+    try:
+        return len(value)
+    except TypeError:
+        return 1
+
+def _open(path: Path) -> int:
+    return os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+
+class FieldStore:
+    """Append-only heap of pickled field values; safe to share between threads."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.pid = os.getpid()
+        self.path = Path(path) if path is not None else FIELD_STORE_DIR / f"heap-{self.pid}.bin"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd: Optional[int] = _open(self.path)
+        self._size = 0
+        self._live = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def put(self, value: Any, previous: Optional[FieldHandle] = None) -> FieldHandle:
+        """Store a value; returns `previous` unchanged when the value is the same."""
+        blob = _encode(value)
+        crc = zlib.crc32(blob)
+        if previous is not None and previous.nbytes == len(blob) and previous.crc == crc:
+            return previous
+        with self._lock:
+            offset = self._size
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            os.write(self._fd, blob)
+            self._size += len(blob)
+            self._live += len(blob) - (previous.nbytes if previous is not None else 0)
+        return FieldHandle.pack(offset, len(blob), crc, _count(value))
+
+    def get(self, handle: FieldHandle) -> Any:
+        with self._lock:
+            os.lseek(self._fd, handle.offset, os.SEEK_SET)
+            blob = os.read(self._fd, handle.nbytes)
+        if zlib.crc32(blob) != handle.crc:
+            raise ValueError(f"Stored field at offset {handle.offset} failed its checksum")
+        return pickle.loads(zlib.decompress(blob))
+
+    def needs_compaction(self) -> bool:
+        garbage = self._size - self._live
+        return garbage >= COMPACT_MIN_GARBAGE_BYTES and garbage >= self._size * COMPACT_GARBAGE_RATIO
+
+    def compact(self, handles: Iterable[FieldHandle]) -> Dict[FieldHandle, FieldHandle]:
+        """
+        Rewrite the file with only the values of `handles`; returns old -> new
+        handle. Every handle not passed in is invalid afterwards, and no other
+        thread may read the old handles until they have been swapped.
+        """
+        tmp_path = self.path.with_suffix('.compact')
+        moved: Dict[FieldHandle, FieldHandle] = {}
+        with self._lock:
+            before = self._size
+            fd = _open(tmp_path)
+            try:
+                offset = 0
+                for handle in handles:
+                    if handle in moved:
+                        continue
+                    os.lseek(self._fd, handle.offset, os.SEEK_SET)
+                    blob = os.read(self._fd, handle.nbytes)
+                    if zlib.crc32(blob) != handle.crc:
+                        raise ValueError(f"Stored field at offset {handle.offset} failed its checksum")
+                    os.write(fd, blob)
+                    moved[handle] = FieldHandle.pack(offset, handle.nbytes, handle.crc, handle.count)
+                    offset += handle.nbytes
+            except BaseException:
+                os.close(fd)
+                tmp_path.unlink()
+                raise
+            os.close(fd)
+            os.close(self._fd)
+            os.replace(tmp_path, self.path)
+            self._fd = os.open(self.path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+            self._size = self._live = offset
+        logger.info(f"Compacted field store {self.path}: {before} -> {offset} bytes")
+        return moved
+
+    def stats(self) -> Dict[str, int]:
+        return {'file_bytes': self._size, 'live_bytes': self._live,
+                'garbage_bytes': self._size - self._live}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is None or self.pid != os.getpid():
+                return
+            os.close(self._fd)
+            self._fd = None
+            try:
+                self.path.unlink()
+            except OSError as e:
+                logger.debug(f"Could not remove field store {self.path}: {e}")
+
+# ---------- shared store ----------
+_shared_store: Optional[FieldStore] = None
+_shared_lock = threading.Lock()
+
+def get_field_store() -> FieldStore:
+    global _shared_store
+    with _shared_lock:
+        # a forked worker must not append to its parent's file
+        if _shared_store is None or _shared_store.pid != os.getpid():
+            _shared_store = FieldStore()
+        return _shared_store
@@ -0,0 +1,227 @@
+# services/job_queue.py
+"""
+Local background job queue.
+
+Work is submitted with a priority and an optional dedup key and runs on a
+bounded pool of daemon threads. Callers get a job id back immediately and
+poll `status()` / `result()`; long jobs report progress and honour
+cancellation through the `progress` callback they receive.
+"""
+from __future__ import annotations
+
+import heapq
+import inspect
+import itertools
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0   # a user is waiting on the page
+PRIORITY_BATCH = 10        # uploads, backfills, re-indexing
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+_FINISHED = {JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED}
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once cancellation was requested."""
+
+@dataclass
+class Job:
+    id: str
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    priority: int
+    key: Optional[str] = None
+    label: str = ""
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    cancel_requested: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status.value,
+            "priority": self.priority,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobQueue:
+    """Priority job queue with a bounded worker pool and in-flight deduplication."""
+
+    def __init__(self, max_workers: int = 2, keep_finished: int = 500):
+        self.max_workers = max(1, int(max_workers))
+        self.keep_finished = keep_finished
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[str, str] = {}          # dedup key -> job id
+        self._finished_order: List[str] = []
+        self._heap: List[Tuple[int, int, str]] = []  # (priority, seq, job id)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+
+    # ---------- submission ----------
+    def submit(self, fn: Callable[..., Any], *args, key: Optional[str] = None,
+               priority: int = PRIORITY_INTERACTIVE, label: str = "", **kwargs) -> str:
+        """
+        Queue fn(*args, **kwargs) and return its job id.
+        If a queued or running job has the same key, its id is returned instead;
+        a queued duplicate is promoted when the new request has higher priority.
+        If fn accepts a `progress` argument it receives a callback
+        progress(fraction, message) that raises JobCancelled after cancel().
+        """
+        with self._cond:
+            if key is not None and key in self._inflight:
+                job = self._jobs[self._inflight[key]]
+                if job.status == JobStatus.QUEUED and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job.id))
+                return job.id
+
+            job = Job(id=str(uuid.uuid4()), fn=fn, args=args, kwargs=kwargs,
+                      priority=priority, key=key, label=label)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job.id
+            heapq.heappush(self._heap, (priority, next(self._seq), job.id))
+            self._ensure_workers()
+            self._cond.notify()
+            return job.id
+
+    # ---------- polling ----------
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def result(self, job_id: str, default: Any = None) -> Any:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.DONE:
+                return default
+            return job.result
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or ask a running one to stop at its next progress report."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return False
+            job.cancel_requested.set()
+            if job.status == JobStatus.QUEUED:
+                self._finish(job, JobStatus.CANCELLED)
+            return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(1 for j in self._jobs.values() if not j.is_finished)
+
+    # ---------- workers ----------
+    def _ensure_workers(self) -> None:
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            w = threading.Thread(target=self._worker, name=f"job-worker-{len(self._workers)}", daemon=True)
+            w.start()
+            self._workers.append(w)
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while True:
+                while self._heap:
+                    priority, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    # skip cancelled jobs and stale entries left behind by promotion
+                    if job is None or job.status != JobStatus.QUEUED or priority != job.priority:
+                        continue
+                    job.status = JobStatus.RUNNING
+                    job.started_at = datetime.now()
+                    return job
+                self._cond.wait()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            kwargs = dict(job.kwargs)
+            if _accepts_progress(job.fn):
+                kwargs["progress"] = self._progress_callback(job)
+            try:
+                result = job.fn(*job.args, **kwargs)
+            except JobCancelled:
+                result = None
+            except Exception as e:
+                logger.error(f"Job {job.label or job.id} failed: {e}")
+                with self._cond:
+                    job.error = str(e)
+                    self._finish(job, JobStatus.FAILED)
+                continue
+            with self._cond:
+                if job.cancel_requested.is_set():
+                    self._finish(job, JobStatus.CANCELLED)
+                else:
+                    job.result = result
+                    job.progress = 1.0
+                    self._finish(job, JobStatus.DONE)
+
+    def _progress_callback(self, job: Job) -> Callable[[float, str], None]:
+        def report(fraction: float, message: str = "") -> None:
+            if job.cancel_requested.is_set():
+                raise JobCancelled(job.id)
+            job.progress = max(0.0, min(1.0, float(fraction)))
+            job.message = message
+        return report
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        # caller holds self._cond
+        job.status = status
+        job.finished_at = datetime.now()
+        if job.key is not None and self._inflight.get(job.key) == job.id:
+            del self._inflight[job.key]
+        self._finished_order.append(job.id)
+        while len(self._finished_order) > self.keep_finished:
+            self._jobs.pop(self._finished_order.pop(0), None)
+
+def _accepts_progress(fn: Callable[..., Any]) -> bool:
+    try:
+        return "progress" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+# ---------- process-wide queue ----------
+_default_queue: Optional[JobQueue] = None
+_default_lock = threading.Lock()
+
+def get_job_queue(max_workers: int = 2) -> JobQueue:
+    """Shared queue for the whole Streamlit process (all sessions)."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(max_workers=max_workers)
+        return _default_queue
@@ -0,0 +1,166 @@
+# services/keyword_matcher.py
+"""
+Multi-keyword counting shared by DocumentProcessor and AIAnalysisSystem.
+
+A KeywordMatcher is built once from named vocabularies (category ->
+keywords). count() only looks at the categories it is asked for:
+
+- presence=True (callers that only use hits() / matched()) checks each
+  keyword with `kw in text`, which stops at the first occurrence; this
+  is what the analyzers did before the matcher existed and it beats any
+  full scan by orders of magnitude on long texts
+- otherwise, with pyahocorasick installed, one Aho-Corasick automaton
+  over just the requested categories' keywords (built on first use per
+  category set) counts them in a single pass; without it, each distinct
+  keyword is counted once with str.count
+
+Either way, a keyword shared by several vocabularies is only looked up once.
+
+Counts follow str.count semantics: non-overlapping occurrences, scanned
+left to right. So `counts.hits(cat)` equals `sum(kw in text for kw in
+vocab)` and `counts.total(cat)` equals `sum(text.count(kw) for kw in
+vocab)`; with presence=True every count is 0 or 1, so total() equals
+hits(). Matching is case-sensitive: callers pass lowercased text. Pass
+`word_boundary=True` to only count whole-word occurrences.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import ahocorasick                   # pip install pyahocorasick
+except Exception:  # pragma: no cover
+    ahocorasick = None
+
+_WORD_CHAR = re.compile(r"\w")
+
+class KeywordCounts:
+    """Per-keyword occurrence counts with per-category views."""
+
+    def __init__(self, vocabularies: Mapping[str, Tuple[str, ...]], counts: Dict[str, int]):
+        self._vocabularies = vocabularies
+        self._counts = counts
+
+    def count(self, keyword: str) -> int:
+        return self._counts.get(keyword, 0)
+
+    def hits(self, category: str) -> int:
+        """How many of the category's keywords occur at least once."""
+        return sum(1 for kw in self._vocabularies[category] if self._counts.get(kw, 0))
+
+    def total(self, category: str) -> int:
+        """Total occurrences of the category's keywords."""
+        return sum(self._counts.get(kw, 0) for kw in self._vocabularies[category])
+
+    def matched(self, category: str) -> List[str]:
+        return [kw for kw in self._vocabularies[category] if self._counts.get(kw, 0)]
+
+    def totals(self) -> Dict[str, int]:
+        return {cat: self.total(cat) for cat in self._vocabularies}
+
+class KeywordMatcher:
+    """Counts keywords of the requested vocabularies; safe to share between threads."""
+
+    def __init__(self, vocabularies: Mapping[str, Iterable[str]], word_boundary: bool = False):
+        self.vocabularies: Dict[str, Tuple[str, ...]] = {
+            cat: tuple(kw for kw in kws if kw) for cat, kws in vocabularies.items()
+        }
+        self.word_boundary = word_boundary
+        self.keywords: Tuple[str, ...] = tuple(sorted({kw for kws in self.vocabularies.values() for kw in kws}))
+        self._automata: Dict[Tuple[str, ...], object] = {}   # sorted category names -> automaton
+        self._automata_lock = threading.Lock()
+        self._boundary_patterns: Dict[str, "re.Pattern"] = {}
+
+    def _categories(self, categories: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        if categories is None:
+            return tuple(sorted(self.vocabularies))
+        return tuple(sorted(set(categories)))
+
+    def _keywords_for(self, categories: Tuple[str, ...]) -> Tuple[str, ...]:
+        if len(categories) == len(self.vocabularies):
+            return self.keywords
+        return tuple(sorted({kw for cat in categories for kw in self.vocabularies[cat]}))
+
+    def _automaton(self, categories: Tuple[str, ...]):
+        with self._automata_lock:
+            automaton = self._automata.get(categories)
+            if automaton is None:
+                automaton = ahocorasick.Automaton()
+                for kw in self._keywords_for(categories):
+                    automaton.add_word(kw, kw)
+                automaton.make_automaton()
+                self._automata[categories] = automaton
+            return automaton
+
+    def _is_boundary(self, text: str, start: int, end: int) -> bool:
+        return (start == 0 or not _WORD_CHAR.match(text, start - 1)) and \
+               (end >= len(text) or not _WORD_CHAR.match(text, end))
+
+    def _boundary_pattern(self, kw: str) -> "re.Pattern":
+        rx = self._boundary_patterns.get(kw)
+        if rx is None:
+            rx = self._boundary_patterns[kw] = re.compile(rf"(?<!\w){re.escape(kw)}(?!\w)")
+        return rx
+
+    def _count_automaton(self, text: str, automaton) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        next_free: Dict[str, int] = {}   # per keyword: first offset a new match may start at
+        for end, kw in automaton.iter(text):
+            start = end - len(kw) + 1
+            if start < next_free.get(kw, 0):
+                continue
+            if self.word_boundary and not self._is_boundary(text, start, end + 1):
+                continue
+            counts[kw] = counts.get(kw, 0) + 1
+            next_free[kw] = end + 1
+        return counts
+
+    def _count_fallback(self, text: str, keywords: Iterable[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for kw in keywords:
+            if self.word_boundary:
+                n = sum(1 for _ in self._boundary_pattern(kw).finditer(text))
+            else:
+                n = text.count(kw)
+            if n:
+                counts[kw] = n
+        return counts
+
+    def _presence(self, text: str, keywords: Iterable[str]) -> Dict[str, int]:
+        if self.word_boundary:
+            return {kw: 1 for kw in keywords if self._boundary_pattern(kw).search(text)}
+        return {kw: 1 for kw in keywords if kw in text}
+
+    def count(self, text: str, categories: Optional[Sequence[str]] = None,
+              presence: bool = False) -> KeywordCounts:
+        """
+        Count the keywords of `categories` (every vocabulary if None) in
+        `text` (already lowercased). With presence=True each keyword is only
+        looked up until its first occurrence and counts are 0 or 1: enough
+        for hits() and matched(), much cheaper than counting.
+        """
+        text = text or ""
+        categories = self._categories(categories)
+        if presence:
+            counts = self._presence(text, self._keywords_for(categories))
+        elif ahocorasick is not None and categories:
+            counts = self._count_automaton(text, self._automaton(categories))
+        else:
+            counts = self._count_fallback(text, self._keywords_for(categories))
+        return KeywordCounts(self.vocabularies, counts)
+
+# ---------- shared matchers ----------
+_matchers: Dict[Tuple, KeywordMatcher] = {}
+_matchers_lock = threading.Lock()
+
+def get_keyword_matcher(vocabularies: Mapping[str, Iterable[str]], word_boundary: bool = False) -> KeywordMatcher:
+    """Process-wide matcher for these vocabularies, built on first use."""
+    frozen = {cat: tuple(kws) for cat, kws in vocabularies.items()}
+    key = (word_boundary, tuple(sorted(frozen.items())))
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = _matchers[key] = KeywordMatcher(frozen, word_boundary=word_boundary)
+        return matcher
@@ -0,0 +1,220 @@
+# services/portfolio_comparison.py
+"""
+N-way contract comparison for AIAnalysisSystem.compare_portfolio.
+
+Every distinct document is analyzed once (analyze_contract results are
+memoized by text hash, see services.analysis_cache) and reduced to numeric
+arrays:
+
+- clause presence / strength: documents x key-clause types
+- missing standard clauses:  documents x clause names
+- financial vectors:         documents x FINANCIAL_FEATURES
+- scalar scores:             risk, complexity, red flags
+
+Pairwise differences, outliers against the portfolio median and
+missing-clause clusters are then computed with numpy over those arrays,
+instead of re-running pairwise compare_contracts calls.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# _identify_key_clauses types, in its pattern order
+CLAUSE_TYPES = ('Termination', 'Payment', 'Liability', 'Confidentiality', 'Intellectual Property', 'Force Majeure')
+FINANCIAL_FEATURES = ('amount_count', 'total_amount', 'max_amount', 'payment_term_count',
+                      'max_interest_rate', 'currency_mentioned')
+SCORE_FEATURES = ('risk_score', 'complexity_score', 'missing_clause_count', 'red_flag_count')
+
+OUTLIER_Z = 3.5           # modified z-score cut-off (Iglewicz & Hoaglin)
+RISK_LEVELS = {'low': 0, 'medium': 1, 'high': 2}
+
+_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+Documents = Union[Mapping[str, str], Sequence[Tuple[str, str]], Sequence[str]]
+
+def as_named_documents(documents: Documents) -> List[Tuple[str, str]]:
+    if isinstance(documents, Mapping):
+        return list(documents.items())
+    named = []
+    for i, doc in enumerate(documents):
+        named.append(tuple(doc) if isinstance(doc, (tuple, list)) else (f"Contract {i + 1}", doc))
+    return named
+
+def _parse_number(s: str) -> float:
+    m = _NUMBER.search(s or '')
+    try:
+        return float(m.group().replace(',', '')) if m else 0.0
+    except ValueError:
+        return 0.0
+
+def financial_vector(financial_terms: Dict[str, Any]) -> List[float]:
+    amounts = [_parse_number(a) for a in financial_terms.get('monetary_amounts', [])]
+    rates = [_parse_number(r) for r in financial_terms.get('interest_rates', [])]
+    return [
+        float(len(amounts)),
+        float(sum(amounts)),
+        float(max(amounts, default=0.0)),
+        float(len(financial_terms.get('payment_terms', []))),
+        float(max(rates, default=0.0)),
+        1.0 if financial_terms.get('currency_mentioned') else 0.0,
+    ]
+
+def robust_z(x: np.ndarray) -> np.ndarray:
+    """
+    Column-wise modified z-scores, 0.6745 * (x - median) / MAD. Columns with
+    MAD == 0 fall back to the mean absolute deviation; constant columns give 0.
+    """
+    median = np.median(x, axis=0)
+    dev = np.abs(x - median)
+    mad = np.median(dev, axis=0)
+    meanad = dev.mean(axis=0)
+    scale = np.where(mad > 0, mad / 0.6745, meanad * 1.2533)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(scale > 0, (x - median) / np.where(scale > 0, scale, 1.0), 0.0)
+    return z
+
+@dataclass
+class PortfolioComparison:
+    names: List[str]
+    analyses: List[Dict[str, Any]]
+    clause_types: Tuple[str, ...]
+    clause_presence: np.ndarray          # bool, documents x clause_types
+    clause_strength: np.ndarray          # best keyword relevance per clause type, 0 if absent
+    missing_clauses: List[str]
+    missing: np.ndarray                  # bool, documents x missing_clauses
+    financial_features: Tuple[str, ...]
+    financial: np.ndarray                # float, documents x financial_features
+    scores: np.ndarray                   # float, documents x SCORE_FEATURES
+    risk_levels: np.ndarray              # 0 low, 1 medium, 2 high
+    pairwise: Dict[str, np.ndarray] = field(default_factory=dict)
+    outliers: List[Dict[str, Any]] = field(default_factory=list)
+    missing_clusters: List[Dict[str, Any]] = field(default_factory=list)
+    co_missing: Optional[np.ndarray] = None
+
+    def pair(self, i: int, j: int) -> Dict[str, Any]:
+        """compare_contracts-style summary of two documents, read from the matrices."""
+        types = np.array(self.clause_types, dtype=object)
+        p_i, p_j = self.clause_presence[i], self.clause_presence[j]
+        missing = np.array(self.missing_clauses, dtype=object)
+        m_i, m_j = self.missing[i], self.missing[j]
+        return {
+            'documents': (self.names[i], self.names[j]),
+            'risk_difference': int(self.pairwise['risk_level'][i, j]),
+            'complexity_difference': round(float(self.pairwise['complexity'][i, j]), 1),
+            'clause_differences': {
+                'common_clauses': list(types[p_i & p_j]),
+                'unique_to_first': list(types[p_i & ~p_j]),
+                'unique_to_second': list(types[p_j & ~p_i]),
+            },
+            'missing_clause_comparison': {
+                'first_missing': int(m_i.sum()),
+                'second_missing': int(m_j.sum()),
+                'unique_to_first': list(missing[m_i & ~m_j]),
+                'unique_to_second': list(missing[m_j & ~m_i]),
+            },
+            'financial_distance': round(float(self.pairwise['financial'][i, j]), 3),
+        }
+
+    def most_different_pairs(self, top: int = 10, metric: str = 'clause') -> List[Tuple[str, str, float]]:
+        d = self.pairwise[metric]
+        iu, ju = np.triu_indices(len(self.names), k=1)
+        values = d[iu, ju]
+        order = np.argsort(-values, kind='stable')[:top]
+        return [(self.names[iu[k]], self.names[ju[k]], float(values[k])) for k in order]
+
+def build_portfolio(names: List[str], analyses: List[Dict[str, Any]]) -> PortfolioComparison:
+    n = len(analyses)
+    type_index = {t: k for k, t in enumerate(CLAUSE_TYPES)}
+    presence = np.zeros((n, len(CLAUSE_TYPES)), dtype=bool)
+    strength = np.zeros((n, len(CLAUSE_TYPES)), dtype=float)
+    missing_names = sorted({c['clause'] for a in analyses for c in a['missing_clauses']})
+    missing_index = {c: k for k, c in enumerate(missing_names)}
+    missing = np.zeros((n, len(missing_names)), dtype=bool)
+    financial = np.zeros((n, len(FINANCIAL_FEATURES)), dtype=float)
+    scores = np.zeros((n, len(SCORE_FEATURES)), dtype=float)
+    risk_levels = np.zeros(n, dtype=int)
+
+    for i, a in enumerate(analyses):
+        for clause in a['key_clauses']:
+            k = type_index.get(clause['type'])
+            if k is not None:
+                presence[i, k] = True
+                strength[i, k] = max(strength[i, k], clause['relevance_score'])
+        for clause in a['missing_clauses']:
+            missing[i, missing_index[clause['clause']]] = True
+        financial[i] = financial_vector(a['financial_terms'])
+        scores[i] = (a['risk_assessment']['score'], a['complexity_score']['score'],
+                     len(a['missing_clauses']), len(a['red_flags']))
+        risk_levels[i] = RISK_LEVELS.get(a['risk_assessment']['level'], 0)
+
+    comparison = PortfolioComparison(
+        names=names, analyses=analyses, clause_types=CLAUSE_TYPES,
+        clause_presence=presence, clause_strength=strength,
+        missing_clauses=missing_names, missing=missing,
+        financial_features=FINANCIAL_FEATURES, financial=financial,
+        scores=scores, risk_levels=risk_levels,
+    )
+    if n:
+        _pairwise(comparison)
+        _outliers(comparison)
+        _missing_clusters(comparison)
+    return comparison
+
+# ---------- vectorized comparisons ----------
+def _pairwise(c: PortfolioComparison) -> None:
+    p = c.clause_presence.astype(np.int16)
+    m = c.missing.astype(np.int16)
+    # Hamming distances through one matrix product each: |a xor b| = |a| + |b| - 2|a and b|
+    p_sum, m_sum = p.sum(axis=1), m.sum(axis=1)
+    c.pairwise['clause'] = (p_sum[:, None] + p_sum[None, :] - 2 * (p @ p.T)).astype(float)
+    c.pairwise['missing'] = (m_sum[:, None] + m_sum[None, :] - 2 * (m @ m.T)).astype(float)
+    # signed like compare_contracts: [i, j] is document j minus document i
+    c.pairwise['risk_level'] = c.risk_levels[None, :] - c.risk_levels[:, None]
+    c.pairwise['risk_score'] = c.scores[None, :, 0] - c.scores[:, None, 0]
+    c.pairwise['complexity'] = c.scores[None, :, 1] - c.scores[:, None, 1]
+    # financial vectors on a log scale, standardized per feature, then Euclidean
+    f = np.log1p(np.maximum(c.financial, 0.0))
+    std = f.std(axis=0)
+    f = (f - f.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    sq = (f * f).sum(axis=1)
+    c.pairwise['financial'] = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2 * (f @ f.T), 0.0))
+
+def _outliers(c: PortfolioComparison, cutoff: float = OUTLIER_Z) -> None:
+    features = SCORE_FEATURES + c.financial_features
+    x = np.hstack([c.scores, c.financial])
+    z = robust_z(x)
+    median = np.median(x, axis=0)
+    rows, cols = np.nonzero(np.abs(z) > cutoff)
+    for i, k in zip(rows.tolist(), cols.tolist()):
+        c.outliers.append({
+            'document': c.names[i],
+            'feature': features[k],
+            'value': round(float(x[i, k]), 2),
+            'portfolio_median': round(float(median[k]), 2),
+            'z_score': round(float(z[i, k]), 2),
+            'direction': 'above' if z[i, k] > 0 else 'below',
+        })
+    c.outliers.sort(key=lambda o: -abs(o['z_score']))
+
+def _missing_clusters(c: PortfolioComparison) -> None:
+    if not c.missing_clauses:
+        return
+    # documents with the same set of missing clauses form one cluster
+    patterns, inverse, counts = np.unique(c.missing, axis=0, return_inverse=True, return_counts=True)
+    inverse = np.asarray(inverse).reshape(-1)
+    names = np.array(c.names, dtype=object)
+    clauses = np.array(c.missing_clauses, dtype=object)
+    for k in np.argsort(-counts, kind='stable'):
+        if not patterns[k].any():
+            continue
+        c.missing_clusters.append({
+            'missing_clauses': list(clauses[patterns[k]]),
+            'documents': list(names[inverse == k]),
+            'size': int(counts[k]),
+        })
+    m = c.missing.astype(np.int32)
+    c.co_missing = m.T @ m      # clause x clause: documents missing both
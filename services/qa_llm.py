@@ -2,11 +2,12 @@
 import re
 from typing import List
 
+from services.text_normalization import normalize_whitespace
+
 _SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
-_WS = re.compile(r"\s+")
 
 def _norm(s: str) -> str:
-    return _WS.sub(" ", s or "").strip()
+    return normalize_whitespace(s)
 
 def _keywords(q: str) -> List[str]:
     q = (q or "").lower()
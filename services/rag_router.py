@@ -4,13 +4,15 @@ import streamlit as st
 from typing import List, Dict
 from services.retriever_tf_idf import TinyTfidfQARetriever
 from services.retriever_hybrid import HybridRetriever, Chunk
+from services.text_normalization import collapse_whitespace
 
 
 try:
  
-    from summarizer2 import extract_text as _extract_text_from_path  
+    from services.extraction import extract_text as _extract_text_from_path, load_cached_pages
 except Exception:
     _extract_text_from_path = None
+    load_cached_pages = None
 
 
 # ---------- tiny deterministic tools ( fast answers) ----------
@@ -19,7 +21,7 @@ def _src(label, preview):
 
 def _norm(q: str) -> str:
     t = re.sub(r"[^a-z0-9 ]+", " ", (q or "").lower())
-    t = " " + re.sub(r"\s+", " ", t) + " "
+    t = " " + collapse_whitespace(t) + " "
     # light synonym/alias normalization
     t = (t.replace(" customers ", " clients ")
            .replace(" docs ", " documents ")
@@ -102,7 +104,7 @@ def _prep_documents_for_index():
         text = (d.get("content_text") or d.get("content") or d.get("summary") or "").strip()
         if not text:
             continue  # skip unindexable docs
-        prepped.append({
+        entry = {
             "name": d.get("name", "Untitled"),
             "client": d.get("client", ""),
             "matter": d.get("matter", ""),
@@ -110,7 +112,13 @@ def _prep_documents_for_index():
             "status": d.get("status", ""),
             "text": text,
             "summary": d.get("summary") or "",
-        })
+        }
+        # uploaded PDFs are chunked page by page from the extraction cache
+        key = d.get("content_pages_key")
+        pages = load_cached_pages(key) if key and load_cached_pages else None
+        if pages:
+            entry["pages"] = pages
+        prepped.append(entry)
     return prepped
 
 def _split_chunks(text: str, words: int = 320, overlap: int = 64):
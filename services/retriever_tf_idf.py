@@ -2,10 +2,12 @@
 from __future__ import annotations
 import re
 from dataclasses import dataclass
-from typing import List, Dict, Iterable, Tuple
+from typing import List, Dict, Iterable, Iterator, Tuple
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from services.text_normalization import normalize_whitespace
+
 try:
     from services.qa_llm import answer_from_context_extractive
 except Exception:
@@ -67,27 +69,42 @@ class TinyTfidfQARetriever:
     # ---------- building ----------
     @staticmethod
     def _clean(s: str) -> str:
-        return re.sub(r"\s+", " ", (s or "").strip())
+        return normalize_whitespace(s)
+
+    @staticmethod
+    def iter_word_chunks(pages: Iterable[str], words: int = 350, overlap: int = 50) -> Iterator[str]:
+        """
+        Yield overlapping word chunks from a stream of page texts.
+        Chunks are emitted as soon as enough words have arrived, so callers can
+        index a PDF while later pages are still being extracted.
+        """
+        buf: List[str] = []
+        fresh = 0  # words in buf not yet emitted in any chunk
+        step = max(words - overlap, 1)
+        for page in pages:
+            toks = TinyTfidfQARetriever._clean(page).split()
+            if not toks:
+                continue
+            buf.extend(toks)
+            fresh += len(toks)
+            while len(buf) >= words:
+                yield " ".join(buf[:words])
+                fresh = len(buf) - words
+                buf = buf[step:]
+        if fresh > 0:
+            yield " ".join(buf)
 
     @staticmethod
     def build_chunks_from_documents(docs: Iterable[Dict], words: int = 350, overlap: int = 50) -> List[Dict]:
-        """Split each document text into overlapping word chunks."""
+        """Split each document text (or its `pages` stream) into overlapping word chunks."""
         out: List[Dict] = []
         for d in docs or []:
             name = d.get("name") or d.get("doc_name") or "Document"
             client = d.get("client") or "—"
-            raw = TinyTfidfQARetriever._clean(d.get("text") or d.get("content_text") or d.get("summary") or "")
-            if not raw:
-                continue
-            tokens = raw.split()
-            if not tokens:
-                continue
-            i = 0
-            cid = 0
-            while i < len(tokens):
-                j = min(i + words, len(tokens))
-                chunk_tokens = tokens[i:j]
-                text = " ".join(chunk_tokens)
+            pages = d.get("pages")
+            if pages is None:
+                pages = [d.get("text") or d.get("content_text") or d.get("summary") or ""]
+            for cid, text in enumerate(TinyTfidfQARetriever.iter_word_chunks(pages, words, overlap)):
                 out.append({
                     "doc_name": name,
                     "client": client,
@@ -95,10 +112,6 @@ class TinyTfidfQARetriever:
                     "text": text,
                     "preview": text[:300],
                 })
-                cid += 1
-                if j == len(tokens):
-                    break
-                i = max(j - overlap, i + 1)
         return out
 
     # ---------- retrieval ----------
@@ -0,0 +1,309 @@
+# services/risk_register.py
+"""
+Contract risk register of one organization.
+
+RiskRegister.scan(corpus) runs AIAnalysisSystem's risk_assessment and
+red_flags analyzers over every document in the library and keeps one
+RiskRecord per document id, persisted as JSON under
+LEGALDOC_CACHE_DIR/risk_register/<organization>.json. Each organization
+has its own register (get_risk_register(organization_code)); sessions
+update it through services.document_library on upload and delete.
+
+Rescans are incremental: a document whose text hash and analyzer versions
+match its stored record is not rescored, so after the first scan only new
+or edited documents cost anything. Scoring runs on a process pool
+(services.batch_runner) and goes through the analysis cache, so documents
+already seen by analyze_contract are free.
+
+A sorted index of (risk level, score, critical flags) is maintained on
+every insert and removal; high_risk() and the level views slice it instead
+of re-sorting the register.
+"""
+from __future__ import annotations
+
+import os
+import re
+import json
+import bisect
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.ai_analysis import CONTRACT_ANALYZER_VERSIONS, AIAnalysisSystem
+from services.analysis_cache import text_sha256
+from services.batch_runner import ProgressFn, run_batch
+from services.extraction import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+RISK_REGISTER_DIR = CACHE_DIR / "risk_register"      # one <organization>.json per organization
+DEFAULT_ORGANIZATION = "default"
+RISK_FIELDS = ('risk_assessment', 'red_flags')
+LEVEL_RANK = {'high': 2, 'medium': 1, 'low': 0}
+SEVERITY_RANK = {'critical': 3, 'high': 2, 'medium': 1, 'low': 0}
+
+# (id, name, text) of one library document
+CorpusEntry = Tuple[str, str, str]
+IndexKey = Tuple[int, float, int, str]
+
+@dataclass
+class RiskRecord:
+    document_id: str
+    name: str
+    document_hash: str
+    level: str
+    score: float
+    red_flags: List[Dict[str, Any]] = field(default_factory=list)
+    analyzer_versions: Dict[str, int] = field(default_factory=dict)
+    scanned_at: str = ""
+
+    @property
+    def critical_flags(self) -> int:
+        return sum(1 for f in self.red_flags if f.get('severity') == 'critical')
+
+    @property
+    def top_severity(self) -> str:
+        return max((f.get('severity', 'low') for f in self.red_flags),
+                   key=lambda s: SEVERITY_RANK.get(s, 0), default='none')
+
+    def index_key(self) -> IndexKey:
+        # ascending order puts the riskiest documents first
+        return (-LEVEL_RANK.get(self.level, 0), -self.score, -self.critical_flags, self.document_id)
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            'Document': self.name,
+            'Risk Level': self.level.title(),
+            'Risk Score': self.score,
+            'Red Flags': len(self.red_flags),
+            'Top Severity': self.top_severity.title(),
+            'Scanned': self.scanned_at[:16].replace('T', ' '),
+        }
+
+@dataclass
+class ScanReport:
+    scanned: int = 0          # documents rescored
+    unchanged: int = 0        # skipped, hash and analyzer versions matched
+    removed: int = 0          # records dropped, no longer in the corpus
+    failed: Dict[str, str] = field(default_factory=dict)   # document id -> error
+
+def as_corpus_entries(documents: Iterable[Any]) -> Iterator[CorpusEntry]:
+    """
+    Normalize library documents: models.document.Document objects, the
+    Documents page's session dicts, or (id, text) / (id, name, text) tuples.
+    Documents without text are skipped.
+    """
+    for doc in documents:
+        if isinstance(doc, (tuple, list)):
+            doc_id, name, text = (doc[0], doc[0], doc[1]) if len(doc) == 2 else doc
+        elif isinstance(doc, dict):
+            doc_id = doc.get('id')
+            name = doc.get('name') or doc.get('original_filename') or doc_id
+            text = doc.get('content_text') or doc.get('extracted_text') or ''
+        else:
+            doc_id = getattr(doc, 'id', None)
+            name = getattr(doc, 'name', None) or doc_id
+            text = getattr(doc, 'extracted_text', '') or ''
+        if doc_id and text:
+            yield str(doc_id), str(name), text
+
+def organization_key(organization_code: Optional[str]) -> str:
+    """Normalized organization code, safe as a file or directory name."""
+    code = re.sub(r"[^\w.-]", "_", str(organization_code or "").strip().lower())
+    return code.strip(".") or DEFAULT_ORGANIZATION
+
+def current_versions() -> Dict[str, int]:
+    return {name: CONTRACT_ANALYZER_VERSIONS[name] for name in RISK_FIELDS}
+
+class RiskRegister:
+    """Persistent per-document risk results with a maintained risk-ordered index."""
+
+    def __init__(self, path: Optional[Path] = None, persist: bool = True,
+                 organization_code: str = DEFAULT_ORGANIZATION):
+        self.organization_code = organization_key(organization_code)
+        self.path = Path(path) if path is not None else RISK_REGISTER_DIR / f"{self.organization_code}.json"
+        self.persist = persist
+        self._records: Dict[str, RiskRecord] = {}
+        self._index: List[IndexKey] = []
+        self._lock = threading.RLock()
+        if persist:
+            self._load()
+
+    # ---------- storage ----------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable risk register {self.path}: {e}")
+            return
+        for raw in data.get('records', []):
+            try:
+                self._insert(RiskRecord(**raw))
+            except TypeError:
+                continue
+
+    def save(self) -> None:
+        if not self.persist:
+            return
+        with self._lock:
+            payload = json.dumps({'records': [asdict(r) for r in self._records.values()]}, ensure_ascii=False)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(payload)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write risk register: {e}")
+
+    # ---------- index maintenance ----------
+    def _insert(self, record: RiskRecord) -> None:
+        self._remove(record.document_id)
+        self._records[record.document_id] = record
+        bisect.insort(self._index, record.index_key())
+
+    def _remove(self, document_id: str) -> bool:
+        old = self._records.pop(document_id, None)
+        if old is None:
+            return False
+        key = old.index_key()
+        i = bisect.bisect_left(self._index, key)
+        if i < len(self._index) and self._index[i] == key:
+            del self._index[i]
+        return True
+
+    # ---------- scanning ----------
+    def stale(self, entries: Iterable[CorpusEntry]) -> List[Tuple[CorpusEntry, str]]:
+        """Entries (with their text hash) that are new, edited or scored by older analyzers."""
+        versions = current_versions()
+        out = []
+        with self._lock:
+            for entry in entries:
+                doc_hash = text_sha256(entry[2])
+                record = self._records.get(entry[0])
+                if (record is None or record.document_hash != doc_hash
+                        or record.analyzer_versions != versions):
+                    out.append((entry, doc_hash))
+                elif record.name != entry[1]:
+                    self._insert(RiskRecord(**{**asdict(record), 'name': entry[1]}))
+        return out
+
+    def scan(self, documents: Iterable[Any], workers: Optional[int] = None,
+             full_corpus: bool = False, timeout: Optional[float] = None,
+             progress: Optional[ProgressFn] = None) -> ScanReport:
+        """
+        Bring the register up to date with `documents` (see as_corpus_entries).
+        Only new or changed documents are rescored. With full_corpus=True,
+        records of documents no longer present are dropped, so pass it only
+        when `documents` is the whole firm library, never one session's list;
+        single deletions go through discard().
+        """
+        entries = list(as_corpus_entries(documents))
+        report = ScanReport()
+        pending = self.stale(entries)
+        report.unchanged = len(entries) - len(pending)
+
+        versions = current_versions()
+        jobs = [text for (_, _, text), _ in pending]
+        for res in run_batch(_score_document_job, jobs, workers=workers, timeout=timeout, progress=progress):
+            (doc_id, name, _), doc_hash = pending[res.index]
+            if not res.ok:
+                report.failed[doc_id] = res.error
+                continue
+            risk = res.value['risk_assessment']
+            record = RiskRecord(
+                document_id=doc_id, name=name, document_hash=doc_hash,
+                level=risk['level'], score=float(risk['score']),
+                red_flags=res.value['red_flags'], analyzer_versions=versions,
+                scanned_at=datetime.now().isoformat(timespec='seconds'),
+            )
+            with self._lock:
+                self._insert(record)
+            report.scanned += 1
+
+        if full_corpus:
+            present = {doc_id for doc_id, _, _ in entries}
+            with self._lock:
+                for doc_id in [d for d in self._records if d not in present]:
+                    self._remove(doc_id)
+                    report.removed += 1
+
+        if report.scanned or report.removed:
+            self.save()
+        logger.info(f"Risk scan: {report.scanned} scored, {report.unchanged} unchanged, "
+                    f"{report.removed} removed, {len(report.failed)} failed")
+        return report
+
+    def discard(self, document_id: str) -> bool:
+        with self._lock:
+            removed = self._remove(document_id)
+        if removed:
+            self.save()
+        return removed
+
+    # ---------- views ----------
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, document_id: str) -> Optional[RiskRecord]:
+        return self._records.get(document_id)
+
+    def ranked(self, level: Optional[str] = None, limit: Optional[int] = None) -> List[RiskRecord]:
+        """Records riskiest first, optionally only one risk level."""
+        with self._lock:
+            index = self._index
+            if level is not None:
+                # one level is a contiguous run of the index
+                rank = -LEVEL_RANK.get(level, 0)
+                lo = bisect.bisect_left(index, (rank,))
+                hi = bisect.bisect_left(index, (rank + 1,))
+                index = index[lo:hi]
+            if limit is not None:
+                index = index[:limit]
+            return [self._records[key[-1]] for key in index]
+
+    def high_risk(self, limit: Optional[int] = 20) -> List[RiskRecord]:
+        return self.ranked('high', limit)
+
+    def level_counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = Counter(r.level for r in self._records.values())
+        return {level: counts.get(level, 0) for level in LEVEL_RANK}
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self._records.values())
+        flags = Counter(f['type'] for r in records for f in r.red_flags)
+        return {
+            'documents': len(records),
+            'levels': self.level_counts(),
+            'average_score': round(sum(r.score for r in records) / len(records), 1) if records else 0.0,
+            'red_flags': dict(flags.most_common()),
+        }
+
+# ---------- shared register ----------
+_shared_registers: Dict[str, RiskRegister] = {}
+_shared_lock = threading.Lock()
+
+def get_risk_register(organization_code: Optional[str] = None) -> RiskRegister:
+    """The risk register of one organization."""
+    org = organization_key(organization_code)
+    with _shared_lock:
+        register = _shared_registers.get(org)
+        if register is None:
+            register = _shared_registers[org] = RiskRegister(organization_code=org)
+        return register
+
+# ---------- batch worker (runs inside scan's pool) ----------
+_worker_system: Optional[AIAnalysisSystem] = None
+
+def _score_document_job(text: str) -> Dict[str, Any]:
+    global _worker_system
+    if _worker_system is None:
+        _worker_system = AIAnalysisSystem()
+    return _worker_system.analyze_fields(text, RISK_FIELDS)
@@ -0,0 +1,199 @@
+# services/text_index.py
+"""
+Token-level inverted index over document names, tags and text.
+
+Documents are tokenized once, when they are added, into lowercase
+alphanumeric terms. Each term keeps a postings map of document id ->
+weighted term frequency, where a name hit counts NAME_WEIGHT, a tag hit
+TAG_WEIGHT and a body hit 1. A query is answered from the postings alone:
+
+- every query term must match (AND)
+- `term*` matches every indexed term starting with `term`. With
+  prefix_last=True the final term is a prefix too, for search-as-you-type
+- term groups are intersected smallest first, and the survivors are ranked
+  by BM25
+
+So a search never lowercases or scans document text; it costs about the
+postings of its rarest term. Works with models.document.Document objects
+and the Documents page's session dicts.
+"""
+from __future__ import annotations
+
+import re
+import math
+import bisect
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Set, Tuple
+
+NAME_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SESSION_KEY = "doc_text_index"
+SESSION_SOURCE_KEY = "doc_text_index_source"      # the list object the session index was built from
+
+_TERM = re.compile(r"[a-z0-9]+")
+_QUERY_TERM = re.compile(r"[a-z0-9]+\*?")
+
+def tokenize(text: str) -> List[str]:
+    return _TERM.findall(text.lower()) if text else []
+
+def document_fields(doc: Any) -> Tuple[str, str, List[str], str]:
+    """(id, name, tags, body) of a Document or a session document dict."""
+    if isinstance(doc, dict):
+        body = ' '.join(filter(None, (doc.get('content_text') or doc.get('extracted_text'),
+                                      doc.get('description'))))
+        return str(doc.get('id')), doc.get('name') or '', list(doc.get('tags') or []), body
+    return str(doc.id), doc.name or '', list(doc.tags or []), doc.extracted_text or ''
+
+class TextIndex:
+    """Inverted index with prefix terms, AND semantics and BM25 ranking; thread-safe."""
+
+    def __init__(self, documents: Iterable[Any] = ()):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+        self._lock = threading.RLock()
+        for doc in documents:
+            self.add(doc)
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._doc_terms
+
+    # ---------- maintenance ----------
+    def add(self, doc: Any) -> None:
+        """Index a document (replacing any earlier entry with its id)."""
+        doc_id, name, tags, body = document_fields(doc)
+        weights = Counter(tokenize(body))
+        for term in tokenize(name):
+            weights[term] += NAME_WEIGHT
+        for term in tokenize(' '.join(tags)):
+            weights[term] += TAG_WEIGHT
+        with self._lock:
+            self.remove(doc_id)
+            all_postings, vocab_size = self._postings, len(self._postings)
+            for term, weight in weights.items():
+                try:
+                    all_postings[term][doc_id] = weight
+                except KeyError:
+                    all_postings[term] = {doc_id: weight}
+            if len(all_postings) != vocab_size:
+                self._vocab_dirty = True
+            self._doc_terms[doc_id] = tuple(weights)
+            length = float(sum(weights.values()))
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    update = add
+
+    def remove(self, document_id: str) -> bool:
+        with self._lock:
+            terms = self._doc_terms.pop(document_id, None)
+            if terms is None:
+                return False
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(document_id, None)
+                    if not postings:
+                        del self._postings[term]     # left in _vocab; skipped on lookup
+            self._total_len -= self._doc_len.pop(document_id)
+            return True
+
+    # ---------- querying ----------
+    def _expand(self, term: str, prefix: bool) -> List[Dict[str, float]]:
+        if not prefix:
+            postings = self._postings.get(term)
+            return [postings] if postings else []
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        # every vocabulary term in [term, term + '\uffff') starts with `term`
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = bisect.bisect_left(self._vocab, term + '\uffff', lo)
+        postings = (self._postings.get(candidate) for candidate in self._vocab[lo:hi])
+        return [p for p in postings if p]
+
+    def parse(self, query: str, prefix_last: bool = True) -> List[Tuple[str, bool]]:
+        """(term, is_prefix) pairs of a query."""
+        terms = [(t.rstrip('*'), t.endswith('*')) for t in _QUERY_TERM.findall((query or '').lower())]
+        if terms and prefix_last and query[-1:].isalnum():
+            terms[-1] = (terms[-1][0], True)
+        return terms
+
+    def search(self, query: str, limit: Optional[int] = None,
+               prefix_last: bool = True) -> List[Tuple[str, float]]:
+        """(document id, score) of documents matching every query term, best first."""
+        terms = self.parse(query, prefix_last)
+        if not terms:
+            return []
+        with self._lock:
+            groups = []
+            for term, prefix in dict.fromkeys(terms):
+                expansions = self._expand(term, prefix)
+                if not expansions:
+                    return []
+                groups.append(expansions)
+            # smallest group first; the others only probe the survivors
+            groups.sort(key=lambda g: sum(len(p) for p in g))
+            first = groups[0]
+            candidates: Set[str] = set(first[0]) if len(first) == 1 else set().union(*first)
+            for group in groups[1:]:
+                if len(group) == 1:
+                    candidates = {d for d in candidates if d in group[0]}
+                elif len(candidates) * len(group) <= sum(len(p) for p in group):
+                    candidates = {d for d in candidates if any(d in p for p in group)}
+                else:
+                    # a short prefix with many expansions: one pass over their postings
+                    candidates &= set().union(*group)
+                if not candidates:
+                    return []
+
+            n = len(self._doc_terms)
+            avg_len = self._total_len / n if n else 1.0
+            scores = dict.fromkeys(candidates, 0.0)
+            for group in groups:
+                for postings in group:
+                    idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if len(postings) < len(candidates):
+                        hits = [(d, tf) for d, tf in postings.items() if d in scores]
+                    else:
+                        hits = [(d, postings[d]) for d in candidates if d in postings]
+                    for d, tf in hits:
+                        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_len[d] / avg_len)
+                        scores[d] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit is not None else ranked
+
+    def ids(self, query: str, prefix_last: bool = True) -> Set[str]:
+        return {doc_id for doc_id, _ in self.search(query, prefix_last=prefix_last)}
+
+def session_text_index(session_state: MutableMapping[str, Any], key: str = "documents") -> TextIndex:
+    """
+    The TextIndex kept next to session_state[key], built on first use.
+    services.document_library keeps it current (add, update, remove), so a
+    lookup costs nothing per document. It is rebuilt only when the list
+    itself was replaced by one it has not seen (rebind_session_text_index()
+    tells it about a replacement it already matches).
+    """
+    documents = session_state.get(key)
+    if documents is None:
+        documents = session_state[key] = []
+    index = session_state.get(SESSION_KEY)
+    if index is None or session_state.get(SESSION_SOURCE_KEY) is not documents:
+        index = TextIndex(documents)
+        session_state[SESSION_KEY] = index
+        session_state[SESSION_SOURCE_KEY] = documents
+    return index
+
+def rebind_session_text_index(session_state: MutableMapping[str, Any], key: str = "documents") -> None:
+    """session_state[key] was replaced by a list the index already matches (e.g. after a delete)."""
+    session_state[SESSION_SOURCE_KEY] = session_state.get(key)
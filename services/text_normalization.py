@@ -0,0 +1,109 @@
+# services/text_normalization.py
+"""
+Text normalization shared by the summarizer, fact extraction and the Q&A
+index.
+
+Everything here runs in linear time: whitespace is collapsed with
+str.split, and repeated-word cleanup (OCR artefacts like "the the the")
+is a single scan over word tokens instead of a backreference regex.
+Results for large documents are cached by content hash, so a document is
+normalized once no matter how many features read it.
+"""
+from __future__ import annotations
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+CACHE_MIN_CHARS = 4096    # shorter strings are cheaper to normalize than to hash
+CACHE_MAX_DOCS = 256
+REPEAT_MIN_RUN = 3        # a word repeated this many times in a row is collapsed
+
+_WORD_OR_GAP = re.compile(r"\w+|\W+")
+_WORD_START = re.compile(r"\w")
+
+# ---------- primitives (uncached) ----------
+def collapse_whitespace(s: str) -> str:
+    """Runs of whitespace become one space; leading/trailing whitespace is dropped."""
+    return " ".join((s or "").split())
+
+def _is_stutter(word: str, unit: str = "The") -> bool:
+    # "TheTheThe" - OCR dropped the spaces between repeats
+    n = len(unit)
+    return len(word) >= n * REPEAT_MIN_RUN and len(word) % n == 0 and word == unit * (len(word) // n)
+
+def collapse_repeats(s: str) -> str:
+    """
+    Collapse a word repeated REPEAT_MIN_RUN+ times in a row (separated by
+    single spaces) to one occurrence. Expects whitespace already collapsed.
+    """
+    tokens: List[str] = _WORD_OR_GAP.findall(s)
+    # maximal \w+ / \W+ runs strictly alternate, so parity tells words from gaps
+    word_parity = 0 if tokens and _WORD_START.match(tokens[0]) else 1
+    out: List[str] = []
+    i, n = 0, len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if i % 2 != word_parity:
+            out.append(tok)
+            i += 1
+            continue
+        if _is_stutter(tok):
+            tok = "The"
+        # tokens alternate word / gap, so repeats sit at i, i+2, i+4, ...
+        j = i
+        while j + 2 < n and tokens[j + 1] == " " and tokens[j + 2] == tok:
+            j += 2
+        out.append(tok)
+        i = j + 1 if (j - i) // 2 + 1 >= REPEAT_MIN_RUN else i + 1
+    return "".join(out)
+
+# ---------- per-document cache ----------
+_cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+def _remember(key: str, form: str, value: str) -> None:
+    with _cache_lock:
+        entry = _cache.setdefault(key, {})
+        entry[form] = value
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_DOCS:
+            _cache.popitem(last=False)
+
+def _cached(text: str, form: str, build) -> str:
+    if len(text) < CACHE_MIN_CHARS:
+        return build(text)
+    key = text_digest(text)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            if form in entry:
+                return entry[form]
+    value = build(text)
+    _remember(key, form, value)
+    return value
+
+def normalize_whitespace(text: str) -> str:
+    """collapse_whitespace, cached per document hash for large texts."""
+    return _cached(text or "", "ws", collapse_whitespace)
+
+def _build_clean(text: str) -> str:
+    cleaned = collapse_repeats(normalize_whitespace(text)).strip()
+    if len(cleaned) >= CACHE_MIN_CHARS and cleaned != text:
+        # cleaning is idempotent: callers that re-clean the output hit the cache too
+        _remember(text_digest(cleaned), "clean", cleaned)
+    return cleaned
+
+def clean_text(text: str) -> str:
+    """Whitespace-collapsed text with OCR word repeats removed (summaries, key facts)."""
+    return _cached(text or "", "clean", _build_clean)
+
+def clear_normalization_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
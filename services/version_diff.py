@@ -0,0 +1,272 @@
+# services/version_diff.py
+"""
+Clause-aligned diff between two versions of a document.
+
+Both texts are cut into segments (sentences, clause headings, lines) that
+tile the text exactly. With ignore_whitespace a single line break does not
+end a segment (only sentence terminators and blank lines do), so rewrapped
+text segments the same way. Segments are compared through their (cached)
+string hashes and aligned with patience diff: segments that occur exactly
+once in both versions are anchors, the longest increasing run of anchors
+is kept, and the gaps between anchors are aligned recursively (difflib on
+the segment lists when a gap has no unique segment). Only segments that
+changed are then diffed by word tokens (characters for near-identical
+words), so a 300-page redline costs one pass over the text plus work
+proportional to the edits, instead of difflib's quadratic scan of the
+whole document.
+"""
+from __future__ import annotations
+
+import re
+import bisect
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+# a segment ends after a sentence terminator (plus closing quotes/brackets)
+# followed by whitespace, or after a line break; trailing whitespace stays
+# with the segment so segments tile the text
+_SEGMENT_END = re.compile(r'[.!?;:]+["\')\]]*\s+|\n\s*')
+# the same, but a line break ends a segment only at a blank line
+_PARAGRAPH_END = re.compile(r'[.!?;:]+["\')\]]*\s+|\n[ \t\r\f\v]*\n\s*')
+_INLINE_TOKEN = re.compile(r'\w+|\s+|[^\w\s]')
+
+CHAR_DIFF_MAX = 4000          # longest replaced token pair refined to a character diff
+CHAR_REFINE_RATIO = 0.6       # ... and only when the two tokens are this similar
+INLINE_DIFF_MAX = 200_000     # larger changed blocks are shown as delete + insert
+FALLBACK_MAX_CELLS = 4_000_000  # anchorless gaps bigger than this are not aligned further
+
+Opcode = Tuple[str, int, int, int, int]
+
+def segment_spans(text: str, split_lines: bool = True) -> List[Tuple[int, int]]:
+    """
+    (start, end) of each segment; consecutive spans cover `text` exactly.
+    With split_lines=False a single line break does not end a segment.
+    """
+    spans, start = [], 0
+    for m in (_SEGMENT_END if split_lines else _PARAGRAPH_END).finditer(text):
+        spans.append((start, m.end()))
+        start = m.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def _segment_keys(text: str, spans: Sequence[Tuple[int, int]], ignore_whitespace: bool) -> List[str]:
+    if ignore_whitespace:
+        return [' '.join(text[a:b].split()) for a, b in spans]
+    return [text[a:b] for a, b in spans]
+
+# ---------- patience alignment ----------
+def _unique_anchors(a: Sequence, b: Sequence, alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Longest increasing sequence of (i, j) pairs of items unique in both ranges."""
+    first_a: Dict = {}
+    for i in range(alo, ahi):
+        first_a[a[i]] = -1 if a[i] in first_a else i
+    first_b: Dict = {}
+    for j in range(blo, bhi):
+        key = b[j]
+        if first_a.get(key, -1) >= 0:
+            first_b[key] = -1 if key in first_b else j
+    pairs = sorted((first_a[k], j) for k, j in first_b.items() if j >= 0)
+    if not pairs:
+        return []
+    # patience sorting on j: piles hold the smallest tail of each LIS length
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    back = [-1] * len(pairs)
+    for n, (_, j) in enumerate(pairs):
+        k = bisect.bisect_left(tails, j)
+        if k == len(tails):
+            tails.append(j)
+            tail_idx.append(n)
+        else:
+            tails[k] = j
+            tail_idx[k] = n
+        back[n] = tail_idx[k - 1] if k else -1
+    out, n = [], tail_idx[-1]
+    while n >= 0:
+        out.append(pairs[n])
+        n = back[n]
+    out.reverse()
+    return out
+
+def align(a: Sequence, b: Sequence) -> List[Tuple[int, int]]:
+    """Matched (i, j) index pairs between two sequences of hashable items, in order."""
+    matches: List[Tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+            matches.append((ahi, bhi))
+        if alo >= ahi or blo >= bhi:
+            continue
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if anchors:
+            pi, pj = alo, blo
+            for i, j in anchors:
+                matches.append((i, j))
+                stack.append((pi, i, pj, j))
+                pi, pj = i + 1, j + 1
+            stack.append((pi, ahi, pj, bhi))
+        elif (ahi - alo) * (bhi - blo) <= FALLBACK_MAX_CELLS:
+            sm = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, size in sm.get_matching_blocks():
+                matches.extend((alo + i + k, blo + j + k) for k in range(size))
+    matches.sort()
+    return matches
+
+def opcodes_from_matches(matches: Sequence[Tuple[int, int]], n_a: int, n_b: int) -> List[Opcode]:
+    """difflib-style (tag, i1, i2, j1, j2) opcodes covering both sequences."""
+    ops: List[Opcode] = []
+    i = j = 0
+    for mi, mj in list(matches) + [(n_a, n_b)]:
+        if i < mi or j < mj:
+            tag = 'replace' if i < mi and j < mj else ('delete' if i < mi else 'insert')
+            ops.append((tag, i, mi, j, mj))
+        if mi < n_a and mj < n_b:
+            if ops and ops[-1][0] == 'equal' and ops[-1][2] == mi:
+                ops[-1] = ('equal', ops[-1][1], mi + 1, ops[-1][3], mj + 1)
+            else:
+                ops.append(('equal', mi, mi + 1, mj, mj + 1))
+        i, j = mi + 1, mj + 1
+    return ops
+
+# ---------- inline diff ----------
+@dataclass
+class InlineChange:
+    op: str                   # equal, insert, delete, replace
+    old: str
+    new: str
+
+def inline_diff(old: str, new: str) -> List[InlineChange]:
+    """
+    Word-token diff of a changed block; a token replaced by a near-identical
+    one (year -> years) is refined to a character diff.
+    """
+    if len(old) + len(new) > INLINE_DIFF_MAX:
+        return [InlineChange('replace', old, new)]
+    a, b = _INLINE_TOKEN.findall(old), _INLINE_TOKEN.findall(new)
+    changes = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        old_part, new_part = ''.join(a[i1:i2]), ''.join(b[j1:j2])
+        if tag == 'replace' and i2 - i1 == 1 and j2 - j1 == 1 and len(old_part) + len(new_part) <= CHAR_DIFF_MAX:
+            chars = difflib.SequenceMatcher(None, old_part, new_part, autojunk=False)
+            if chars.ratio() >= CHAR_REFINE_RATIO:
+                changes.extend(InlineChange(t, old_part[x1:x2], new_part[y1:y2])
+                               for t, x1, x2, y1, y2 in chars.get_opcodes())
+                continue
+        changes.append(InlineChange(tag, old_part, new_part))
+    return changes
+
+# ---------- result ----------
+@dataclass
+class DiffHunk:
+    op: str                   # insert, delete, replace
+    old_start: int            # character offsets into the old / new text
+    old_end: int
+    new_start: int
+    new_end: int
+    old_text: str
+    new_text: str
+    inline: List[InlineChange] = field(default_factory=list)
+
+@dataclass
+class VersionDiff:
+    old_spans: List[Tuple[int, int]]
+    new_spans: List[Tuple[int, int]]
+    opcodes: List[Opcode]                 # over segments
+    hunks: List[DiffHunk]
+    old_length: int
+    new_length: int
+
+    @property
+    def unchanged_chars(self) -> int:
+        return sum(self.old_spans[i2 - 1][1] - self.old_spans[i1][0]
+                   for tag, i1, i2, _, _ in self.opcodes if tag == 'equal')
+
+    @property
+    def similarity(self) -> float:
+        total = self.old_length + self.new_length
+        return 1.0 if not total else 2.0 * self.unchanged_chars / total
+
+    def summary(self) -> Dict[str, int]:
+        counts = {'inserted_segments': 0, 'deleted_segments': 0, 'changed_segments': 0,
+                  'inserted_chars': 0, 'deleted_chars': 0}
+        changed = [op for op in self.opcodes if op[0] != 'equal']
+        for (tag, i1, i2, j1, j2), h in zip(changed, self.hunks):
+            if tag == 'insert':
+                counts['inserted_segments'] += j2 - j1
+            elif tag == 'delete':
+                counts['deleted_segments'] += i2 - i1
+            else:
+                counts['changed_segments'] += max(i2 - i1, j2 - j1)
+            for c in (h.inline or [InlineChange(h.op, h.old_text, h.new_text)]):
+                if c.op != 'equal':
+                    counts['deleted_chars'] += len(c.old)
+                    counts['inserted_chars'] += len(c.new)
+        return counts
+
+    def redline(self, old_text: str, new_text: str, context: int = 1) -> str:
+        """
+        Plain-text redline: deletions as [-...-], insertions as {+...+}, with
+        `context` unchanged segments around each change ('...' elsewhere).
+        """
+        parts: List[str] = []
+        hunks = iter(self.hunks)
+        last = len(self.opcodes) - 1
+        for n, (tag, i1, i2, j1, j2) in enumerate(self.opcodes):
+            if tag == 'equal':
+                segs = [new_text[a:b] for a, b in self.new_spans[j1:j2]]
+                head = segs[:context] if n > 0 else []
+                tail = segs[len(segs) - context:] if context and n < last else []
+                if len(head) + len(tail) < len(segs):
+                    parts.extend(head + ['...\n'] + tail)
+                else:
+                    parts.extend(segs)
+                continue
+            hunk = next(hunks)
+            for c in (hunk.inline or [InlineChange(hunk.op, hunk.old_text, hunk.new_text)]):
+                if c.op == 'equal':
+                    parts.append(c.new)
+                    continue
+                if c.old:
+                    parts.append(f"[-{c.old}-]")
+                if c.new:
+                    parts.append(f"{{+{c.new}+}}")
+        return ''.join(parts)
+
+def _char_range(spans: List[Tuple[int, int]], lo: int, hi: int, length: int) -> Tuple[int, int]:
+    start = spans[lo][0] if lo < len(spans) else length
+    return start, (spans[hi - 1][1] if lo < hi else start)
+
+def diff_versions(old_text: str, new_text: str, ignore_whitespace: bool = True,
+                  inline: bool = True) -> VersionDiff:
+    """
+    Segment-aligned diff of two document versions. With ignore_whitespace,
+    segments are cut at sentence ends and blank lines only, and segments
+    differing only in spacing or line wrapping count as equal.
+    """
+    split_lines = not ignore_whitespace
+    old_spans, new_spans = segment_spans(old_text, split_lines), segment_spans(new_text, split_lines)
+    old_keys = _segment_keys(old_text, old_spans, ignore_whitespace)
+    new_keys = _segment_keys(new_text, new_spans, ignore_whitespace)
+    matches = align(old_keys, new_keys)
+    ops = opcodes_from_matches(matches, len(old_keys), len(new_keys))
+
+    hunks = []
+    for tag, i1, i2, j1, j2 in ops:
+        if tag == 'equal':
+            continue
+        old_start, old_end = _char_range(old_spans, i1, i2, len(old_text))
+        new_start, new_end = _char_range(new_spans, j1, j2, len(new_text))
+        old_part, new_part = old_text[old_start:old_end], new_text[new_start:new_end]
+        hunks.append(DiffHunk(
+            op=tag, old_start=old_start, old_end=old_end, new_start=new_start, new_end=new_end,
+            old_text=old_part, new_text=new_part,
+            inline=inline_diff(old_part, new_part) if inline and tag == 'replace' else [],
+        ))
+    return VersionDiff(old_spans, new_spans, ops, hunks, len(old_text), len(new_text))
@@ -0,0 +1,189 @@
+# services/version_store.py
+"""
+Delta-compressed storage of document version text.
+
+Each document's versions form a chain. A version is stored either as a
+base snapshot (the zlib-compressed full text) or as a delta against the
+previous version: the segment alignment of services.version_diff turned
+into copy ranges of the previous text plus inserted text, JSON-encoded
+and zlib-compressed. A new base is written every REBASE_EVERY versions,
+or sooner when a delta would not be much smaller than a snapshot, so
+rebuilding any version reads one base and at most REBASE_EVERY - 1
+deltas.
+
+Blobs live on disk under LEGALDOC_CACHE_DIR/versions/<id[:2]>/<id>/ next to
+a small manifest. Memory only holds manifests and an LRU of recently
+rebuilt texts, so historical versions cost nothing until someone asks
+for their text.
+"""
+from __future__ import annotations
+
+import os
+import json
+import zlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from services.analysis_cache import text_sha256
+from services.extraction import CACHE_DIR
+from services.version_diff import diff_versions
+
+logger = logging.getLogger(__name__)
+
+VERSION_STORE_DIR = CACHE_DIR / "versions"
+REBASE_EVERY = 8              # longest chain of deltas behind a base
+REBASE_RATIO = 0.5            # a delta larger than this share of a snapshot becomes a snapshot
+TEXT_CACHE_ENTRIES = 16
+COMPRESSION_LEVEL = 6
+
+# delta ops: [start, end] copies previous_text[start:end]; a string is inserted
+DeltaOp = Union[List[int], str]
+
+def make_delta(old_text: str, new_text: str) -> List[DeltaOp]:
+    """Copy/insert instructions that turn old_text into new_text."""
+    diff = diff_versions(old_text, new_text, ignore_whitespace=False, inline=False)
+    ops: List[DeltaOp] = []
+    for tag, i1, i2, j1, j2 in diff.opcodes:
+        if tag == 'equal':
+            start, end = diff.old_spans[i1][0], diff.old_spans[i2 - 1][1]
+            if ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+                ops[-1][1] = end
+            else:
+                ops.append([start, end])
+        elif j1 < j2:
+            inserted = new_text[diff.new_spans[j1][0]:diff.new_spans[j2 - 1][1]]
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += inserted
+            else:
+                ops.append(inserted)
+    return ops
+
+def apply_delta(old_text: str, ops: List[DeltaOp]) -> str:
+    return ''.join(old_text[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+def _compress(payload: str) -> bytes:
+    return zlib.compress(payload.encode('utf-8'), COMPRESSION_LEVEL)
+
+def _decompress(blob: bytes) -> str:
+    return zlib.decompress(blob).decode('utf-8')
+
+class VersionStore:
+    """Base-plus-delta version chains per document; safe to share between threads."""
+
+    def __init__(self, root: Optional[Path] = None, cache_entries: int = TEXT_CACHE_ENTRIES):
+        self.root = Path(root) if root is not None else VERSION_STORE_DIR
+        self.cache_entries = cache_entries
+        self._manifests: Dict[str, List[Dict[str, Any]]] = {}
+        self._texts: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    # ---------- storage ----------
+    def _doc_dir(self, document_id: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in document_id)
+        return self.root / safe[:2] / safe
+
+    def _blob_path(self, document_id: str, index: int) -> Path:
+        return self._doc_dir(document_id) / f"v{index}.z"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def manifest(self, document_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = self._manifests.get(document_id)
+            if entries is None:
+                try:
+                    entries = json.loads((self._doc_dir(document_id) / "manifest.json").read_text())
+                except FileNotFoundError:
+                    entries = []
+                self._manifests[document_id] = entries
+            return entries
+
+    def _remember(self, key: Tuple[str, int], text: str) -> None:
+        self._texts[key] = text
+        self._texts.move_to_end(key)
+        while len(self._texts) > self.cache_entries:
+            self._texts.popitem(last=False)
+
+    # ---------- public API ----------
+    def add(self, document_id: str, text: str) -> int:
+        """Store the next version's text; returns its index in the chain (0-based)."""
+        with self._lock:
+            entries = self.manifest(document_id)
+            index = len(entries)
+            snapshot = _compress(text)
+            kind, blob = 'base', snapshot
+            if entries and index - entries[-1]['base'] < REBASE_EVERY:
+                delta = _compress(json.dumps(make_delta(self.text(document_id, index - 1), text),
+                                             ensure_ascii=False, separators=(',', ':')))
+                if len(delta) < REBASE_RATIO * len(snapshot):
+                    kind, blob = 'delta', delta
+            self._write(self._blob_path(document_id, index), blob)
+            entries.append({
+                'kind': kind,
+                'base': index if kind == 'base' else entries[-1]['base'],
+                'length': len(text),
+                'stored_bytes': len(blob),
+                'sha256': text_sha256(text),
+            })
+            self._write(self._doc_dir(document_id) / "manifest.json", json.dumps(entries).encode('utf-8'))
+            self._remember((document_id, index), text)
+            return index
+
+    def text(self, document_id: str, index: int) -> str:
+        """Rebuild one version: its base snapshot plus the deltas after it."""
+        with self._lock:
+            cached = self._texts.get((document_id, index))
+            if cached is not None:
+                self._texts.move_to_end((document_id, index))
+                return cached
+            entries = self.manifest(document_id)
+            if not 0 <= index < len(entries):
+                raise KeyError(f"{document_id} has no stored version {index}")
+            base = entries[index]['base']
+            # start from the newest cached version in this chain, if any
+            start, text = base, None
+            for k in range(index - 1, base - 1, -1):
+                if (document_id, k) in self._texts:
+                    start, text = k + 1, self._texts[(document_id, k)]
+                    break
+            if text is None:
+                text = _decompress(self._blob_path(document_id, base).read_bytes())
+                start = base + 1
+            for k in range(start, index + 1):
+                text = apply_delta(text, json.loads(_decompress(self._blob_path(document_id, k).read_bytes())))
+            if text_sha256(text) != entries[index]['sha256']:
+                raise ValueError(f"Stored version {index} of {document_id} failed its checksum")
+            self._remember((document_id, index), text)
+            return text
+
+    def stats(self, document_id: str) -> Dict[str, int]:
+        entries = self.manifest(document_id)
+        return {
+            'versions': len(entries),
+            'bases': sum(1 for e in entries if e['kind'] == 'base'),
+            'text_bytes': sum(e['length'] for e in entries),
+            'stored_bytes': sum(e['stored_bytes'] for e in entries),
+        }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._texts.clear()
+            self._manifests.clear()
+
+# ---------- shared store ----------
+_shared_store: Optional[VersionStore] = None
+_shared_lock = threading.Lock()
+
+def get_version_store() -> VersionStore:
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = VersionStore()
+        return _shared_store
@@ -0,0 +1,211 @@
+# services/windowed_analysis.py
+"""
+Windowed execution for very large documents.
+
+Text arrives as a stream of chunks (PDF pages, decoded slices of a text
+file) and is cut into overlapping windows of WINDOW_CHARS. Each window
+owns the matches that start in its first `window_chars - overlap`
+characters; the overlap only lets a match that starts near the end of a
+window finish. Merging the per-window scans by owned start offset gives
+one DocumentScan with absolute offsets, and nothing ever holds more than
+one window of text (plus the results). The results are bounded too: each
+pattern keeps only its first occurrence of a value, and at most
+MAX_MATCHES_PER_SPEC distinct values, so a document that repeats a date or
+a party name on every page does not grow the merged scan page by page.
+
+A match longer than the overlap is cut at the window edge, and regex
+context (lookbehind, \\b) is evaluated inside the window, so windowed
+results match a whole-text scan except for such edge cases.
+"""
+from __future__ import annotations
+
+import re
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from services.extraction_engine import DocumentScan, ExtractionEngine, ExtractionMatch
+
+WINDOW_CHARS = 256 * 1024
+OVERLAP_CHARS = 4096          # longest match guaranteed to be found whole
+MAX_MATCHES_PER_SPEC = 500    # distinct values kept per pattern across all windows
+
+SUMMARY_POOL_SIZE = 64        # candidate sentences kept for the running summary
+SENTENCE_MAX_CHARS = 64 * 1024  # an unterminated run longer than this is cut into a sentence
+
+@dataclass
+class TextWindow:
+    offset: int               # absolute offset of text[0]
+    text: str
+    owned: int                # matches starting before text[owned] belong to this window
+
+    @property
+    def owned_text(self) -> str:
+        return self.text[:self.owned]
+
+def iter_windows(chunks: Iterable[str], window_chars: int = WINDOW_CHARS,
+                 overlap: int = OVERLAP_CHARS) -> Iterator[TextWindow]:
+    """Cut a chunk stream into overlapping windows; owned parts tile the text exactly."""
+    if overlap >= window_chars:
+        raise ValueError("overlap must be smaller than window_chars")
+    step = window_chars - overlap
+    buf, offset = "", 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf += chunk
+        start = 0
+        while len(buf) - start >= window_chars:
+            yield TextWindow(offset, buf[start:start + window_chars], step)
+            start += step
+            offset += step
+        if start:
+            buf = buf[start:]
+    yield TextWindow(offset, buf, len(buf))
+
+# ---------- extraction scan ----------
+def scan_windows(windows: Iterable[TextWindow], engine: ExtractionEngine,
+                 groups: Optional[Iterable[str]] = None,
+                 on_window=None, max_matches: int = MAX_MATCHES_PER_SPEC) -> DocumentScan:
+    """
+    Scan every window and merge matches into one DocumentScan (absolute
+    offsets, empty text/lower). Per pattern, only the first match of each
+    value is kept, up to `max_matches` values; `on_window(window, scan)`
+    still sees every match of the window and lets callers feed other
+    accumulators from the same pass.
+    """
+    groups = tuple(groups) if groups is not None else None
+    merged: Dict[str, List[ExtractionMatch]] = {}
+    seen: Dict[str, Set] = {}
+    last_end: Dict[str, int] = {}
+    for window in windows:
+        scan = engine.scan(window.text, groups=groups)
+        for spec, matches in scan.by_spec.items():
+            kept = merged.setdefault(spec, [])
+            values = seen.setdefault(spec, set())
+            for m in matches:
+                if len(kept) >= max_matches:
+                    break
+                start = window.offset + m.start
+                # owned by an earlier window, or inside a match already kept
+                if m.start >= window.owned or start < last_end.get(spec, 0):
+                    continue
+                last_end[spec] = window.offset + m.end
+                if m.value in values:
+                    continue
+                values.add(m.value)
+                kept.append(ExtractionMatch(m.label, start, window.offset + m.end, m.value, m.spec))
+        if on_window is not None:
+            on_window(window, scan)
+    return DocumentScan(text="", lower="", by_spec=merged)
+
+# ---------- streaming accumulators ----------
+class DocumentDigest:
+    """SHA-256, character and word counts fed with the owned text of each window."""
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self.character_count = 0
+        self.word_count = 0
+        self._in_word = False
+
+    def update(self, part: str) -> None:
+        if not part:
+            return
+        self._sha.update(part.encode('utf-8'))
+        self.character_count += len(part)
+        words = len(part.split())
+        if words and self._in_word and not part[0].isspace():
+            words -= 1        # the word continues from the previous part
+        self.word_count += words
+        self._in_word = not part[-1].isspace()
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+_SENTENCE_END = re.compile(r'[.!?]+')
+_WORD = re.compile(r'\b\w+\b')
+
+class RunningSummary:
+    """
+    Streaming version of DocumentProcessor.generate_document_summary. Word
+    frequencies are exact; sentence selection draws from a bounded pool of
+    the best candidates so far, rescored against the final frequencies.
+    """
+
+    def __init__(self, max_length: int = 500, pool_size: int = SUMMARY_POOL_SIZE):
+        self.max_length = max_length
+        self.pool_size = pool_size
+        self.word_freq: Counter = Counter()
+        self.sentence_count = 0
+        self._first: List[str] = []                    # for documents of <= 3 sentences
+        self._pool: List[Tuple[int, str]] = []         # (sentence index, sentence)
+        self._head = ""
+        self._tail = ""                                # unterminated sentence carried over
+
+    def _words(self, sentence: str) -> List[str]:
+        return [w for w in _WORD.findall(sentence.lower()) if len(w) > 3]
+
+    def _score(self, sentence: str) -> int:
+        return sum(self.word_freq.get(w, 0) for w in self._words(sentence))
+
+    def _add_sentence(self, raw: str) -> None:
+        sentence = raw.strip()
+        if len(sentence) <= 20:
+            return
+        self.word_freq.update(self._words(sentence))
+        if len(self._first) < 4:
+            self._first.append(sentence)
+        self._pool.append((self.sentence_count, sentence))
+        self.sentence_count += 1
+
+    def _prune(self) -> None:
+        if len(self._pool) > 2 * self.pool_size:
+            ranked = sorted(self._pool, key=lambda item: (-self._score(item[1]), item[0]))
+            self._pool = sorted(ranked[:self.pool_size])
+
+    def update(self, part: str) -> None:
+        if len(self._head) < self.max_length:
+            self._head += part[:self.max_length - len(self._head)]
+        pieces = _SENTENCE_END.split(self._tail + part)
+        self._tail = pieces.pop()
+        for piece in pieces:
+            self._add_sentence(piece)
+        if len(self._tail) > SENTENCE_MAX_CHARS:
+            # too long to ever fit a summary; only its word counts matter
+            self._add_sentence(self._tail)
+            self._tail = ""
+        self._prune()
+
+    def result(self) -> str:
+        if self._tail:
+            self._add_sentence(self._tail)
+            self._tail = ""
+        if self.sentence_count <= 3:
+            return ' '.join(self._first)
+        ranked = sorted(self._pool, key=lambda item: (-self._score(item[1]), item[0]))
+        summary_sentences, current_length = [], 0
+        for _, sentence in ranked:
+            if current_length + len(sentence) <= self.max_length:
+                summary_sentences.append(sentence)
+                current_length += len(sentence)
+            else:
+                break
+        return '. '.join(summary_sentences) + '.' if summary_sentences else self._head
+
+class KeywordPresence:
+    """Which keywords of some vocabularies occur anywhere in the windows."""
+
+    def __init__(self, matcher, categories: Iterable[str]):
+        self.matcher = matcher
+        self.categories = tuple(categories)
+        self.found: Dict[str, Set[str]] = {cat: set() for cat in self.categories}
+
+    def update(self, window_lower: str) -> None:
+        counts = self.matcher.count(window_lower, self.categories, presence=True)
+        for cat in self.categories:
+            self.found[cat].update(counts.matched(cat))
+
+    def hits(self, category: str) -> int:
+        return len(self.found[category])
@@ -3,15 +3,20 @@
 import os
 import re
 import json
+import zlib
 import hashlib
 import logging
-import tempfile
+import threading
+from array import array
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 
 import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 
+from services.text_normalization import clean_text, collapse_whitespace
+
 # ---------- logging ----------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,107 +32,249 @@ except Exception:
     pass
 
 # ---------- model ----------
-MODEL_NAME = "facebook/bart-large-cnn"
+# LEGALDOC_SUMMARIZER_MODEL may point at a local checkpoint (offline use, benchmarks)
+MODEL_NAME = os.getenv("LEGALDOC_SUMMARIZER_MODEL", "facebook/bart-large-cnn")
+CACHE_DIR = Path(os.getenv("LEGALDOC_CACHE_DIR") or Path.home() / ".legaldoc_cache")
 MAX_MODEL_TOKENS = 1024
 CHUNK_TOKENS = 900
-CHUNK_STRIDE = 100
+
+# Content-defined chunking: a chunk may end after a sentence-final token
+# once it has CDC_MIN_TOKENS tokens, when the hash of the last CDC_WINDOW
+# token ids is 0 mod CDC_DIVISOR (~600-token chunks). Boundaries depend only
+# on nearby content, so an edit shifts its own chunk and not the rest.
+CDC_MIN_TOKENS = 256
+CDC_WINDOW = 8
+CDC_DIVISOR = 16
+
+# Inference backend, chosen once at startup:
+#   fp32 - reference path (deterministic, default)
+#   int8 - torch dynamic int8 quantization of the Linear layers
+#   onnx - exported ONNX graph run by onnxruntime (needs `optimum[onnxruntime]`)
+SUMMARIZER_BACKENDS = ("fp32", "int8", "onnx")
+ONNX_EXPORT_DIR = CACHE_DIR / "onnx" / MODEL_NAME.strip("/").replace("/", "--")
 
 _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=True)
-_model = AutoModelForSeq2SeqLM.from_pretrained(
-    MODEL_NAME,
-    use_safetensors=True,
-    trust_remote_code=False,
-)
-_local_summarizer = pipeline(
-    "summarization",
-    model=_model,
-    tokenizer=_tokenizer,
-    device=-1  # use CPU for maximum reproducibility
+
+def _load_fp32_model():
+    return AutoModelForSeq2SeqLM.from_pretrained(
+        MODEL_NAME,
+        use_safetensors=True,
+        trust_remote_code=False,
+    )
+
+def _load_onnx_model():
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    if (ONNX_EXPORT_DIR / "config.json").exists():
+        return ORTModelForSeq2SeqLM.from_pretrained(str(ONNX_EXPORT_DIR))
+    model = ORTModelForSeq2SeqLM.from_pretrained(MODEL_NAME, export=True)
+    try:
+        model.save_pretrained(str(ONNX_EXPORT_DIR))
+    except Exception as e:
+        logger.warning(f"Could not save ONNX export: {e}")
+    return model
+
+def build_summarizer(backend: str = "fp32"):
+    """
+    Build a summarization pipeline for the requested backend.
+    Returns (pipeline, resolved_backend); falls back to fp32 when the
+    requested backend is unknown or its runtime is not installed.
+    """
+    backend = (backend or "fp32").strip().lower()
+    if backend not in SUMMARIZER_BACKENDS:
+        logger.warning(f"Unknown summarizer backend '{backend}', using fp32")
+        backend = "fp32"
+
+    model = None
+    if backend == "onnx":
+        try:
+            model = _load_onnx_model()
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable ({e}); using fp32")
+            backend = "fp32"
+
+    if model is None:
+        model = _load_fp32_model()
+        model.eval()
+        if backend == "int8":
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    pipe = pipeline(
+        "summarization",
+        model=model,
+        tokenizer=_tokenizer,
+        device=-1  # use CPU for maximum reproducibility
+    )
+    return pipe, backend
+
+_local_summarizer, SUMMARIZER_BACKEND = build_summarizer(
+    os.getenv("LEGALDOC_SUMMARIZER_BACKEND", "fp32")
 )
+_model = _local_summarizer.model
+# The HF pipeline (and the fast tokenizer it mutates for truncation) is not
+# thread-safe, and the job queue runs summaries on several workers: every
+# model call and tokenizer encode/decode goes through this lock. Cache
+# lookups, extraction and cleaning still run concurrently.
+_model_lock = threading.RLock()
+# fp32 keeps the historical cache key; other backends get their own entries
+MODEL_TAG = MODEL_NAME if SUMMARIZER_BACKEND == "fp32" else f"{MODEL_NAME}@{SUMMARIZER_BACKEND}"
+logger.info(f"summarizer2 backend: {SUMMARIZER_BACKEND}")
 
 # ---------- persistent cache ----------
-CACHE_DIR = Path.home() / ".legaldoc_cache"
-CACHE_FILE = CACHE_DIR / "summaries.json"
-
-def _load_persistent_cache() -> Dict[str, str]:
+# Final summaries and map-step chunk summaries are kept one small file per
+# key (like services.analysis_cache): a new entry is one atomic write, so
+# job-queue workers can add entries concurrently, with a bounded in-memory
+# LRU in front of each directory.
+CACHE_FILE = CACHE_DIR / "summaries.json"                 # old single-file summary cache, migrated on import
+CHUNK_CACHE_FILE = CACHE_DIR / "chunk_summaries.json"     # old single-file chunk cache, migrated on import
+SUMMARY_CACHE_DIR = CACHE_DIR / "summaries"
+SUMMARY_MEMORY_ENTRIES = 1024
+# Chunk summaries are keyed by chunk token ids + generation params and
+# shared by every document (and version) containing the same chunk.
+CHUNK_CACHE_DIR = CACHE_DIR / "chunk_summaries"
+CHUNK_MEMORY_ENTRIES = 4096
+
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+_chunk_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _load_persistent_cache(path: Path) -> Dict[str, str]:
     try:
-        if CACHE_FILE.exists():
-            return json.loads(CACHE_FILE.read_text())
+        if path.exists():
+            return json.loads(path.read_text())
     except Exception:
         pass
     return {}
 
-def _save_persistent_cache(store: Dict[str, str]) -> None:
+def _entry_path(directory: Path, key: str) -> Path:
+    return directory / key[:2] / f"{key}.txt"
+
+def _remember(cache: "OrderedDict[str, str]", limit: int, key: str, value: str) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+def _get_entry(cache: "OrderedDict[str, str]", limit: int, directory: Path, key: str) -> Optional[str]:
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+    try:
+        value = _entry_path(directory, key).read_text(encoding="utf-8")
+    except OSError:
+        return None
+    _remember(cache, limit, key, value)
+    return value
+
+def _put_entry(cache: "OrderedDict[str, str]", limit: int, directory: Path, key: str, value: str) -> None:
+    _remember(cache, limit, key, value)
+    path = _entry_path(directory, key)
     try:
-        CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        CACHE_FILE.write_text(json.dumps(store, ensure_ascii=False, indent=2))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(value, encoding="utf-8")
+        os.replace(tmp, path)
     except Exception as e:
-        logger.warning(f"Could not write cache file: {e}")
+        logger.warning(f"Could not write summary cache entry: {e}")
 
-_persist_cache = _load_persistent_cache()
+def _get_summary(key: str) -> Optional[str]:
+    return _get_entry(_summary_cache, SUMMARY_MEMORY_ENTRIES, SUMMARY_CACHE_DIR, key)
 
-# ---------- file extraction ----------
-def _extract_with_pypdf(pdf_path: str) -> str:
-    from pypdf import PdfReader
-    reader = PdfReader(str(pdf_path))
-    return "\n".join((pg.extract_text() or "") for pg in reader.pages).strip()
+def _put_summary(key: str, summary: str) -> None:
+    _put_entry(_summary_cache, SUMMARY_MEMORY_ENTRIES, SUMMARY_CACHE_DIR, key, summary)
+
+def _get_chunk_summary(key: str) -> Optional[str]:
+    return _get_entry(_chunk_cache, CHUNK_MEMORY_ENTRIES, CHUNK_CACHE_DIR, key)
 
-def _extract_with_docx2txt(docx_path: str) -> str:
-    import docx2txt
-    return (docx2txt.process(str(docx_path)) or "").strip()
+def _put_chunk_summary(key: str, sub: str) -> None:
+    _put_entry(_chunk_cache, CHUNK_MEMORY_ENTRIES, CHUNK_CACHE_DIR, key, sub)
 
+def _migrate_cache_file(path: Path, directory: Path, put: Callable[[str, str], None]) -> None:
+    # earlier versions kept every entry of a cache in one JSON file
+    if not path.exists():
+        return
+    for key, value in _load_persistent_cache(path).items():
+        if not _entry_path(directory, key).exists():
+            put(key, value)
+    try:
+        path.unlink()
+    except OSError as e:
+        logger.warning(f"Could not remove old cache file {path.name}: {e}")
+
+_migrate_cache_file(CACHE_FILE, SUMMARY_CACHE_DIR, _put_summary)
+_migrate_cache_file(CHUNK_CACHE_FILE, CHUNK_CACHE_DIR, _put_chunk_summary)
+
+# ---------- file extraction ----------
 def extract_text(path: str) -> str:
-    p = Path(path)
-    ext = p.suffix.lower()
-    if ext in {".txt", ".md"}:
-        return p.read_text(errors="ignore")
-    if ext == ".pdf":
-        return _extract_with_pypdf(str(p))
-    if ext == ".docx":
-        return _extract_with_docx2txt(str(p))
-    return "Error: Unsupported file type"
+    # shared with the app pages; PDFs are page-streamed and cached by file SHA-256
+    from services.extraction import extract_text as _extract
+    return _extract(path)
 
 def extract_text_from_file(uploaded_file):
-    tmp_path = None
-    try:
-        if not uploaded_file:
-            return "Error: No file provided"
-        suffix = Path(getattr(uploaded_file, "name", "")).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
-        return extract_text(tmp_path)
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+    if not uploaded_file:
+        return "Error: No file provided"
+    # read straight from the upload buffer, no temp-file round trip
+    from services.extraction import extract_text_from_upload
+    return extract_text_from_upload(uploaded_file)
 
 # ---------- helpers ----------
 def _clean_text(text: str) -> str:
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"(The\s*){3,}", "The ", text)
-    text = re.sub(r"(\b\w+\b)( \1){2,}", r"\1", text)
-    return text.strip()
+    # linear-time and cached per document hash, shared with the Q&A index
+    return clean_text(text)
 
 def _tok_len(text: str) -> int:
-    return len(_tokenizer.encode(text, truncation=False))
-
-def _chunk_by_tokens(text: str, max_tokens: int, stride: int) -> List[str]:
-    ids = _tokenizer.encode(text, truncation=False)
-    n = len(ids)
-    if n <= max_tokens:
-        return [text]
-    chunks, start = [], 0
-    while start < n:
-        end = min(start + max_tokens, n)
-        chunk_ids = ids[start:end]
-        chunks.append(_tokenizer.decode(chunk_ids, skip_special_tokens=True))
-        if end >= n:
-            break
-        start = max(0, end - stride)
-    return chunks
+    with _model_lock:
+        return len(_tokenizer.encode(text, truncation=False))
 
-def _gen_kwargs(max_len: int) -> Dict:
+_sentence_end_ids: Optional[frozenset] = None
+
+def _sentence_end_token_ids() -> frozenset:
+    global _sentence_end_ids
+    if _sentence_end_ids is None:
+        _sentence_end_ids = frozenset(
+            i for tok, i in _tokenizer.get_vocab().items() if tok.endswith((".", "?", "!"))
+        )
+    return _sentence_end_ids
+
+def _content_defined_spans(ids: List[int], max_tokens: int) -> List[Tuple[int, int]]:
+    ends = _sentence_end_token_ids()
+    spans, start = [], 0
+    for i, tok in enumerate(ids):
+        length = i + 1 - start
+        if length >= max_tokens:
+            cut = True
+        elif length >= CDC_MIN_TOKENS and tok in ends:
+            window = array("I", ids[max(start, i + 1 - CDC_WINDOW): i + 1])
+            cut = zlib.crc32(window.tobytes()) % CDC_DIVISOR == 0
+        else:
+            cut = False
+        if cut:
+            spans.append((start, i + 1))
+            start = i + 1
+    if start < len(ids):
+        spans.append((start, len(ids)))
+    return spans
+
+def _chunk_by_tokens(text: str, max_tokens: int) -> List[List[int]]:
+    """Split text into content-defined chunks of token ids (no special tokens)."""
+    with _model_lock:
+        ids = _tokenizer.encode(text, add_special_tokens=False, truncation=False)
+    return [ids[a:b] for a, b in _content_defined_spans(ids, max_tokens)]
+
+def _gen_kwargs(max_len: int, greedy: bool = False) -> Dict:
     min_len = max(50, min(max_len - 10, int(max_len * 0.4)))
+    if greedy:
+        return dict(
+            max_length=max_len,
+            min_length=min(min_len, max(20, max_len // 3)),
+            do_sample=False,
+            num_beams=1,
+            no_repeat_ngram_size=3,
+        )
     return dict(
         max_length=max_len,
         min_length=min_len,
@@ -144,14 +291,20 @@ DATE_PAT = re.compile(
     rf"(?:effective\s+as\s+of|dated\s+as\s+of|as\s+of)\s+({_MONTHS}\s+\d{{1,2}},\s+\d{{4}})",
     re.IGNORECASE,
 )
+# Fact patterns match within bounded windows so a miss costs O(window) per
+# anchor, not a lazy scan to the end of the document.
+PARTY_WINDOW = 200
+PLACE_WINDOW = 80
 BETWEEN_PAT = re.compile(
-    r"(?:between|by and between)\s+(.+?)\s+(?:and)\s+(.+?)(?:\.|,|\n)",
-    re.IGNORECASE | re.DOTALL,
+    rf"(?:between|by and between)\s+([^\n]{{1,{PARTY_WINDOW}}}?)\s+(?:and)\s+([^\n]{{1,{PARTY_WINDOW}}}?)(?:\.|,|\n)",
+    re.IGNORECASE,
 )
+PARTIES_LINE_PAT = re.compile(rf"Parties?:\s*([^\n]{{1,{PARTY_WINDOW}}}?)\s*(?:\n|\.|;)", re.IGNORECASE)
 GOV_LAW_PAT = re.compile(
-    r"(?:governed by|governed and construed in accordance with)\s+(?:the\s+)?laws\s+of\s+([A-Za-z\s]+?)(?:,|\.)",
+    rf"(?:governed by|governed and construed in accordance with)\s+(?:the\s+)?laws\s+of\s+([A-Za-z\s]{{1,{PLACE_WINDOW}}}?)(?:,|\.)",
     re.IGNORECASE,
 )
+LAWS_OF_PAT = re.compile(rf"laws of (?:the )?(?:State of )?([A-Za-z\s]{{1,{PLACE_WINDOW}}})", re.IGNORECASE)
 TITLE_PAT = re.compile(
     r"(?i)\b(mutual|one[-\s]?way)?\s*non[-\s]?disclosure\s+agreement\b|"
     r"\bmaster\s+services\s+agreement\b|\bstatement\s+of\s+work\b|"
@@ -175,23 +328,23 @@ def _parse_date_to_iso(text: str) -> Optional[str]:
 def _extract_parties(text: str) -> Optional[str]:
     m = BETWEEN_PAT.search(text)
     if m:
-        a = re.sub(r"\s+", " ", m.group(1)).strip(' "’‘“”')
-        b = re.sub(r"\s+", " ", m.group(2)).strip(' "’‘“”')
+        a = collapse_whitespace(m.group(1)).strip(' "’‘“”')
+        b = collapse_whitespace(m.group(2)).strip(' "’‘“”')
         a = re.sub(r"\s*\(.*?\)$", "", a)
         b = re.sub(r"\s*\(.*?\)$", "", b)
         return f"{a} and {b}"
-    m2 = re.search(r"Parties?:\s*(.+?)\s*(?:\n|\.|;)", text, re.IGNORECASE | re.DOTALL)
+    m2 = PARTIES_LINE_PAT.search(text)
     if m2:
-        return re.sub(r"\s+", " ", m2.group(1)).strip()
+        return collapse_whitespace(m2.group(1))
     return None
 
 def _extract_governing_law(text: str) -> Optional[str]:
     m = GOV_LAW_PAT.search(text)
     if m:
-        return re.sub(r"\s+", " ", m.group(1)).strip()
-    m2 = re.search(r"laws of (?:the )?(?:State of )?([A-Za-z\s]+)", text, re.IGNORECASE)
+        return collapse_whitespace(m.group(1))
+    m2 = LAWS_OF_PAT.search(text)
     if m2:
-        return re.sub(r"\s+", " ", m2.group(1)).strip().rstrip(".")
+        return collapse_whitespace(m2.group(1)).rstrip(".")
     return None
 
 def _infer_title(text: str) -> Optional[str]:
@@ -211,79 +364,213 @@ def extract_key_facts(text: str) -> Dict[str, Optional[str]]:
         "governing_law": _extract_governing_law(t),
     }
 
+# ---------- run statistics (benchmarks / diagnostics) ----------
+_stats: Dict[str, int] = {"reduce_rounds": 0, "pieces": 0, "chunk_cache_hits": 0, "model_calls": 0}
+_stats_lock = threading.Lock()   # job-queue workers summarize concurrently
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+def summary_stats() -> Dict[str, int]:
+    """Counters since the last reset: reduce rounds, map pieces, chunk-cache hits, model calls."""
+    with _stats_lock:
+        return dict(_stats)
+
+def reset_summary_stats() -> None:
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
 # ---------- summarization core ----------
-def _summarize_once(text: str, max_len: int) -> str:
-    return _local_summarizer(text, **_gen_kwargs(max_len))[0]["summary_text"]
+def _run_model(text: str, **gen) -> str:
+    """One pipeline call, serialized across job-queue workers."""
+    with _model_lock:
+        return _local_summarizer(text, **gen)[0]["summary_text"]
+
+def _summarize_once(text: str, max_len: int, greedy: bool = False) -> str:
+    _count("model_calls")
+    return _run_model(text, **_gen_kwargs(max_len, greedy))
+
+def _chunk_cache_key(ids: List[int], gen: Dict) -> str:
+    params = json.dumps(gen, sort_keys=True)
+    return hashlib.sha256(
+        f"{MODEL_TAG}|{params}|".encode() + array("I", ids).tobytes()
+    ).hexdigest()
 
-def _reduce_until_fits(text: str, per_chunk_len: int, final_len: int) -> str:
+def _summarize_pieces(pieces: List[List[int]], max_len: int, greedy: bool = False,
+                      progress: Optional[Callable[[float, str], None]] = None) -> List[str]:
+    """Map step: summarize each chunk, reusing cached chunk summaries."""
+    gen = _gen_kwargs(max_len, greedy)
+    subs = []
+    for i, ids in enumerate(pieces):
+        if progress:
+            progress(i / len(pieces), f"chunk {i + 1}/{len(pieces)}")
+        key = _chunk_cache_key(ids, gen)
+        sub = _get_chunk_summary(key)
+        _count("pieces")
+        if sub is not None:
+            _count("chunk_cache_hits")
+        else:
+            with _model_lock:
+                text = _tokenizer.decode(ids, skip_special_tokens=True)
+            _count("model_calls")
+            sub = _run_model(text, **gen)
+            _put_chunk_summary(key, sub)
+        subs.append(sub)
+    return subs
+
+def _spread(items: List, k: int) -> List:
+    """Pick k evenly spaced items (keeps first and last) so a budget still covers the whole document."""
+    if k <= 0 or len(items) <= k:
+        return items
+    if k == 1:
+        return items[:1]
+    step = (len(items) - 1) / (k - 1)
+    return [items[round(i * step)] for i in range(k)]
+
+def _reduce_until_fits(text: str, per_chunk_len: int, final_len: int,
+                       greedy: bool = False, max_pieces: Optional[int] = None,
+                       progress: Optional[Callable[[float, str], None]] = None) -> str:
     """
     Iteratively summarize in chunks until the text fits the model context,
     then do a final bounded pass to keep the output short.
+    `greedy` and `max_pieces` trade quality for latency (fast tier).
+    `progress(fraction, message)` is called as chunks complete; the first
+    reduce round covers 0-90%, later rounds and the final pass the rest.
     """
     current = text
+    rounds = 0
     # Keep reducing while it doesn't fit in the model window
     while _tok_len(current) > MAX_MODEL_TOKENS:
-        pieces = _chunk_by_tokens(current, CHUNK_TOKENS, CHUNK_STRIDE)
-        subs = [_summarize_once(p, per_chunk_len) for p in pieces]
+        pieces = _chunk_by_tokens(current, CHUNK_TOKENS)
+        if max_pieces:
+            pieces = _spread(pieces, max_pieces)
+        report = None
+        if progress:
+            lo, hi = (0.0, 0.9) if rounds == 0 else (0.9, 0.95)
+            report = lambda f, msg, lo=lo, hi=hi: progress(lo + (hi - lo) * f, msg)
+        subs = _summarize_pieces(pieces, per_chunk_len, greedy, report)
+        rounds += 1
+        _count("reduce_rounds")
         current = _clean_text(" ".join(subs))
         # If somehow nothing changes, break to avoid loops
         if len(pieces) <= 1:
             break
     # Final bounded pass (even if it already fits) to enforce length cap
-    return _summarize_once(current, final_len)
+    if progress:
+        progress(0.95, "final pass")
+    return _summarize_once(current, final_len, greedy)
+
+# ---------- summary tiers ----------
+# instant: extractive sentences + key facts, no model call
+# fast:    greedy abstractive pass over a bounded number of chunks
+# full:    beam-search map-reduce over the whole document (reference)
+SUMMARY_TIERS = ("instant", "fast", "full")
+FAST_TIER_MAX_PIECES = 6
+
+def _format_summary(facts: Dict[str, Optional[str]], narrative: str) -> str:
+    def nz(x): return x if (x and str(x).strip()) else "Not specified"
+    return (
+        f"- Document Type / Title: {nz(facts.get('title'))}\n"
+        f"- Parties & Roles: {nz(facts.get('parties'))}\n"
+        f"- Effective Date: {nz(facts.get('effective_date'))}\n"
+        f"- Governing Law / Venue: {nz(facts.get('governing_law'))}\n"
+        f"- Narrative Summary: {narrative.strip()}"
+    )
+
+def _narrative_for_tier(cleaned: str, max_len: int, tier: str,
+                        progress: Optional[Callable[[float, str], None]] = None) -> str:
+    if tier == "instant":
+        from services.document_processor import DocumentProcessor
+        # max_len is a token budget; ~4 characters per token for English
+        return DocumentProcessor().generate_document_summary(cleaned, max_length=max_len * 4)
+    if tier == "fast":
+        return _reduce_until_fits(
+            cleaned,
+            per_chunk_len=max(60, int(max_len * 0.5)),
+            final_len=max(80, int(max_len * 0.75)),
+            greedy=True,
+            max_pieces=FAST_TIER_MAX_PIECES,
+            progress=progress,
+        )
+    # Two-stage reduce with a strict final cap
+    return _reduce_until_fits(
+        cleaned,
+        per_chunk_len=max(120, int(max_len * 0.75)),  # chunk summaries
+        final_len=max_len,                            # final cap
+        progress=progress,
+    )
 
 # ---------- public API ----------
-_memory_cache: Dict[str, str] = {}
+def _summary_cache_key(cleaned: str, max_len: int, tier: str) -> str:
+    # The full tier keeps the historical key so existing caches stay valid
+    tag = "schema-v3" if tier == "full" else f"schema-v3|{tier}"
+    return hashlib.md5(
+        f"{MODEL_TAG}|{max_len}|{tag}|".encode() + cleaned.encode()
+    ).hexdigest()
 
-def summarize_text(text: str, max_len: int = 220) -> str:
+def summarize_text(text: str, max_len: int = 220, tier: str = "full",
+                   progress: Optional[Callable[[float, str], None]] = None) -> str:
     """
     Deterministic, schema-anchored summary with a hard length cap.
     - Extracts light legal facts (title/parties/effective date/governing law)
-    - Generates a short narrative summary
+    - Generates a short narrative summary at the requested tier
+      ("instant", "fast" or "full"; see SUMMARY_TIERS)
     - Returns a fixed schema string
-    - Uses persistent cache keyed by cleaned text + model + schema tag
+    - Uses persistent cache keyed by cleaned text + model + schema tag + tier
+    - Reports progress(fraction, message) while chunks are summarized
     """
     if not text or not text.strip():
         return "Error: Empty text provided"
+    if tier not in SUMMARY_TIERS:
+        return f"Error: Unknown summary tier '{tier}'"
 
     cleaned = _clean_text(text)
-    cache_key = hashlib.md5(
-        f"{MODEL_NAME}|{max_len}|schema-v3|".encode() + cleaned.encode()
-    ).hexdigest()
+    cache_key = _summary_cache_key(cleaned, max_len, tier)
 
-    if cache_key in _persist_cache:
-        return _persist_cache[cache_key]
-    if cache_key in _memory_cache:
-        return _memory_cache[cache_key]
+    cached = _get_summary(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         facts = extract_key_facts(cleaned)
-        # Two-stage reduce with a strict final cap
-        narrative = _reduce_until_fits(
-            cleaned,
-            per_chunk_len=max(120, int(max_len * 0.75)),  # chunk summaries
-            final_len=max_len,                            # final cap
-        )
-        def nz(x): return x if (x and str(x).strip()) else "Not specified"
-        final = (
-            f"- Document Type / Title: {nz(facts.get('title'))}\n"
-            f"- Parties & Roles: {nz(facts.get('parties'))}\n"
-            f"- Effective Date: {nz(facts.get('effective_date'))}\n"
-            f"- Governing Law / Venue: {nz(facts.get('governing_law'))}\n"
-            f"- Narrative Summary: {narrative.strip()}"
-        )
+        narrative = _narrative_for_tier(cleaned, max_len, tier, progress)
+        final = _format_summary(facts, narrative)
 
-        _memory_cache[cache_key] = final
-        _persist_cache[cache_key] = final
-        _save_persistent_cache(_persist_cache)
+        _put_summary(cache_key, final)
         return final
 
     except Exception as e:
+        from services.job_queue import JobCancelled
+        if isinstance(e, JobCancelled):
+            raise
         logger.error(f"Error summarizing: {str(e)}")
         return f"Error summarizing: {str(e)}"
 
+def summarize_in_background(text: str, max_len: int = 220, tier: str = "full",
+                            priority: Optional[int] = None, label: str = "") -> str:
+    """
+    Queue summarize_text on the shared job queue and return the job id.
+    Identical in-flight requests (same cache key) share one job; poll with
+    services.job_queue.get_job_queue().status(job_id) / .result(job_id).
+    """
+    from services.job_queue import get_job_queue, PRIORITY_INTERACTIVE
+    key = None
+    if text and text.strip() and tier in SUMMARY_TIERS:
+        key = "summary:" + _summary_cache_key(_clean_text(text), max_len, tier)
+    return get_job_queue().submit(
+        summarize_text, text, max_len, tier,
+        key=key,
+        priority=PRIORITY_INTERACTIVE if priority is None else priority,
+        label=label or f"summary ({tier})",
+    )
+
 def clear_cache():
-    _memory_cache.clear()
+    """Drop the in-memory summary LRUs (entries on disk are kept)."""
+    with _cache_lock:
+        _summary_cache.clear()
+        _chunk_cache.clear()
 
 def test_functions():
     print("✅ summarizer2 loaded (BART deterministic + schema + hard cap)")
@@ -291,9 +578,12 @@ def test_functions():
     print("✅ extract_key_facts available")
 
 __all__ = [
+    "build_summarizer",
     "extract_text_from_file",
     "extract_text",
     "summarize_text",
+    "summarize_in_background",
+    "SUMMARY_TIERS",
     "extract_key_facts",
     "clear_cache",
 ]
@@ -310,13 +600,12 @@ def answer_from_context(context: str, question: str, max_len: int = 220) -> str:
         f"Context:\n{context}\n\nQuestion: {question}\nAnswer:"
     )
     try:
-        out = _local_summarizer(
+        return _run_model(
             prompt,
             max_length=max_len,
             min_length=max(50, int(max_len * 0.4)),
             do_sample=False
         )
-        return out[0]["summary_text"]
     except Exception as e:
         logger.error(f"Error in answer_from_context: {e}")
         return "Error: could not generate answer"
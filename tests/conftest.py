@@ -0,0 +1,25 @@
+# tests/conftest.py
+"""
+Shared test setup.
+
+Caches (LEGALDOC_CACHE_DIR) go to a throwaway directory. services/__init__.py
+wires up the Streamlit Q&A router; when Streamlit is not installed the
+services package is registered without running it, so the pure modules
+under test (indexes, stores, diffing) still import.
+"""
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("LEGALDOC_CACHE_DIR", tempfile.mkdtemp(prefix="legaldoc-tests-"))
+
+try:
+    import services  # noqa: F401
+except ImportError:
+    package = types.ModuleType("services")
+    package.__path__ = [str(ROOT / "services")]
+    sys.modules["services"] = package
@@ -0,0 +1,116 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.billing import BillingCalculator, ExpenseEntry, Invoice, TimeEntry
+from services.billing_store import BillingStore, session_billing_store
+
+NOW = datetime(2024, 6, 15, 12, 0)
+
+@pytest.fixture(scope="module")
+def book():
+    rng = random.Random(10)
+    entries = [TimeEntry(
+        id=f"t{i}", user_id=f"u{rng.randrange(8)}", matter_id=f"m{rng.randrange(20)}",
+        client_id=f"c{rng.randrange(5)}", date=NOW - timedelta(days=rng.randrange(365)),
+        hours=round(rng.uniform(0.1, 8), 2), description="", billing_rate=rng.choice([150.0, 250.0, 400.0]),
+        billable=rng.random() < 0.8, activity_type=rng.choice(["research", "drafting"]),
+        status=rng.choice(["draft", "approved", "billed"]), created_date=NOW,
+    ) for i in range(2000)]
+    invoices = [Invoice(
+        id=f"i{i}", client_id=f"c{rng.randrange(5)}", matter_id=f"m{rng.randrange(20)}",
+        invoice_number=f"INV-{i}", date_issued=NOW - timedelta(days=rng.randrange(200)),
+        # half a day off whole days, so "days overdue" never sits on a bucket edge
+        due_date=NOW - timedelta(days=rng.randrange(-30, 150), hours=12),
+        line_items=[], subtotal=0.0, tax_rate=0.0, tax_amount=0.0,
+        total_amount=round(rng.uniform(100, 20000), 2),
+        status=rng.choice(["draft", "sent", "overdue", "paid", "cancelled"]),
+    ) for i in range(400)]
+    expenses = [ExpenseEntry(
+        id=f"e{i}", user_id=f"u{rng.randrange(8)}", matter_id=f"m{rng.randrange(20)}",
+        client_id=f"c{rng.randrange(5)}", date=NOW - timedelta(days=rng.randrange(365)),
+        amount=round(rng.uniform(5, 500), 2), description="", category=rng.choice(["travel", "filing"]),
+        billable=rng.random() < 0.6, receipt_attached=False, status="approved", created_date=NOW,
+    ) for i in range(300)]
+    return entries, invoices, expenses
+
+def test_time_totals_match_loops(book):
+    entries, invoices, expenses = book
+    store = BillingStore(entries, invoices, expenses)
+    start, end = NOW - timedelta(days=90), NOW
+    window = [e for e in entries if start <= e.date < end]
+    totals = store.time_totals(start=start, end=end)
+    assert totals['entries'] == len(window)
+    assert math.isclose(totals['total_hours'], sum(e.hours for e in window))
+    assert math.isclose(totals['billable_hours'], sum(e.hours for e in window if e.billable))
+    assert math.isclose(totals['billable_amount'], sum(e.total_amount for e in window))
+
+    by_user = store.group_by('time', 'user', 'amount', status='approved')
+    expected = {}
+    for e in entries:
+        if e.status == 'approved':
+            expected[e.user_id] = expected.get(e.user_id, 0.0) + e.total_amount
+    assert by_user.keys() == expected.keys()
+    assert all(math.isclose(by_user[k], v) for k, v in expected.items())
+
+def test_invoice_and_expense_totals_match_loops(book):
+    entries, invoices, expenses = book
+    store = BillingStore(entries, invoices, expenses)
+    totals = store.invoice_totals()
+    billed = sum(inv.total_amount for inv in invoices)
+    collected = sum(inv.total_amount for inv in invoices if inv.status == 'paid')
+    assert math.isclose(totals['total_billed'], billed)
+    assert math.isclose(totals['total_collected'], collected)
+    assert math.isclose(totals['collection_rate'], collected / billed * 100)
+    assert totals['outstanding_count'] == sum(1 for inv in invoices if inv.status in ('sent', 'overdue'))
+    expense_totals = store.expense_totals(client='c1')
+    assert math.isclose(expense_totals['billable_amount'],
+                        sum(e.billable_amount for e in expenses if e.client_id == 'c1'))
+
+def test_aging_matches_calculator(book, monkeypatch):
+    _, invoices, _ = book
+    store = BillingStore(invoices=invoices)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return NOW
+    monkeypatch.setattr("models.billing.datetime", FrozenDatetime)
+    expected = BillingCalculator.calculate_aging(invoices)
+    got = store.aging(now=NOW)
+    assert expected.keys() == got.keys()
+    assert all(math.isclose(got[k], v, abs_tol=1e-6) for k, v in expected.items())
+
+def test_writes_upsert_and_delete(book):
+    entries, _, _ = book
+    store = BillingStore(entries[:10])
+    entries[0].hours += 1
+    store.update_time_entry(entries[0])
+    assert math.isclose(store.time_totals()['total_hours'], sum(e.hours for e in entries[:10]))
+    assert store.remove_time_entry(entries[1].id)
+    assert store.time_totals()['entries'] == 9
+    entries[0].hours -= 1
+
+def test_session_store_reads_loose_records_and_reloads_in_place_edits():
+    class MattersPageEntry:            # pages/matters.py shape: no user_id, status or billable
+        def __init__(self, id, hours):
+            self.id, self.matter_id, self.attorney_email = id, "m1", "a@firm.com"
+            self.date, self.hours, self.billable_rate = NOW, hours, 250.0
+
+    invoice = Invoice(id="i1", client_id="c1", matter_id="m1", invoice_number="INV-1", date_issued=NOW,
+                      due_date=NOW, line_items=[], subtotal=100.0, tax_rate=0.0, tax_amount=0.0,
+                      total_amount=100.0, status="sent")
+    state = {
+        'time_entries': [{"date": NOW.date(), "client": "Acme", "hours": 2.0, "rate": 100.0},   # app2 dicts
+                         MattersPageEntry("x1", 3.0)],
+        'invoices': [invoice],
+    }
+    store = session_billing_store(state)
+    assert store.time_totals()['total_hours'] == 5.0
+    assert store.time_totals()['billable_hours'] == 0.0      # no billable flag: not billable
+    assert store.invoice_totals()['total_collected'] == 0.0
+
+    invoice.status = "paid"                                  # edited in place, same list length
+    assert session_billing_store(state).invoice_totals()['total_collected'] == 100.0
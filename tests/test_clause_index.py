@@ -0,0 +1,75 @@
+import random
+
+from services.clause_index import ClauseIndex
+
+CLAUSES = {
+    'indemnification': "The Supplier shall indemnify and hold harmless the Customer from all claims, losses and damages arising out of the Services.",
+    'termination': "Either party may terminate this Agreement upon thirty days prior written notice to the other party.",
+    'confidentiality': "Each party shall keep the Confidential Information of the other party strictly confidential and use it only for this Agreement.",
+    'governing_law': "This Agreement shall be governed by and construed in accordance with the laws of the State of New York.",
+}
+FILLER = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet")
+
+def _document(rng, types):
+    """Text plus the analyze_contract-style key_clauses pointing into it."""
+    parts, key_clauses, offset = [], [], 0
+    for clause_type in types:
+        filler = " ".join(rng.choice(FILLER) for _ in range(8)) + ". "
+        clause = CLAUSES[clause_type].replace("thirty", rng.choice(["thirty", "sixty", "ninety"]))
+        key_clauses.append({'type': clause_type, 'location': offset + len(filler)})
+        parts.extend([filler, clause, " "])
+        offset += len(filler) + len(clause) + 1
+    return "".join(parts), key_clauses
+
+def _index(tmp_path, docs=40, seed=11):
+    rng = random.Random(seed)
+    index = ClauseIndex(root=tmp_path, persist=False)
+    for i in range(docs):
+        text, key_clauses = _document(rng, rng.sample(sorted(CLAUSES), 2))
+        index.add_document(f"doc{i}", text, f"Contract {i}", key_clauses=key_clauses)
+    return index
+
+def test_near_duplicate_is_found_first(tmp_path):
+    index = _index(tmp_path)
+    query = CLAUSES['termination'].replace("thirty", "forty-five")
+    matches = index.similar(query, top_k=5)
+    assert matches and matches[0].clause.clause_type == 'termination'
+    assert matches[0].score > 0.8
+    scores = [m.score for m in matches]
+    assert scores == sorted(scores, reverse=True)
+
+def test_filters_by_type_and_excluded_document(tmp_path):
+    index = _index(tmp_path)
+    query = CLAUSES['indemnification']
+    typed = index.similar(query, clause_type='governing_law', top_k=5)
+    assert typed and all(m.clause.clause_type == 'governing_law' for m in typed)
+    best = index.similar(query, top_k=1)[0].clause.document_id
+    assert all(m.clause.document_id != best for m in index.similar(query, exclude_document=best))
+
+def test_removed_document_is_not_returned(tmp_path):
+    index = _index(tmp_path, docs=5)
+    before = len(index)
+    for doc_id in [f"doc{i}" for i in range(5)]:
+        assert index.remove_document(doc_id)
+    assert len(index) == 0 < before
+    assert index.similar(CLAUSES['termination']) == []
+
+def test_index_is_scoped_to_its_organization(tmp_path):
+    acme = ClauseIndex(root=tmp_path / "acme", persist=False, organization_code="Acme Legal")
+    other = ClauseIndex(root=tmp_path / "other", persist=False, organization_code="other")
+    text, key_clauses = _document(random.Random(12), ['termination'])
+    acme.add_document("a1", text, key_clauses=key_clauses)
+    assert acme.similar(CLAUSES['termination'])[0].clause.organization_code == acme.organization_code
+    assert other.similar(CLAUSES['termination']) == []
+
+def test_snapshot_and_journal_reload(tmp_path):
+    rng = random.Random(13)
+    index = ClauseIndex(root=tmp_path)
+    for i in range(6):
+        text, key_clauses = _document(rng, ['confidentiality', 'governing_law'])
+        index.add_document(f"doc{i}", text, key_clauses=key_clauses)
+    index.save()
+    index.remove_document("doc0")                 # journaled after the snapshot
+    reloaded = ClauseIndex(root=tmp_path)
+    assert len(reloaded) == len(index)
+    assert all(m.clause.document_id != "doc0" for m in reloaded.similar(CLAUSES['confidentiality'], top_k=20))
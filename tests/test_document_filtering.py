@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.document import DocumentAnnotation, DocumentManager, DocumentSearchCriteria
+from services.document_index import DocumentIndex
+
+BASE = datetime(2023, 1, 1)
+
+@pytest.fixture(scope="module")
+def documents():
+    rng = random.Random(9)
+    docs = []
+    for i in range(3000):
+        doc = DocumentManager.create_document(
+            f"Doc {i} {rng.choice(['lease', 'nda', 'merger', 'brief'])}", f"M{rng.randrange(200)}",
+            f"C{rng.randrange(50)}", rng.choice(["contract", "brief", "memo", "motion"]),
+            rng.choice(["ann", "bob", "cy"]), file_size=rng.randrange(10 ** 6))
+        doc.status = rng.choice(["draft", "final", "approved"])
+        doc.tags = rng.sample(["nda", "urgent", "tax", "ip", "hr", "lease"], rng.randint(0, 2))
+        doc.created_date = BASE + timedelta(hours=rng.randrange(24 * 365))
+        doc.last_modified = doc.created_date + timedelta(hours=rng.randrange(100))
+        doc.extracted_text = f"clause {i} {rng.choice(['indemnity', 'payment', 'notice'])} text"
+        doc.is_privileged = rng.random() < 0.2
+        if rng.random() < 0.1:
+            doc.annotations = [DocumentAnnotation("note", "ann")]
+        docs.append(doc)
+    return docs
+
+CRITERIA = [
+    DocumentSearchCriteria(),
+    DocumentSearchCriteria(matter_ids=["M5", "M7"]),
+    DocumentSearchCriteria(client_names=["C3"], statuses=["final"], document_types=["contract", "memo"]),
+    DocumentSearchCriteria(tags=["nda"], created_after=BASE + timedelta(days=100),
+                           created_before=BASE + timedelta(days=130)),
+    DocumentSearchCriteria(min_file_size=1000, max_file_size=50_000, statuses=["draft"]),
+    DocumentSearchCriteria(created_by="ann", is_privileged=False, has_annotations=True),
+    DocumentSearchCriteria(modified_after=BASE + timedelta(days=300), security_levels=["internal"]),
+    DocumentSearchCriteria(text_query="indemnity", client_names=["C1", "C2", "C3"]),
+    DocumentSearchCriteria(text_query="merger", tags=["tax"]),
+    DocumentSearchCriteria(matter_ids=["no-such-matter"], statuses=["final"]),
+]
+
+@pytest.mark.parametrize("criteria", CRITERIA)
+def test_index_matches_scan(documents, criteria):
+    index = DocumentIndex(documents)
+    expected = [d.id for d in DocumentManager.filter_documents(documents, criteria)]
+    assert [d.id for d in DocumentManager.filter_documents(documents, criteria, index=index)] == expected
+    assert [d.id for d in DocumentManager.filter_documents(None, criteria, index=index)] == expected
+
+@pytest.mark.parametrize("criteria", CRITERIA)
+def test_index_result_is_limited_to_documents_passed(documents, criteria):
+    index = DocumentIndex(documents)
+    subset = documents[::3]
+    expected = [d.id for d in DocumentManager.filter_documents(subset, criteria)]
+    assert [d.id for d in DocumentManager.filter_documents(subset, criteria, index=index)] == expected
+
+def test_plan_orders_steps_by_estimate(documents):
+    index = DocumentIndex(documents)
+    criteria = DocumentSearchCriteria(statuses=["draft", "final"], matter_ids=["M5"],
+                                      created_after=BASE + timedelta(days=10))
+    steps = index.plan(criteria)
+    assert [s.estimate for s in steps] == sorted(s.estimate for s in steps)
+    assert steps[0].criterion == "matter_ids"
+    for step in steps:
+        # hash and range estimates are exact id counts
+        assert step.estimate == len(step.ids())
+    assert index.plan(DocumentSearchCriteria()) == []
+
+def test_updates_and_removals_are_reflected(documents):
+    docs = documents[:200]
+    index = DocumentIndex(docs)
+    moved = docs[0]
+    moved.status = "archived"
+    index.update(moved)
+    archived = DocumentSearchCriteria(statuses=["archived"])
+    assert [d.id for d in DocumentManager.filter_documents(docs, archived, index=index)] == [moved.id]
+    index.remove(moved.id)
+    assert DocumentManager.filter_documents(None, archived, index=index) == []
+    moved.status = "draft"
@@ -0,0 +1,34 @@
+from models.compact import CompactDocument, compact_field_store
+from models.document import DocumentManager
+from services.field_store import FieldStore, get_field_store
+
+def test_compact_keeps_only_given_handles(tmp_path):
+    store = FieldStore(tmp_path / "heap.bin")
+    kept = store.put(["kept"] * 100)
+    dropped = store.put("dropped " * 1000)
+    for i in range(20):
+        kept = store.put(["kept"] * 100 + [i], kept)        # each rewrite leaves the old copy behind
+    assert store.stats()['garbage_bytes'] > 0
+    moved = store.compact([kept])
+    assert store.get(moved[kept]) == ["kept"] * 100 + [19]
+    assert dropped not in moved
+    stats = store.stats()
+    assert stats['garbage_bytes'] == 0 and stats['file_bytes'] == (tmp_path / "heap.bin").stat().st_size
+    store.close()
+
+def test_compact_field_store_remaps_objects():
+    docs = []
+    for i in range(20):
+        doc = DocumentManager.create_document(f"Doc {i}", "M1", "C1", "contract", "ann")
+        doc.extracted_text = f"text of document {i} " * 50
+        docs.append(CompactDocument.from_model(doc))
+    for doc in docs:
+        doc.activity_log.append({'action': 'viewed'})
+        doc.release()
+    store = get_field_store()
+    assert compact_field_store(docs[:10], force=True)
+    assert store.stats()['garbage_bytes'] == 0
+    for i, doc in enumerate(docs[:10]):
+        assert doc.extracted_text == f"text of document {i} " * 50
+        assert doc.activity_log[-1] == {'action': 'viewed'}
+    assert not compact_field_store(docs[:10])               # nothing left to reclaim
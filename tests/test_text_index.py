@@ -0,0 +1,83 @@
+import math
+import random
+from collections import Counter
+
+from services.text_index import BM25_B, BM25_K1, NAME_WEIGHT, TAG_WEIGHT, TextIndex, tokenize
+
+WORDS = ["lease", "leasehold", "license", "indemnity", "indemnify", "payment", "party",
+         "parties", "term", "termination", "notice", "tax", "taxes", "nda", "merger"]
+
+def _documents(rng, n=300):
+    return [{
+        'id': f"d{i}",
+        'name': " ".join(rng.sample(WORDS, 2)),
+        'tags': rng.sample(["urgent", "nda", "tax", "hr"], rng.randint(0, 2)),
+        'content_text': " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))),
+    } for i in range(n)]
+
+def _weights(doc):
+    weights = Counter(tokenize(doc['content_text']))
+    for term in tokenize(doc['name']):
+        weights[term] += NAME_WEIGHT
+    for term in tokenize(" ".join(doc['tags'])):
+        weights[term] += TAG_WEIGHT
+    return weights
+
+def _reference(docs, query):
+    """Brute force: every term must match, the last one as a prefix; BM25 over the expansions."""
+    terms = tokenize(query)
+    weights = {d['id']: _weights(d) for d in docs}
+    vocab = {t for w in weights.values() for t in w}
+    groups = []
+    for i, term in enumerate(dict.fromkeys(terms)):
+        prefix = i == len(dict.fromkeys(terms)) - 1
+        groups.append([t for t in vocab if t == term or (prefix and t.startswith(term))])
+    matched = [d for d, w in weights.items() if all(any(t in w for t in g) for g in groups)]
+    n = len(docs)
+    lengths = {d: sum(w.values()) for d, w in weights.items()}
+    avg = sum(lengths.values()) / n
+    scores = {}
+    for d in matched:
+        score = 0.0
+        for group in groups:
+            for t in group:
+                df = sum(1 for w in weights.values() if t in w)
+                tf = weights[d].get(t, 0)
+                if tf:
+                    idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+                    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[d] / avg)
+                    score += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        scores[d] = score
+    return scores
+
+def test_search_matches_brute_force_bm25():
+    rng = random.Random(7)
+    docs = _documents(rng)
+    index = TextIndex(docs)
+    for query in ["lease", "lea", "indemn", "payment term", "party ter", "tax nda", "merger lic", "zzz"]:
+        expected = _reference(docs, query)
+        got = dict(index.search(query))
+        assert set(got) == set(expected), query
+        for doc_id, score in expected.items():
+            assert math.isclose(got[doc_id], score, rel_tol=1e-9), (query, doc_id)
+        ranked = [s for _, s in index.search(query)]
+        assert ranked == sorted(ranked, reverse=True)
+
+def test_prefix_only_applies_to_last_or_starred_terms():
+    index = TextIndex([{'id': '1', 'name': 'leasehold', 'tags': [], 'content_text': 'tax'},
+                       {'id': '2', 'name': 'lease', 'tags': [], 'content_text': 'taxes'}])
+    assert index.ids("lease tax") == {'2'}                      # "tax" matches "taxes"
+    assert index.ids("lease tax", prefix_last=False) == set()
+    assert index.ids("lease* tax ") == {'1'}                    # trailing space: "tax" is whole
+
+def test_updates_and_removals_are_reflected():
+    rng = random.Random(8)
+    docs = _documents(rng, 50)
+    index = TextIndex(docs)
+    docs[0]['content_text'] = "merger merger merger"
+    index.update(docs[0])
+    index.remove(docs[1]['id'])
+    remaining = [d for d in docs if d['id'] != docs[1]['id']]
+    assert len(index) == len(remaining)
+    for query in ["merger", "lease", "ta"]:
+        assert index.ids(query) == set(_reference(remaining, query))
@@ -0,0 +1,94 @@
+import difflib
+import random
+
+import pytest
+
+from services.version_diff import diff_versions, inline_diff, segment_spans
+
+SENTENCES = [
+    "The Supplier shall deliver the Goods within thirty days.",
+    "Payment is due within 45 days of the invoice date.",
+    "Either party may terminate this Agreement on notice.",
+    "This Agreement is governed by the laws of New York.",
+    "The Customer shall keep all Confidential Information secret.",
+    "Liability is limited to the fees paid in the last twelve months.",
+    "Notices must be sent in writing to the addresses above.",
+    "No waiver is effective unless signed by both parties.",
+]
+
+def _document(rng, n=60):
+    parts = []
+    for i in range(n):
+        parts.append(f"{i + 1}. {rng.choice(SENTENCES)}")
+        parts.append(rng.choice([" ", "\n", "\n\n"]))
+    return "".join(parts)
+
+def _edit(rng, text, edits=5):
+    words = text.split(" ")
+    for _ in range(edits):
+        i = rng.randrange(len(words))
+        op = rng.random()
+        if op < 0.4:
+            words[i] = rng.choice(["Vendor", "sixty", "Buyer", "shall not", "promptly"])
+        elif op < 0.7:
+            del words[i]
+        else:
+            words.insert(i, rng.choice(["(as amended)", "reasonable", "New clause here."]))
+    return " ".join(words)
+
+def _apply_hunks(old, diff):
+    out = old
+    for h in sorted(diff.hunks, key=lambda h: h.old_start, reverse=True):
+        out = out[:h.old_start] + h.new_text + out[h.old_end:]
+    return out
+
+@pytest.mark.parametrize("split_lines", [True, False])
+def test_segments_tile_the_text(split_lines):
+    rng = random.Random(1)
+    for _ in range(20):
+        text = _edit(rng, _document(rng, 30))
+        spans = segment_spans(text, split_lines)
+        assert "".join(text[a:b] for a, b in spans) == text
+        assert all(a < b for a, b in spans)
+
+def test_hunks_rebuild_new_text_exactly():
+    rng = random.Random(2)
+    for _ in range(30):
+        old = _document(rng)
+        new = _edit(rng, old, edits=rng.randint(0, 12))
+        diff = diff_versions(old, new, ignore_whitespace=False)
+        assert _apply_hunks(old, diff) == new
+
+def test_hunks_rebuild_new_text_up_to_whitespace():
+    rng = random.Random(3)
+    for _ in range(30):
+        old = _document(rng)
+        new = _edit(rng, old).replace(". ", ".\n", 3)   # rewrapped as well as edited
+        diff = diff_versions(old, new, ignore_whitespace=True)
+        assert _apply_hunks(old, diff).split() == new.split()
+
+def test_identical_versions_have_no_hunks():
+    text = _document(random.Random(4))
+    diff = diff_versions(text, text)
+    assert diff.hunks == []
+    assert diff.similarity == 1.0
+    assert diff_versions(text, text.replace("\n", " \n")).hunks == []
+
+def test_single_changed_sentence_matches_difflib():
+    old = " ".join(f"Clause {i}: the parties agree to term {i}." for i in range(200))
+    new = old.replace("agree to term 117.", "agree to amended term 117.")
+    diff = diff_versions(old, new)
+    spans_old, spans_new = segment_spans(old, False), segment_spans(new, False)
+    reference = difflib.SequenceMatcher(None, [old[a:b] for a, b in spans_old],
+                                        [new[a:b] for a, b in spans_new], autojunk=False)
+    assert [op for op in diff.opcodes if op[0] != 'equal'] == \
+           [op for op in reference.get_opcodes() if op[0] != 'equal']
+    assert len(diff.hunks) == 1 and "amended" in diff.hunks[0].new_text
+
+def test_inline_changes_cover_both_sides():
+    old = "The Supplier shall deliver the Goods within thirty days of the order."
+    new = "The Vendor shall promptly deliver the Goods within sixty days of the order."
+    changes = inline_diff(old, new)
+    assert "".join(c.old for c in changes) == old
+    assert "".join(c.new for c in changes) == new
+    assert any(c.op != 'equal' for c in changes)
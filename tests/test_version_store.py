@@ -0,0 +1,66 @@
+import random
+
+from services.version_store import REBASE_EVERY, VersionStore, apply_delta, make_delta
+
+CLAUSES = [
+    "1. Definitions. Capitalized terms have the meanings given below.\n",
+    "2. Services. The Provider shall perform the Services described in Exhibit A.\n",
+    "3. Fees. The Client shall pay the fees within thirty (30) days.\n",
+    "4. Term. This Agreement starts on the Effective Date and lasts one year.\n",
+    "5. Termination. Either party may terminate on sixty days' written notice.\n",
+    "6. Confidentiality. Each party keeps the other's information confidential.\n",
+    "7. Governing Law. The laws of the State of Delaware govern this Agreement.\n",
+]
+
+def _revise(rng, text):
+    lines = text.splitlines(keepends=True)
+    i = rng.randrange(len(lines))
+    op = rng.random()
+    if op < 0.5:
+        lines[i] = lines[i].replace("shall", rng.choice(["must", "will", "shall promptly"]), 1)
+    elif op < 0.75 and len(lines) > 3:
+        del lines[i]
+    else:
+        lines.insert(i, f"{rng.randint(8, 99)}. Amendment. {rng.choice(CLAUSES)[3:]}")
+    return "".join(lines)
+
+def test_make_delta_round_trips():
+    rng = random.Random(5)
+    text = "".join(CLAUSES * 20)
+    for _ in range(50):
+        new = _revise(rng, text)
+        assert apply_delta(text, make_delta(text, new)) == new
+        text = new
+    assert apply_delta("", make_delta("", "fresh text")) == "fresh text"
+    assert apply_delta("old text", make_delta("old text", "")) == ""
+
+def test_every_version_rebuilds_from_disk(tmp_path):
+    rng = random.Random(6)
+    store = VersionStore(root=tmp_path, cache_entries=2)
+    versions = ["".join(CLAUSES * 30)]
+    for _ in range(3 * REBASE_EVERY):
+        versions.append(_revise(rng, versions[-1]))
+    for i, text in enumerate(versions):
+        assert store.add("doc-1", text) == i
+
+    store.clear_memory()
+    reopened = VersionStore(root=tmp_path)
+    for i in rng.sample(range(len(versions)), len(versions)):
+        assert reopened.text("doc-1", i) == versions[i]
+
+    manifest = reopened.manifest("doc-1")
+    assert any(e['kind'] == 'delta' for e in manifest)
+    # no version sits behind more than REBASE_EVERY - 1 deltas
+    assert all(i - e['base'] < REBASE_EVERY for i, e in enumerate(manifest))
+    stats = reopened.stats("doc-1")
+    assert stats['versions'] == len(versions)
+    assert stats['stored_bytes'] < stats['text_bytes']
+
+def test_documents_keep_separate_chains(tmp_path):
+    store = VersionStore(root=tmp_path)
+    store.add("a", "first version of a")
+    store.add("b", "first version of b")
+    store.add("a", "second version of a")
+    assert store.text("a", 1) == "second version of a"
+    assert store.text("b", 0) == "first version of b"
+    assert store.stats("b")['versions'] == 1
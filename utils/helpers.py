@@ -840,6 +840,14 @@ def search_session_data(query: str, data_types: List[str] = None) -> Dict[str, L
     for data_type in data_types:
         results[data_type] = []
         data_list = st.session_state.get(data_type, [])
+
+        if data_type == 'documents':
+            # answered from the session's inverted index (names, tags, text)
+            from services.text_index import session_text_index
+            matched = session_text_index(st.session_state).ids(query)
+            results[data_type] = [item for item in data_list
+                                  if str(item.get('id') if isinstance(item, dict) else getattr(item, 'id', '')) in matched]
+            continue
         
         for item in data_list:
             # Search in various fields based on data type
@@ -847,8 +855,6 @@ def search_session_data(query: str, data_types: List[str] = None) -> Dict[str, L
                 searchable_text = f"{getattr(item, 'name', '')} {getattr(item, 'client_type', '')} {getattr(item, 'contact_info', {}).get('email', '')}".lower()
             elif data_type == 'matters':
                 searchable_text = f"{getattr(item, 'name', '')} {getattr(item, 'description', '')} {getattr(item, 'client_name', '')}".lower()
-            elif data_type == 'documents':
-                searchable_text = f"{getattr(item, 'name', '')} {getattr(item, 'extracted_text', '')} {' '.join(getattr(item, 'tags', []))}".lower()
             else:
                 searchable_text = str(item).lower()
             